@@ -7,22 +7,32 @@ Requirements:
     pip install pandas numpy requests beautifulsoup4 faker
 
 Usage:
-    python generate_complete_dataset.py
+    python Data.py                      # default sizes (3k customers, 10k interactions)
+    python Data.py --scale 1000         # 1000x rows, e.g. 10M interactions for load tests
+    python Data.py --seed 7 --output-dir /tmp/data
+    python Data.py --scale 1000 --chunk-size 250000 --workers 8   # sharded, bounded memory
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
 import json
 import os
+import re
+import string
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import requests
 from bs4 import BeautifulSoup
 import time
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Columnar copies are skipped without pyarrow
+    pa = feather = None
 
 # ============================================================
 # CONFIGURATION
@@ -34,6 +44,10 @@ CONFIG = {
     'num_campaigns': 30,
     'num_products': 50,
     'scrape_complaints': False,  # Set True to try scraping (may fail)
+    'seed': 42,  # Same seed + same sizes = same dataset (dates are relative to today)
+    'columnar_copy': True,  # Also write an Arrow (.feather) copy of each CSV for fast API startup
+    'chunk_size': None,  # Rows per shard; set to stream profiles/interactions to disk across a process pool
+    'workers': None,  # Processes for chunked mode (default: CPU count)
     'output_dir': 'data'
 }
 
@@ -184,6 +198,18 @@ ISSUE_TEMPLATES = {
     ]
 }
 
+# Low-cardinality columns stored as categoricals in the columnar copies
+SENTIMENTS = ['positive', 'neutral', 'negative', 'very_negative']
+CHURN_RISKS = ['low', 'medium', 'high', 'critical']
+
+CATEGORICAL_DOMAINS = {
+    'operator': OPERATORS,
+    'category': list(ISSUE_TEMPLATES.keys()),
+    'geography': ALL_CITIES,
+    'churn_risk': CHURN_RISKS,
+    'sentiment': SENTIMENTS
+}
+
 # ============================================================
 # HELPER FUNCTIONS
 # ============================================================
@@ -193,98 +219,203 @@ def create_output_directory():
     os.makedirs(CONFIG['output_dir'], exist_ok=True)
     print(f"✅ Output directory: {CONFIG['output_dir']}/")
 
-def generate_customer_name():
-    """Generate realistic Indian names"""
-    first_names = ['Rahul', 'Priya', 'Amit', 'Sneha', 'Rajesh', 'Anjali', 'Vikram', 'Pooja', 
-                   'Arjun', 'Kavita', 'Sanjay', 'Neha', 'Karan', 'Divya', 'Arun', 'Ritu',
-                   'Varun', 'Simran', 'Suresh', 'Meera', 'Rohan', 'Shreya', 'Manish', 'Sakshi']
-    last_names = ['Kumar', 'Sharma', 'Singh', 'Patel', 'Gupta', 'Reddy', 'Iyer', 'Joshi',
-                  'Mehta', 'Nair', 'Desai', 'Rao', 'Pillai', 'Agarwal', 'Chopra', 'Kapoor']
-    return f"{random.choice(first_names)} {random.choice(last_names)}"
+def to_columnar_dtypes(df):
+    """Cast known low-cardinality columns to categoricals with a stable category order"""
+    df = df.copy()
+    for col, domain in CATEGORICAL_DOMAINS.items():
+        if col in df.columns:
+            extra = sorted(set(df[col].dropna().unique()) - set(domain))
+            df[col] = pd.Categorical(df[col], categories=list(domain) + extra)
+    return df
+
+def save_dataset(df, output_file):
+    """Save a dataset as CSV plus, when pyarrow is available, a memory-mappable Arrow copy"""
+    df.to_csv(output_file, index=False)
+
+    if CONFIG['columnar_copy'] and feather is not None:
+        columnar_file = os.path.splitext(output_file)[0] + '.feather'
+        feather.write_feather(to_columnar_dtypes(df), columnar_file, compression='uncompressed')
+
+FIRST_NAMES = ['Rahul', 'Priya', 'Amit', 'Sneha', 'Rajesh', 'Anjali', 'Vikram', 'Pooja', 
+               'Arjun', 'Kavita', 'Sanjay', 'Neha', 'Karan', 'Divya', 'Arun', 'Ritu',
+               'Varun', 'Simran', 'Suresh', 'Meera', 'Rohan', 'Shreya', 'Manish', 'Sakshi']
+LAST_NAMES = ['Kumar', 'Sharma', 'Singh', 'Patel', 'Gupta', 'Reddy', 'Iyer', 'Joshi',
+              'Mehta', 'Nair', 'Desai', 'Rao', 'Pillai', 'Agarwal', 'Chopra', 'Kapoor']
+
+def as_text(values):
+    """Object array of strings, so `+` concatenates element-wise"""
+    return np.asarray(values).astype(str).astype(object)
+
+def zero_pad(values, width):
+    """Zero-padded string form of an integer array"""
+    return as_text(np.char.zfill(np.asarray(values).astype(str), width))
+
+def format_dates(days_ago, now):
+    """'YYYY-MM-DD' strings for `now` minus an array of day offsets"""
+    dates = np.datetime64(now.date()) - np.asarray(days_ago).astype('timedelta64[D]')
+    return as_text(np.datetime_as_string(dates, unit='D'))
 
-def generate_email(name, domain='email.com'):
-    """Generate email from name"""
-    clean_name = name.lower().replace(' ', '.')
-    return f"{clean_name}{random.randint(1, 999)}@{domain}"
+def format_weeks(dates):
+    """'%Y-W%U' week labels (weeks start on Sunday) for a datetime64[D] array"""
+    year_start = dates.astype('datetime64[Y]').astype('datetime64[D]')
+    day_of_year = (dates - year_start).astype(np.int64)
+    weekday_from_sunday = (dates.astype(np.int64) + 4) % 7  # 1970-01-01 was a Thursday
+    week = (day_of_year + 7 - weekday_from_sunday) // 7
+    return as_text(np.datetime_as_string(dates, unit='Y')) + '-W' + zero_pad(week, 2)
 
-def generate_phone():
-    """Generate Indian phone number"""
-    return f"+91-{random.randint(7000000000, 9999999999)}"
+def generate_customer_names(n, rng):
+    """Generate n realistic Indian names"""
+    return as_text(rng.choice(FIRST_NAMES, n)) + ' ' + as_text(rng.choice(LAST_NAMES, n))
+
+def generate_emails(names, rng, domain='email.com'):
+    """Generate emails from names"""
+    clean_names = as_text(np.char.replace(np.char.lower(names.astype(str)), ' ', '.'))
+    return clean_names + as_text(rng.integers(1, 1000, len(names))) + f'@{domain}'
+
+def generate_phones(n, rng):
+    """Generate Indian phone numbers"""
+    return '+91-' + as_text(rng.integers(7000000000, 10000000000, n))
+
+def other_operators(operator_idx, rng):
+    """For each row, pick uniformly among the operators the customer is not on"""
+    offset = rng.integers(1, len(OPERATORS), len(operator_idx))
+    return np.array(OPERATORS)[(operator_idx + offset) % len(OPERATORS)]
+
+# Values for every {placeholder} in ISSUE_TEMPLATES, drawn for k rows at once.
+# `c` holds the customer columns of those rows.
+TEMPLATE_FIELDS = {
+    'operator': lambda c, k, rng: c['operator'],
+    'city': lambda c, k, rng: c['geography'],
+    'days': lambda c, k, rng: rng.integers(1, 8, k),
+    'times': lambda c, k, rng: rng.integers(2, 6, k),
+    'frequency': lambda c, k, rng: rng.choice(['5', '10', '15', 'few'], k),
+    'event': lambda c, k, rng: rng.choice(['road construction', 'heavy rain', 'building work', 'cable theft'], k),
+    'speed': lambda c, k, rng: rng.integers(10, 41, k),
+    'plan_speed': lambda c, k, rng: rng.choice([50, 100, 200, 300, 500], k),
+    'actual_speed': lambda c, k, rng: rng.integers(15, 81, k),
+    'upload_speed': lambda c, k, rng: rng.integers(5, 31, k),
+    'morning_speed': lambda c, k, rng: rng.integers(80, 151, k),
+    'evening_speed': lambda c, k, rng: rng.integers(20, 61, k),
+    'light_color': lambda c, k, rng: rng.choice(['red', 'orange', 'blinking'], k),
+    'time': lambda c, k, rng: rng.choice(['7-10 PM', 'evening', 'night', 'peak hours'], k),
+    'old_bill': lambda c, k, rng: c['current_plan_value'],
+    'new_bill': lambda c, k, rng: c['current_plan_value'] + rng.integers(200, 801, k),
+    'extra': lambda c, k, rng: rng.integers(100, 501, k),
+    'date': lambda c, k, rng: rng.choice(['last week', '3 days ago', 'yesterday', '5th Nov'], k),
+    'amount': lambda c, k, rng: rng.integers(500, 2001, k),
+    'plan_price': lambda c, k, rng: c['current_plan_value'],
+    'actual_bill': lambda c, k, rng: c['current_plan_value'] + rng.integers(100, 501, k),
+    'cashback': lambda c, k, rng: rng.integers(50, 501, k),
+    'correct': lambda c, k, rng: c['current_plan_value'],
+    'charged': lambda c, k, rng: c['current_plan_value'] + rng.integers(50, 201, k),
+    'current_bill': lambda c, k, rng: c['current_plan_value'],
+    'target_plan': lambda c, k, rng: np.maximum(299, c['current_plan_value'] - rng.integers(200, 501, k)),
+    'competitor': lambda c, k, rng: other_operators(c['operator_idx'], rng),
+    'competitor_price': lambda c, k, rng: c['current_plan_value'] - rng.integers(100, 301, k),
+    'budget': lambda c, k, rng: rng.integers(300, 701, k),
+    'channel_count': lambda c, k, rng: rng.integers(10, 51, k),
+    'error_code': lambda c, k, rng: rng.choice(['E-404', 'E-16', 'E-8', 'E-100', 'NO SIGNAL'], k),
+    'route': lambda c, k, rng: rng.choice(['Mumbai-Pune highway', 'Delhi-Jaipur route', 'office commute'], k),
+    'area': lambda c, k, rng: c['geography'],
+    'old_operator': lambda c, k, rng: other_operators(c['operator_idx'], rng),
+    'pincode': lambda c, k, rng: c['address_pincode'],
+    'current_plan': lambda c, k, rng: as_text(rng.choice([50, 100, 200], k)) + 'Mbps',
+    'tenure': lambda c, k, rng: np.maximum(c['tenure_months'] // 12, 1),
+    'months': lambda c, k, rng: rng.integers(3, 13, k)
+}
+
+def fill_templates(templates, template_idx, customer, rng):
+    """Format rows in bulk: one vectorized concatenation per template instead of one .format() per row"""
+    text = np.empty(len(template_idx), dtype=object)
+    formatter = string.Formatter()
+
+    for t, template in enumerate(templates):
+        rows = np.flatnonzero(template_idx == t)
+        if len(rows) == 0:
+            continue
+
+        subset = {key: values[rows] for key, values in customer.items()}
+        values = {}  # a placeholder repeated in one template gets the same value, as with str.format
+        filled = np.full(len(rows), '', dtype=object)
+        for literal, field, _, _ in formatter.parse(template):
+            if literal:
+                filled = filled + literal
+            if field is not None:
+                if field not in values:
+                    values[field] = as_text(TEMPLATE_FIELDS[field](subset, len(rows), rng))
+                filled = filled + values[field]
+        text[rows] = filled
+
+    return text
 
 # ============================================================
 # STEP 1: GENERATE CUSTOMER PROFILES
 # ============================================================
 
-def generate_customer_profiles(num_customers):
+def build_customer_profiles(n, rng, start_id=0, now=None):
+    """Build `n` customer profiles numbered from CUST_{10000 + start_id}"""
+    now = now or datetime.now()
+
+    names = generate_customer_names(n, rng)
+    operator = rng.choice(OPERATORS, n)
+    city = rng.choice(ALL_CITIES, n)
+
+    # Service type distribution
+    service_type = rng.choice(['fiber', 'postpaid', 'prepaid'], n, p=[0.3, 0.3, 0.4])
+
+    # Plan value based on operator and service type
+    plan_value = np.zeros(n, dtype=np.int64)
+    for op in OPERATORS:
+        for service in ['fiber', 'postpaid', 'prepaid']:
+            mask = (operator == op) & (service_type == service)
+            plan_value[mask] = rng.choice(PLANS[op.lower()].get(service, [399, 699, 999]), mask.sum())
+
+    # Tenure (months as customer)
+    tenure_weights = np.array([10]*12 + [8]*12 + [6]*24 + [4]*36 + [2]*36, dtype=float)
+    tenure = rng.choice(np.arange(1, 121), n, p=tenure_weights / tenure_weights.sum())
+
+    # Customer segment
+    segment = np.select([plan_value >= 1500, plan_value >= 700], ['Premium', 'Standard'], 'Basic')
+
+    df = pd.DataFrame({
+        'customer_id': 'CUST_' + as_text(10000 + start_id + np.arange(n)),
+        'customer_name': names,
+        'email': generate_emails(names, rng),
+        'phone': generate_phones(n, rng),
+        'operator': as_text(operator),
+        'account_created_date': format_dates(tenure * 30, now),
+        'tenure_months': tenure,
+        'customer_segment': as_text(segment),
+        'service_type': as_text(service_type),
+        'current_plan': as_text(operator) + ' ' + as_text(np.char.title(service_type)) + ' ' + as_text(plan_value),
+        'current_plan_value': plan_value,
+        'products_subscribed': as_text(rng.choice([
+            'Internet',
+            'Internet,TV',
+            'Internet,Phone',
+            'Internet,TV,Phone'
+        ], n)),
+        'auto_pay_enabled': rng.choice([True, False], n),
+        'payment_method': as_text(rng.choice(['Credit Card', 'Debit Card', 'UPI', 'Net Banking', 'Cash'], n)),
+        'last_payment_date': format_dates(rng.integers(1, 31, n), now),
+        'outstanding_balance': plan_value * np.array([0, 0, 0, 1, 2])[rng.integers(0, 5, n)],
+        'total_lifetime_value': plan_value * tenure,
+        'geography': as_text(city),
+        'region': pd.Series(city).map(REGIONS).fillna('West').values,
+        'address_pincode': rng.integers(400001, 600101, n),
+        'age_group': as_text(rng.choice(['18-25', '26-35', '36-50', '50+'], n)),
+        'customer_type': as_text(rng.choice(['Individual', 'SME', 'Enterprise'], n, p=[0.8, 0.15, 0.05]))
+    })
+    return df
+
+def generate_customer_profiles(num_customers, rng=None):
     """Generate customer profile dataset"""
     print(f"\n📊 Generating {num_customers} customer profiles...")
-    
-    customers = []
-    
-    for i in range(num_customers):
-        customer_id = f'CUST_{10000 + i}'
-        name = generate_customer_name()
-        operator = random.choice(OPERATORS)
-        city = random.choice(ALL_CITIES)
-        
-        # Service type distribution
-        service_type = random.choices(
-            ['fiber', 'postpaid', 'prepaid'],
-            weights=[0.3, 0.3, 0.4]
-        )[0]
-        
-        # Plan value based on service type
-        plan_value = random.choice(PLANS[operator.lower()].get(service_type, [399, 699, 999]))
-        
-        # Tenure (months as customer)
-        tenure = random.choices(
-            range(1, 121),
-            weights=[10]*12 + [8]*12 + [6]*24 + [4]*36 + [2]*36
-        )[0]
-        
-        # Customer segment
-        if plan_value >= 1500:
-            segment = 'Premium'
-        elif plan_value >= 700:
-            segment = 'Standard'
-        else:
-            segment = 'Basic'
-        
-        customer = {
-            'customer_id': customer_id,
-            'customer_name': name,
-            'email': generate_email(name),
-            'phone': generate_phone(),
-            'operator': operator,
-            'account_created_date': (datetime.now() - timedelta(days=tenure*30)).strftime('%Y-%m-%d'),
-            'tenure_months': tenure,
-            'customer_segment': segment,
-            'service_type': service_type,
-            'current_plan': f"{operator} {service_type.title()} {plan_value}",
-            'current_plan_value': plan_value,
-            'products_subscribed': random.choice([
-                'Internet',
-                'Internet,TV',
-                'Internet,Phone',
-                'Internet,TV,Phone'
-            ]),
-            'auto_pay_enabled': random.choice([True, False]),
-            'payment_method': random.choice(['Credit Card', 'Debit Card', 'UPI', 'Net Banking', 'Cash']),
-            'last_payment_date': (datetime.now() - timedelta(days=random.randint(1, 30))).strftime('%Y-%m-%d'),
-            'outstanding_balance': random.choice([0, 0, 0, plan_value, plan_value*2]),
-            'total_lifetime_value': plan_value * tenure,
-            'geography': city,
-            'region': REGIONS.get(city, 'West'),
-            'address_pincode': random.randint(400001, 600100),
-            'age_group': random.choice(['18-25', '26-35', '36-50', '50+']),
-            'customer_type': random.choices(['Individual', 'SME', 'Enterprise'], weights=[0.8, 0.15, 0.05])[0]
-        }
-        
-        customers.append(customer)
-    
-    df = pd.DataFrame(customers)
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
+    df = build_customer_profiles(num_customers, rng)
+
     output_file = f"{CONFIG['output_dir']}/customer_profiles.csv"
-    df.to_csv(output_file, index=False)
+    save_dataset(df, output_file)
     print(f"   ✅ Saved {len(df)} customer profiles to {output_file}")
     
     return df
@@ -293,255 +424,282 @@ def generate_customer_profiles(num_customers):
 # STEP 2: GENERATE CUSTOMER INTERACTIONS
 # ============================================================
 
-def generate_customer_interactions(customers_df, num_interactions):
+# Issue category likelihood by service type
+FIBER_CATEGORY_WEIGHTS = {
+    'internet_connectivity': 0.25,
+    'internet_speed': 0.20,
+    'billing_overcharge': 0.15,
+    'billing_downgrade': 0.10,
+    'tv_channels': 0.10,
+    'tv_technical': 0.05,
+    'network_quality': 0.05,
+    'account_issues': 0.05,
+    'product_inquiry': 0.03,
+    'customer_retention': 0.02
+}
+MOBILE_CATEGORY_WEIGHTS = {
+    'network_quality': 0.25,
+    'billing_overcharge': 0.20,
+    'billing_downgrade': 0.15,
+    'internet_connectivity': 0.10,
+    'internet_speed': 0.10,
+    'account_issues': 0.10,
+    'product_inquiry': 0.05,
+    'customer_retention': 0.03,
+    'tv_channels': 0.01,
+    'tv_technical': 0.01
+}
+
+# Keywords that drive sentiment and churn labels
+NEGATIVE_KEYWORDS = ['frustrated', 'cheating', 'fraud', 'unacceptable', 'leaving', 'disappointed', 'poor', 'terrible']
+VERY_NEGATIVE_KEYWORDS = ['switch', 'port', 'competitor', 'leaving']
+POSITIVE_KEYWORDS = ['interested', 'inquiry', 'upgrade', 'want to']
+
+def contains_any(texts, keywords):
+    """Vectorized `any(word in text for word in keywords)`"""
+    return texts.str.contains('|'.join(re.escape(word) for word in keywords), regex=True).values
+
+def draw_categories(is_fiber, rng):
+    """Draw an issue category per row from the fiber or mobile weight table"""
+    category = np.empty(len(is_fiber), dtype=object)
+    for mask, weights in [(is_fiber, FIBER_CATEGORY_WEIGHTS), (~is_fiber, MOBILE_CATEGORY_WEIGHTS)]:
+        p = np.array(list(weights.values()))
+        category[mask] = rng.choice(list(weights.keys()), mask.sum(), p=p / p.sum())
+    return category
+
+# Profile columns an interaction copies from its customer
+CUSTOMER_COLUMNS = ['customer_id', 'operator', 'geography', 'region', 'current_plan_value',
+                    'address_pincode', 'tenure_months', 'service_type']
+
+def build_customer_interactions(customers_df, n, rng, start_id=0, now=None):
+    """Build `n` interactions for random customers, numbered from INT_{start_id}"""
+    now = now or datetime.now()
+
+    # Select random customers
+    picked = rng.integers(0, len(customers_df), n)
+    customer = {col: customers_df[col].values[picked] for col in CUSTOMER_COLUMNS}
+    customer['operator_idx'] = pd.Categorical(customer['operator'], categories=OPERATORS).codes
+
+    # Select issue category (weighted by likelihood) and fill its templates in bulk
+    category = draw_categories(customer['service_type'] == 'fiber', rng)
+    text = np.empty(n, dtype=object)
+    for cat, templates in ISSUE_TEMPLATES.items():
+        rows = np.flatnonzero(category == cat)
+        if len(rows) == 0:
+            continue
+        subset = {key: values[rows] for key, values in customer.items()}
+        text[rows] = fill_templates(templates, rng.integers(0, len(templates), len(rows)), subset, rng)
+
+    # Determine sentiment based on keywords
+    text_lower = pd.Series(text).str.lower()
+    very_negative = contains_any(text_lower, VERY_NEGATIVE_KEYWORDS)
+    negative = ~very_negative & contains_any(text_lower, NEGATIVE_KEYWORDS)
+    positive = ~very_negative & ~negative & contains_any(text_lower, POSITIVE_KEYWORDS)
+    tiers = [very_negative, negative, positive]
+
+    sentiment = np.select(tiers, ['very_negative', 'negative', 'positive'], 'neutral')
+    sentiment_score = np.round(rng.uniform(
+        np.select(tiers, [-0.95, -0.70, 0.30], -0.20),
+        np.select(tiers, [-0.70, -0.30, 0.85], 0.30)
+    ), 2)
+    churn_risk = np.where(
+        rng.integers(0, 2, n) == 1,
+        np.select(tiers, ['critical', 'high', 'low'], 'medium'),
+        np.select(tiers, ['high', 'medium', 'low'], 'low')
+    )
+    churn_score = np.round(rng.uniform(
+        np.select(tiers, [0.70, 0.40, 0.05], 0.20),
+        np.select(tiers, [0.95, 0.70, 0.25], 0.50)
+    ), 2)
+
+    # Interaction date (last 90 days)
+    days_ago = rng.integers(0, 91, n)
+    timestamps = np.datetime64(now.replace(microsecond=0), 's') - (days_ago * 86400).astype('timedelta64[s]')
+    dates = timestamps.astype('datetime64[D]')
+
+    # Resolution status
+    resolution_status = np.where(
+        days_ago > 7,
+        rng.choice(['resolved', 'pending', 'escalated', 'unresolved'], n, p=[0.65, 0.15, 0.10, 0.10]),
+        rng.choice(['resolved', 'pending', 'escalated'], n, p=[0.40, 0.45, 0.15])
+    )
+    resolution_time = np.where(
+        resolution_status == 'resolved',
+        rng.choice([2, 4, 8, 24, 48, 72], n),
+        np.nan
+    )
+
+    df = pd.DataFrame({
+        'interaction_id': 'INT_' + zero_pad(start_id + np.arange(n), 6),
+        'customer_id': customer['customer_id'],
+        'timestamp': as_text(np.char.replace(np.datetime_as_string(timestamps, unit='s'), 'T', ' ')),
+        'date': as_text(np.datetime_as_string(dates, unit='D')),
+        'week': format_weeks(dates),
+        'month': as_text(np.datetime_as_string(dates, unit='M')),
+        'channel': as_text(rng.choice(
+            ['Call', 'Email', 'Chat', 'WhatsApp', 'App', 'Store Visit', 'Social Media'], n,
+            p=[0.35, 0.20, 0.20, 0.10, 0.08, 0.05, 0.02]
+        )),
+        'interaction_text': text,
+        'category': category,
+        'sentiment': as_text(sentiment),
+        'sentiment_score': sentiment_score,
+        'resolution_status': as_text(resolution_status),
+        'resolution_time_hours': resolution_time,
+        'agent_id': 'AGT_' + zero_pad(rng.integers(1, 101, n), 3),
+        'agent_name': generate_customer_names(n, rng),
+        'geography': customer['geography'],
+        'region': customer['region'],
+        'churn_risk': as_text(churn_risk),
+        'churn_score': churn_score,
+        'escalation_count': np.array([0, 0, 0, 1, 1, 2, 3])[rng.integers(0, 7, n)],
+        'follow_up_required': rng.choice([True, False], n),
+        'interaction_duration_min': rng.integers(2, 46, n),
+        'customer_tenure_months': customer['tenure_months'],
+        'current_plan_value': customer['current_plan_value'],
+        'operator': customer['operator'],
+        'service_type': customer['service_type']
+    })
+    return df
+
+def generate_customer_interactions(customers_df, num_interactions, rng=None):
     """Generate realistic customer interaction dataset"""
     print(f"\n💬 Generating {num_interactions} customer interactions...")
-    
-    interactions = []
-    
-    for i in range(num_interactions):
-        # Select random customer
-        customer = customers_df.sample(1).iloc[0]
-        
-        # Select issue category (weighted by likelihood)
-        if customer['service_type'] == 'fiber':
-            category_weights = {
-                'internet_connectivity': 0.25,
-                'internet_speed': 0.20,
-                'billing_overcharge': 0.15,
-                'billing_downgrade': 0.10,
-                'tv_channels': 0.10,
-                'tv_technical': 0.05,
-                'network_quality': 0.05,
-                'account_issues': 0.05,
-                'product_inquiry': 0.03,
-                'customer_retention': 0.02
-            }
-        else:
-            category_weights = {
-                'network_quality': 0.25,
-                'billing_overcharge': 0.20,
-                'billing_downgrade': 0.15,
-                'internet_connectivity': 0.10,
-                'internet_speed': 0.10,
-                'account_issues': 0.10,
-                'product_inquiry': 0.05,
-                'customer_retention': 0.03,
-                'tv_channels': 0.01,
-                'tv_technical': 0.01
-            }
-        
-        category = random.choices(
-            list(category_weights.keys()),
-            weights=list(category_weights.values())
-        )[0]
-        
-        # Generate interaction text
-        template = random.choice(ISSUE_TEMPLATES[category])
-        
-        # Fill template with realistic values
-        text = template.format(
-            operator=customer['operator'],
-            city=customer['geography'],
-            days=random.randint(1, 7),
-            times=random.randint(2, 5),
-            frequency=random.choice(['5', '10', '15', 'few']),
-            event=random.choice(['road construction', 'heavy rain', 'building work', 'cable theft']),
-            speed=random.randint(10, 40),
-            plan_speed=random.choice([50, 100, 200, 300, 500]),
-            actual_speed=random.randint(15, 80),
-            upload_speed=random.randint(5, 30),
-            morning_speed=random.randint(80, 150),
-            evening_speed=random.randint(20, 60),
-            light_color=random.choice(['red', 'orange', 'blinking']),
-            time=random.choice(['7-10 PM', 'evening', 'night', 'peak hours']),
-            old_bill=customer['current_plan_value'],
-            new_bill=customer['current_plan_value'] + random.randint(200, 800),
-            extra=random.randint(100, 500),
-            date=random.choice(['last week', '3 days ago', 'yesterday', '5th Nov']),
-            amount=random.randint(500, 2000),
-            plan_price=customer['current_plan_value'],
-            actual_bill=customer['current_plan_value'] + random.randint(100, 500),
-            cashback=random.randint(50, 500),
-            correct=customer['current_plan_value'],
-            charged=customer['current_plan_value'] + random.randint(50, 200),
-            current_bill=customer['current_plan_value'],
-            target_plan=max(299, customer['current_plan_value'] - random.randint(200, 500)),
-            competitor=random.choice([op for op in OPERATORS if op != customer['operator']]),
-            competitor_price=customer['current_plan_value'] - random.randint(100, 300),
-            budget=random.randint(300, 700),
-            channel_count=random.randint(10, 50),
-            error_code=random.choice(['E-404', 'E-16', 'E-8', 'E-100', 'NO SIGNAL']),
-            route=random.choice(['Mumbai-Pune highway', 'Delhi-Jaipur route', 'office commute']),
-            area=customer['geography'],
-            old_operator=random.choice([op for op in OPERATORS if op != customer['operator']]),
-            pincode=customer['address_pincode'],
-            current_plan=f"{random.choice([50, 100, 200])}Mbps",
-            tenure=customer['tenure_months']//12 or 1,
-            months=random.randint(3, 12)
-        )
-        
-        # Determine sentiment based on keywords
-        negative_keywords = ['frustrated', 'cheating', 'fraud', 'unacceptable', 'leaving', 'disappointed', 'poor', 'terrible']
-        very_negative_keywords = ['switch', 'port', 'competitor', 'leaving']
-        positive_keywords = ['interested', 'inquiry', 'upgrade', 'want to']
-        
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in very_negative_keywords):
-            sentiment = 'very_negative'
-            sentiment_score = round(random.uniform(-0.95, -0.70), 2)
-            churn_risk = random.choice(['high', 'critical'])
-            churn_score = round(random.uniform(0.70, 0.95), 2)
-        elif any(word in text_lower for word in negative_keywords):
-            sentiment = 'negative'
-            sentiment_score = round(random.uniform(-0.70, -0.30), 2)
-            churn_risk = random.choice(['medium', 'high'])
-            churn_score = round(random.uniform(0.40, 0.70), 2)
-        elif any(word in text_lower for word in positive_keywords):
-            sentiment = 'positive'
-            sentiment_score = round(random.uniform(0.30, 0.85), 2)
-            churn_risk = 'low'
-            churn_score = round(random.uniform(0.05, 0.25), 2)
-        else:
-            sentiment = 'neutral'
-            sentiment_score = round(random.uniform(-0.20, 0.30), 2)
-            churn_risk = random.choice(['low', 'medium'])
-            churn_score = round(random.uniform(0.20, 0.50), 2)
-        
-        # Interaction date (last 90 days)
-        interaction_date = datetime.now() - timedelta(days=random.randint(0, 90))
-        
-        # Resolution status
-        if interaction_date < datetime.now() - timedelta(days=7):
-            resolution_status = random.choices(
-                ['resolved', 'pending', 'escalated', 'unresolved'],
-                weights=[0.65, 0.15, 0.10, 0.10]
-            )[0]
-        else:
-            resolution_status = random.choices(
-                ['resolved', 'pending', 'escalated'],
-                weights=[0.40, 0.45, 0.15]
-            )[0]
-        
-        resolution_time = None
-        if resolution_status == 'resolved':
-            resolution_time = random.choice([2, 4, 8, 24, 48, 72])
-        
-        interaction = {
-            'interaction_id': f'INT_{i:06d}',
-            'customer_id': customer['customer_id'],
-            'timestamp': interaction_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'date': interaction_date.strftime('%Y-%m-%d'),
-            'week': interaction_date.strftime('%Y-W%U'),
-            'month': interaction_date.strftime('%Y-%m'),
-            'channel': random.choices(
-                ['Call', 'Email', 'Chat', 'WhatsApp', 'App', 'Store Visit', 'Social Media'],
-                weights=[0.35, 0.20, 0.20, 0.10, 0.08, 0.05, 0.02]
-            )[0],
-            'interaction_text': text,
-            'category': category,
-            'sentiment': sentiment,
-            'sentiment_score': sentiment_score,
-            'resolution_status': resolution_status,
-            'resolution_time_hours': resolution_time,
-            'agent_id': f'AGT_{random.randint(1, 100):03d}',
-            'agent_name': generate_customer_name(),
-            'geography': customer['geography'],
-            'region': customer['region'],
-            'churn_risk': churn_risk,
-            'churn_score': churn_score,
-            'escalation_count': random.choice([0, 0, 0, 1, 1, 2, 3]),
-            'follow_up_required': random.choice([True, False]),
-            'interaction_duration_min': random.randint(2, 45),
-            'customer_tenure_months': customer['tenure_months'],
-            'current_plan_value': customer['current_plan_value'],
-            'operator': customer['operator'],
-            'service_type': customer['service_type']
-        }
-        
-        interactions.append(interaction)
-    
-    df = pd.DataFrame(interactions)
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
+    df = build_customer_interactions(customers_df, num_interactions, rng)
+
     output_file = f"{CONFIG['output_dir']}/customer_interactions.csv"
-    df.to_csv(output_file, index=False)
+    save_dataset(df, output_file)
     print(f"   ✅ Saved {len(df)} interactions to {output_file}")
     
-    # Print summary statistics
+    return df
+
+class InteractionSummary:
+    """Running totals over interaction shards - what the later steps need without keeping the rows"""
+
+    def __init__(self):
+        self.total = 0
+        self.customers = set()
+        self.date_min = None
+        self.date_max = None
+        self.distributions = {col: pd.Series(dtype='int64') for col in ['category', 'sentiment', 'churn_risk']}
+        self.trend_totals = None  # (week, category, geography) -> issue_count, churn_sum
+        self.issue_customers = {}  # category -> customer_ids in first-seen order (dict as ordered set)
+
+    @classmethod
+    def of(cls, df):
+        summary = cls()
+        summary.total = len(df)
+        summary.customers = set(df['customer_id'].unique())
+        summary.date_min = df['date'].min()
+        summary.date_max = df['date'].max()
+        summary.distributions = {col: df[col].value_counts() for col in summary.distributions}
+        summary.trend_totals = df.groupby(['week', 'category', 'geography']).agg(
+            issue_count=('interaction_id', 'count'),
+            churn_sum=('churn_score', 'sum')
+        )
+        summary.issue_customers = {
+            cat: dict.fromkeys(ids)
+            for cat, ids in df.groupby('category', sort=False)['customer_id'].unique().items()
+        }
+        return summary
+
+    def merge(self, other):
+        """Fold in the summary of the next shard (shards must be merged in order)"""
+        self.total += other.total
+        self.customers |= other.customers
+        self.date_min = min(filter(None, [self.date_min, other.date_min]))
+        self.date_max = max(filter(None, [self.date_max, other.date_max]))
+
+        for col, counts in other.distributions.items():
+            self.distributions[col] = self.distributions[col].add(counts, fill_value=0).astype('int64')
+
+        if self.trend_totals is None:
+            self.trend_totals = other.trend_totals
+        else:
+            self.trend_totals = self.trend_totals.add(other.trend_totals, fill_value=0)
+
+        for cat, ids in other.issue_customers.items():
+            self.issue_customers.setdefault(cat, {}).update(ids)
+
+    def distribution(self, col):
+        return self.distributions[col].sort_values(ascending=False, kind='stable')
+
+def print_interaction_stats(summary):
+    """Print summary statistics for the generated interactions"""
     print(f"\n   📈 Dataset Statistics:")
-    print(f"      • Unique customers: {df['customer_id'].nunique()}")
-    print(f"      • Date range: {df['date'].min()} to {df['date'].max()}")
+    print(f"      • Unique customers: {len(summary.customers)}")
+    print(f"      • Date range: {summary.date_min} to {summary.date_max}")
     print(f"\n      Category Distribution:")
-    for cat, count in df['category'].value_counts().head(5).items():
-        print(f"         - {cat}: {count} ({count/len(df)*100:.1f}%)")
+    for cat, count in summary.distribution('category').head(5).items():
+        print(f"         - {cat}: {count} ({count/summary.total*100:.1f}%)")
     print(f"\n      Sentiment Distribution:")
-    for sent, count in df['sentiment'].value_counts().items():
-        print(f"         - {sent}: {count} ({count/len(df)*100:.1f}%)")
+    for sent, count in summary.distribution('sentiment').items():
+        print(f"         - {sent}: {count} ({count/summary.total*100:.1f}%)")
     print(f"\n      Churn Risk Distribution:")
-    for risk, count in df['churn_risk'].value_counts().items():
-        print(f"         - {risk}: {count} ({count/len(df)*100:.1f}%)")
-    
-    return df
+    for risk, count in summary.distribution('churn_risk').items():
+        print(f"         - {risk}: {count} ({count/summary.total*100:.1f}%)")
 
 # ============================================================
 # STEP 3: GENERATE CAMPAIGN DATA
 # ============================================================
 
-def generate_campaign_history(num_campaigns):
+def generate_campaign_history(num_campaigns, rng=None):
     """Generate campaign history dataset"""
     print(f"\n📢 Generating {num_campaigns} campaigns...")
-    
-    campaigns = []
-    
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
+    n = num_campaigns
+    now = datetime.now()
+
     campaign_types = ['Upsell', 'Cross-sell', 'Retention', 'Winback', 'Upgrade']
     target_issues = list(ISSUE_TEMPLATES.keys())
-    
-    for i in range(num_campaigns):
-        campaign_type = random.choice(campaign_types)
-        target_issue = random.choice(target_issues)
-        
-        start_date = datetime.now() - timedelta(days=random.randint(30, 180))
-        duration = random.randint(15, 60)
-        end_date = start_date + timedelta(days=duration)
-        
-        targeted = random.randint(100, 2000)
-        contacted = int(targeted * random.uniform(0.85, 0.98))
-        responded = int(contacted * random.uniform(0.15, 0.45))
-        converted = int(responded * random.uniform(0.20, 0.60))
-        
-        avg_deal_value = random.randint(500, 3000)
-        revenue = converted * avg_deal_value
-        campaign_cost = targeted * random.randint(20, 100)
-        roi = round((revenue - campaign_cost) / campaign_cost, 2)
-        
-        campaign = {
-            'campaign_id': f'CAMP_{i:03d}',
-            'campaign_name': f'{campaign_type} - {target_issue.replace("_", " ").title()} Q{(start_date.month-1)//3 + 1}',
-            'campaign_type': campaign_type,
-            'target_issue': target_issue,
-            'target_segment': random.choice(['High Churn', 'Speed Issues', 'Billing Complaints', 'All Customers']),
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'end_date': end_date.strftime('%Y-%m-%d'),
-            'status': 'Completed' if end_date < datetime.now() else 'Active',
-            'total_targeted': targeted,
-            'total_contacted': contacted,
-            'total_responded': responded,
-            'total_converted': converted,
-            'conversion_rate': round((converted / targeted) * 100, 2),
-            'response_rate': round((responded / contacted) * 100, 2),
-            'revenue_generated': revenue,
-            'campaign_cost': campaign_cost,
-            'roi': roi,
-            'avg_deal_value': avg_deal_value,
-            'offer_description': f"Special offer for {target_issue.replace('_', ' ')} customers",
-            'channel_used': random.choice(['Email', 'SMS', 'Call', 'App Notification', 'Multi-channel'])
-        }
-        
-        campaigns.append(campaign)
-    
-    df = pd.DataFrame(campaigns)
+
+    campaign_type = rng.choice(campaign_types, n)
+    target_issue = rng.choice(target_issues, n)
+
+    start_days_ago = rng.integers(30, 181, n)
+    duration = rng.integers(15, 61, n)
+    start_dates = np.datetime64(now.date()) - start_days_ago.astype('timedelta64[D]')
+    end_dates = start_dates + duration.astype('timedelta64[D]')
+    quarter = (start_dates.astype('datetime64[M]').astype(np.int64) % 12) // 3 + 1
+
+    targeted = rng.integers(100, 2001, n)
+    contacted = (targeted * rng.uniform(0.85, 0.98, n)).astype(np.int64)
+    responded = (contacted * rng.uniform(0.15, 0.45, n)).astype(np.int64)
+    converted = (responded * rng.uniform(0.20, 0.60, n)).astype(np.int64)
+
+    avg_deal_value = rng.integers(500, 3001, n)
+    revenue = converted * avg_deal_value
+    campaign_cost = targeted * rng.integers(20, 101, n)
+    roi = np.round((revenue - campaign_cost) / campaign_cost, 2)
+
+    issue_words = as_text(np.char.replace(target_issue, '_', ' '))
+
+    df = pd.DataFrame({
+        'campaign_id': 'CAMP_' + zero_pad(np.arange(n), 3),
+        'campaign_name': as_text(campaign_type) + ' - ' + as_text(np.char.title(issue_words.astype(str))) + ' Q' + as_text(quarter),
+        'campaign_type': as_text(campaign_type),
+        'target_issue': as_text(target_issue),
+        'target_segment': as_text(rng.choice(['High Churn', 'Speed Issues', 'Billing Complaints', 'All Customers'], n)),
+        'start_date': as_text(np.datetime_as_string(start_dates, unit='D')),
+        'end_date': as_text(np.datetime_as_string(end_dates, unit='D')),
+        'status': np.where(duration < start_days_ago, 'Completed', 'Active').astype(object),
+        'total_targeted': targeted,
+        'total_contacted': contacted,
+        'total_responded': responded,
+        'total_converted': converted,
+        'conversion_rate': np.round((converted / targeted) * 100, 2),
+        'response_rate': np.round((responded / contacted) * 100, 2),
+        'revenue_generated': revenue,
+        'campaign_cost': campaign_cost,
+        'roi': roi,
+        'avg_deal_value': avg_deal_value,
+        'offer_description': 'Special offer for ' + issue_words + ' customers',
+        'channel_used': as_text(rng.choice(['Email', 'SMS', 'Call', 'App Notification', 'Multi-channel'], n))
+    })
+
     output_file = f"{CONFIG['output_dir']}/campaign_history.csv"
-    df.to_csv(output_file, index=False)
+    save_dataset(df, output_file)
     print(f"   ✅ Saved {len(df)} campaigns to {output_file}")
     
     return df
@@ -550,9 +708,10 @@ def generate_campaign_history(num_campaigns):
 # STEP 4: GENERATE PRODUCT CATALOG
 # ============================================================
 
-def generate_product_catalog(num_products):
+def generate_product_catalog(num_products, rng=None):
     """Generate product catalog dataset"""
     print(f"\n📦 Generating {num_products} products...")
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
     
     products = []
     
@@ -625,10 +784,10 @@ def generate_product_catalog(num_products):
                 'price': price,
                 'description': description,
                 'target_issues': ','.join(target_issues),
-                'suitable_for_churn': random.choice([True, False]),
-                'stock_status': random.choices(['In Stock', 'Low Stock', 'Out of Stock'], weights=[0.8, 0.15, 0.05])[0],
-                'popularity_score': random.randint(1, 100),
-                'avg_rating': round(random.uniform(3.5, 4.9), 1)
+                'suitable_for_churn': bool(rng.integers(0, 2)),
+                'stock_status': str(rng.choice(['In Stock', 'Low Stock', 'Out of Stock'], p=[0.8, 0.15, 0.05])),
+                'popularity_score': int(rng.integers(1, 101)),
+                'avg_rating': round(float(rng.uniform(3.5, 4.9)), 1)
             }
             
             products.append(product)
@@ -636,7 +795,7 @@ def generate_product_catalog(num_products):
     
     df = pd.DataFrame(products)
     output_file = f"{CONFIG['output_dir']}/product_catalog.csv"
-    df.to_csv(output_file, index=False)
+    save_dataset(df, output_file)
     print(f"   ✅ Saved {len(df)} products to {output_file}")
     
     return df
@@ -645,17 +804,14 @@ def generate_product_catalog(num_products):
 # STEP 5: GENERATE ISSUE TRENDS
 # ============================================================
 
-def generate_issue_trends(interactions_df):
-    """Generate weekly issue trends from interactions"""
+def generate_issue_trends(trend_totals):
+    """Generate weekly issue trends from the (week, category, geography) totals of InteractionSummary"""
     print(f"\n📈 Generating issue trends...")
     
     # Aggregate by week and category
-    trends = interactions_df.groupby(['week', 'category', 'geography']).agg({
-        'interaction_id': 'count',
-        'churn_score': 'mean'
-    }).reset_index()
-    
-    trends.columns = ['week', 'category', 'geography', 'issue_count', 'avg_churn_score']
+    trends = trend_totals.sort_index().reset_index()
+    trends['issue_count'] = trends['issue_count'].astype('int64')
+    trends['avg_churn_score'] = trends.pop('churn_sum') / trends['issue_count']
     
     # Calculate week-over-week change
     trends = trends.sort_values(['category', 'geography', 'week'])
@@ -665,22 +821,21 @@ def generate_issue_trends(interactions_df):
     trends['change_percentage'] = trends['change_percentage'].fillna(0)
     
     # Determine trend direction
-    trends['trend'] = trends['change_percentage'].apply(
-        lambda x: 'increasing' if x > 5 else ('decreasing' if x < -5 else 'stable')
-    )
+    change = trends['change_percentage']
+    trends['trend'] = np.select([change > 5, change < -5], ['increasing', 'decreasing'], 'stable')
     
     # Determine severity based on count and churn score
-    trends['severity'] = trends.apply(
-        lambda row: 'critical' if row['issue_count'] > 50 and row['avg_churn_score'] > 0.7
-        else ('high' if row['issue_count'] > 30 and row['avg_churn_score'] > 0.5
-        else ('medium' if row['issue_count'] > 15 else 'low')),
-        axis=1
+    count, churn = trends['issue_count'], trends['avg_churn_score']
+    trends['severity'] = np.select(
+        [(count > 50) & (churn > 0.7), (count > 30) & (churn > 0.5), count > 15],
+        ['critical', 'high', 'medium'],
+        'low'
     )
     
     trends = trends.drop('prev_week_count', axis=1)
     
     output_file = f"{CONFIG['output_dir']}/issue_trends.csv"
-    trends.to_csv(output_file, index=False)
+    save_dataset(trends, output_file)
     print(f"   ✅ Saved {len(trends)} trend records to {output_file}")
     
     return trends
@@ -689,97 +844,280 @@ def generate_issue_trends(interactions_df):
 # STEP 6: GENERATE CAMPAIGN-CUSTOMER MAPPING
 # ============================================================
 
-def generate_campaign_customer_mapping(campaigns_df, customers_df, interactions_df):
-    """Generate campaign-customer mapping dataset"""
+MAPPING_BATCH_ROWS = 1_000_000  # Campaigns are simulated in batches of about this many mapping rows
+
+OFFERS = ['Speed Upgrade', 'WiFi Booster', 'Plan Downgrade', 'Retention Offer', 'Bundle Discount']
+FEEDBACK = [
+    'Good offer, accepted',
+    'Not interested right now',
+    'Too expensive',
+    'Already solved the issue',
+    'Will think about it',
+    None
+]
+
+def funnel_rate(numerator, denominator):
+    """Per-campaign conversion rate between two funnel stages (0 where the earlier stage is empty)"""
+    numerator = numerator.astype(float)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def optional_dates(dates, mask):
+    """YYYY-MM-DD strings where mask is set, None elsewhere.
+
+    Each distinct day is formatted once and shared by reference, so millions of
+    rows cost one pointer each rather than one string each.
+    """
+    if len(dates) == 0:
+        return np.array([], dtype=object)
+    first = dates.min()
+    offset = (dates - first).astype(np.int64)
+    days = first + np.arange(offset.max() + 1).astype('timedelta64[D]')
+    labels = np.datetime_as_string(days, unit='D').astype(object)
+    return np.where(mask, labels[offset], None)
+
+class TargetPools:
+    """Per-issue candidate customers (as row positions), computed once and shared by every campaign"""
+
+    def __init__(self, customer_ids, issue_customers):
+        self.customer_ids = customer_ids
+        self._position = pd.Series(np.arange(len(customer_ids)), index=customer_ids)
+        self._issue_customers = issue_customers
+        self._pools = {}
+        self._fillers = {}
+
+    def pool(self, issue):
+        """Customers who had this issue"""
+        if issue not in self._pools:
+            ids = list(self._issue_customers.get(issue, {}))
+            self._pools[issue] = self._position.reindex(ids).dropna().values.astype(np.int64)
+        return self._pools[issue]
+
+    def filler(self, issue):
+        """Everyone else, to top up campaigns that target more customers than had the issue"""
+        if issue not in self._fillers:
+            self._fillers[issue] = np.setdiff1d(np.arange(len(self.customer_ids)), self.pool(issue), assume_unique=True)
+        return self._fillers[issue]
+
+def select_targets(campaigns_df, pools, rng):
+    """Customer positions targeted by each campaign, plus the campaign row each one belongs to"""
+    picked, owners = [], []
+
+    for row, (target_issue, targeted) in enumerate(zip(campaigns_df['target_issue'], campaigns_df['total_targeted'])):
+        pool = pools.pool(target_issue)
+        if len(pool) >= targeted:
+            selected = pool[rng.choice(len(pool), targeted, replace=False)]
+        else:
+            filler = pools.filler(target_issue)
+            extra = filler[rng.choice(len(filler), min(targeted - len(pool), len(filler)), replace=False)]
+            selected = rng.permutation(np.concatenate([pool, extra]))
+
+        picked.append(selected)
+        owners.append(np.full(len(selected), row))
+
+    if not picked:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(picked), np.concatenate(owners)
+
+def build_campaign_mapping(campaigns_df, pools, rng):
+    """Mapping rows for a batch of campaigns, with every funnel stage and date drawn in bulk"""
+    picked, owner = select_targets(campaigns_df, pools, rng)
+    n = len(picked)
+
+    def per_row(col):
+        return campaigns_df[col].values[owner]
+
+    # Funnel: each stage is a Bernoulli draw at the campaign's stage-to-stage rate
+    contacted = rng.random(n) < funnel_rate(per_row('total_contacted'), per_row('total_targeted'))
+    responded = contacted & (rng.random(n) < funnel_rate(per_row('total_responded'), per_row('total_contacted')))
+    converted = responded & (rng.random(n) < funnel_rate(per_row('total_converted'), per_row('total_responded')))
+
+    # Each date trails the previous stage by a few days
+    start_date = campaigns_df['start_date'].values.astype('datetime64[D]')[owner]
+    contacted_date = start_date + rng.integers(0, 11, n).astype('timedelta64[D]')
+    response_date = contacted_date + rng.integers(1, 6, n).astype('timedelta64[D]')
+    conversion_date = response_date + rng.integers(1, 8, n).astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'campaign_id': per_row('campaign_id'),
+        'customer_id': pools.customer_ids[picked],
+        'contacted': contacted,
+        'contacted_date': optional_dates(contacted_date, contacted),
+        'responded': responded,
+        'response_date': optional_dates(response_date, responded),
+        'converted': converted,
+        'conversion_date': optional_dates(conversion_date, converted),
+        'offer_accepted': np.where(converted, rng.choice(np.array(OFFERS, dtype=object), n), None),
+        'revenue': np.where(converted, per_row('avg_deal_value') + rng.integers(-200, 201, n), 0),
+        'feedback': np.where(responded, rng.choice(np.array(FEEDBACK, dtype=object), n), None)
+    })
+
+def campaign_batches(campaigns_df, batch_rows):
+    """Consecutive runs of whole campaigns targeting roughly batch_rows customers each"""
+    batch = np.cumsum(campaigns_df['total_targeted'].values) // max(1, batch_rows)
+    for _, campaigns in campaigns_df.groupby(batch, sort=True):
+        yield campaigns
+
+def generate_campaign_customer_mapping(campaigns_df, customers_df, issue_customers, rng=None):
+    """Generate campaign-customer mapping dataset from the customers seen per issue category"""
     print(f"\n🎯 Generating campaign-customer mapping...")
-    
-    mappings = []
-    
-    for _, campaign in campaigns_df.iterrows():
-        # Select customers based on campaign target
-        target_issue = campaign['target_issue']
-        
-        # Get customers who had this issue
-        relevant_interactions = interactions_df[interactions_df['category'] == target_issue]
-        target_customers = relevant_interactions['customer_id'].unique()
-        
-        # If not enough customers, add random ones
-        if len(target_customers) < campaign['total_targeted']:
-            additional = customers_df[~customers_df['customer_id'].isin(target_customers)].sample(
-                min(campaign['total_targeted'] - len(target_customers), len(customers_df))
-            )['customer_id'].values
-            target_customers = np.concatenate([target_customers, additional])
-        
-        # Sample exact number needed
-        selected_customers = np.random.choice(
-            target_customers, 
-            size=min(campaign['total_targeted'], len(target_customers)), 
-            replace=False
-        )
-        
-        for customer_id in selected_customers:
-            # Determine if contacted, responded, converted
-            contacted = random.random() < (campaign['total_contacted'] / campaign['total_targeted'])
-            
-            if contacted:
-                responded = random.random() < (campaign['total_responded'] / campaign['total_contacted'])
-                if responded:
-                    converted = random.random() < (campaign['total_converted'] / campaign['total_responded'])
-                else:
-                    converted = False
-            else:
-                responded = False
-                converted = False
-            
-            contacted_date = None
-            response_date = None
-            conversion_date = None
-            revenue = 0
-            
-            if contacted:
-                contacted_date = (datetime.strptime(campaign['start_date'], '%Y-%m-%d') + 
-                                 timedelta(days=random.randint(0, 10))).strftime('%Y-%m-%d')
-                
-                if responded:
-                    response_date = (datetime.strptime(contacted_date, '%Y-%m-%d') + 
-                                    timedelta(days=random.randint(1, 5))).strftime('%Y-%m-%d')
-                    
-                    if converted:
-                        conversion_date = (datetime.strptime(response_date, '%Y-%m-%d') + 
-                                         timedelta(days=random.randint(1, 7))).strftime('%Y-%m-%d')
-                        revenue = campaign['avg_deal_value'] + random.randint(-200, 200)
-            
-            mapping = {
-                'campaign_id': campaign['campaign_id'],
-                'customer_id': customer_id,
-                'contacted': contacted,
-                'contacted_date': contacted_date,
-                'responded': responded,
-                'response_date': response_date,
-                'converted': converted,
-                'conversion_date': conversion_date,
-                'offer_accepted': random.choice(['Speed Upgrade', 'WiFi Booster', 'Plan Downgrade', 
-                                                'Retention Offer', 'Bundle Discount']) if converted else None,
-                'revenue': revenue if converted else 0,
-                'feedback': random.choice([
-                    'Good offer, accepted',
-                    'Not interested right now',
-                    'Too expensive',
-                    'Already solved the issue',
-                    'Will think about it',
-                    None
-                ]) if responded else None
-            }
-            
-            mappings.append(mapping)
-    
-    df = pd.DataFrame(mappings)
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
+    pools = TargetPools(customers_df['customer_id'].values, issue_customers)
+
+    # Batches only bound the per-row scratch arrays; the result is one in-memory frame like the other steps
+    df = pd.concat(
+        [build_campaign_mapping(batch, pools, rng) for batch in campaign_batches(campaigns_df, MAPPING_BATCH_ROWS)],
+        ignore_index=True
+    )
+
     output_file = f"{CONFIG['output_dir']}/campaign_customer_mapping.csv"
-    df.to_csv(output_file, index=False)
+    save_dataset(df, output_file)
     print(f"   ✅ Saved {len(df)} campaign mappings to {output_file}")
     
     return df
 
+def stream_campaign_customer_mapping(campaigns_df, customers_df, issue_customers, rng=None):
+    """Chunked-mode mapping: write batches of about chunk_size rows straight to disk; returns the row count"""
+    print(f"\n🎯 Generating campaign-customer mapping in batches of ~{CONFIG['chunk_size']} rows...")
+    rng = rng if rng is not None else np.random.default_rng(CONFIG['seed'])
+    pools = TargetPools(customers_df['customer_id'].values, issue_customers)
+
+    output_file = f"{CONFIG['output_dir']}/campaign_customer_mapping.csv"
+    with ShardWriter(output_file) as writer:
+        for batch in campaign_batches(campaigns_df, CONFIG['chunk_size']):
+            df = build_campaign_mapping(batch, pools, rng)
+            writer.write(encode_shard(df, writer.rows == 0, CONFIG['columnar_copy']), len(df))
+    print(f"   ✅ Saved {writer.rows} campaign mappings to {output_file}")
+
+    return writer.rows
+
+# ============================================================
+# CHUNKED GENERATION
+# ============================================================
+
+# Stable per-dataset stream ids for derived shard seeds
+SHARD_STREAMS = {'customer_profiles': 0, 'customer_interactions': 1}
+
+_worker_customers = None
+
+def shard_rng(seed, dataset, shard):
+    """Random stream for one shard; depends only on (seed, dataset, shard), never on scheduling"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(SHARD_STREAMS[dataset], shard)))
+
+def shard_tasks(dataset, total, chunk_size, now):
+    """(seed, dataset, shard, start, rows, now, columnar) for each fixed-size shard of a dataset"""
+    for shard, start in enumerate(range(0, total, chunk_size)):
+        yield (CONFIG['seed'], dataset, shard, start, min(chunk_size, total - start), now, CONFIG['columnar_copy'])
+
+def encode_shard(df, header, columnar):
+    """Render a shard to CSV text and an Arrow table inside the worker, leaving the parent plain appends"""
+    table = None
+    if columnar and pa is not None:
+        table = pa.Table.from_pandas(to_columnar_dtypes(df), preserve_index=False)
+        # A shard whose optional column is all None would infer the null type; keep every shard's schema alike
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return df.to_csv(index=False, header=header), table
+
+def _init_interaction_worker(customers_df):
+    global _worker_customers
+    _worker_customers = customers_df
+
+def _profile_shard(task):
+    seed, dataset, shard, start, rows, now, columnar = task
+    df = build_customer_profiles(rows, shard_rng(seed, dataset, shard), start_id=start, now=now)
+    return encode_shard(df, start == 0, columnar), df[CUSTOMER_COLUMNS]
+
+def _interaction_shard(task):
+    seed, dataset, shard, start, rows, now, columnar = task
+    df = build_customer_interactions(_worker_customers, rows, shard_rng(seed, dataset, shard),
+                                     start_id=start, now=now)
+    return encode_shard(df, start == 0, columnar), InteractionSummary.of(df)
+
+def map_shards(fn, tasks, workers, initializer=None, initargs=()):
+    """Yield fn(task) in task order, with at most two shards per worker in flight"""
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(fn, tasks)
+        return
+
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque(pool.submit(fn, task) for task in itertools.islice(tasks, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            for task in itertools.islice(tasks, 1):
+                pending.append(pool.submit(fn, task))
+            yield result
+
+class ShardWriter:
+    """Append encoded shards to one CSV (plus its Arrow copy) so a dataset never sits in memory whole"""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.rows = 0
+        self._csv = open(output_file, 'w', newline='')
+        self._arrow = None
+
+    def write(self, encoded, rows):
+        csv_text, table = encoded
+        self._csv.write(csv_text)
+        self.rows += rows
+
+        if table is not None:
+            # Fixed categorical domains keep every shard's dictionaries identical, as the IPC file format requires
+            if self._arrow is None:
+                columnar_file = os.path.splitext(self.output_file)[0] + '.feather'
+                self._arrow = pa.ipc.new_file(columnar_file, table.schema)
+            self._arrow.write_table(table)
+
+    def close(self):
+        self._csv.close()
+        if self._arrow is not None:
+            self._arrow.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def generate_chunked(num_customers, num_interactions, now):
+    """Stream profiles and interactions to disk in shards across a process pool.
+
+    Workers build, encode and summarise each shard; the parent only appends
+    bytes in shard order. Only the profile columns interactions copy
+    (CUSTOMER_COLUMNS) and an InteractionSummary stay in memory, so peak
+    memory is bounded by chunk_size x workers rather than num_interactions.
+    """
+    chunk_size = CONFIG['chunk_size']
+    workers = CONFIG['workers'] or os.cpu_count() or 1
+
+    print(f"\n📊 Generating {num_customers} customer profiles in shards of {chunk_size} ({workers} workers)...")
+    output_file = f"{CONFIG['output_dir']}/customer_profiles.csv"
+    parts = []
+    with ShardWriter(output_file) as writer:
+        tasks = shard_tasks('customer_profiles', num_customers, chunk_size, now)
+        for encoded, customers in map_shards(_profile_shard, tasks, workers):
+            writer.write(encoded, len(customers))
+            parts.append(customers)
+    customers_df = pd.concat(parts, ignore_index=True)
+    print(f"   ✅ Saved {writer.rows} customer profiles to {output_file}")
+
+    print(f"\n💬 Generating {num_interactions} customer interactions in shards of {chunk_size} ({workers} workers)...")
+    output_file = f"{CONFIG['output_dir']}/customer_interactions.csv"
+    summary = InteractionSummary()
+    with ShardWriter(output_file) as writer:
+        tasks = shard_tasks('customer_interactions', num_interactions, chunk_size, now)
+        for encoded, shard_summary in map_shards(_interaction_shard, tasks, workers,
+                                                 _init_interaction_worker, (customers_df,)):
+            writer.write(encoded, shard_summary.total)
+            summary.merge(shard_summary)
+    print(f"   ✅ Saved {writer.rows} interactions to {output_file}")
+
+    return customers_df, summary
+
 # ============================================================
 # MAIN EXECUTION
 # ============================================================
@@ -794,13 +1132,37 @@ def main():
     # Create output directory
     create_output_directory()
     
+    # One independent, seeded random stream per dataset
+    customer_rng, interaction_rng, campaign_rng, product_rng, mapping_rng = [
+        np.random.default_rng(seed) for seed in np.random.SeedSequence(CONFIG['seed']).spawn(5)
+    ]
+    
     # Generate all datasets
-    customers_df = generate_customer_profiles(CONFIG['num_customers'])
-    interactions_df = generate_customer_interactions(customers_df, CONFIG['num_interactions'])
-    campaigns_df = generate_campaign_history(CONFIG['num_campaigns'])
-    products_df = generate_product_catalog(CONFIG['num_products'])
-    trends_df = generate_issue_trends(interactions_df)
-    mapping_df = generate_campaign_customer_mapping(campaigns_df, customers_df, interactions_df)
+    if CONFIG['chunk_size']:
+        # Chunked mode: shard seeds derive from (seed, dataset, shard), so output depends on chunk_size, not workers
+        customers_df, interaction_summary = generate_chunked(
+            CONFIG['num_customers'], CONFIG['num_interactions'], datetime.now()
+        )
+        interactions_df = None
+    else:
+        customers_df = generate_customer_profiles(CONFIG['num_customers'], customer_rng)
+        interactions_df = generate_customer_interactions(customers_df, CONFIG['num_interactions'], interaction_rng)
+        interaction_summary = InteractionSummary.of(interactions_df)
+    print_interaction_stats(interaction_summary)
+
+    campaigns_df = generate_campaign_history(CONFIG['num_campaigns'], campaign_rng)
+    products_df = generate_product_catalog(CONFIG['num_products'], product_rng)
+    trends_df = generate_issue_trends(interaction_summary.trend_totals)
+    if CONFIG['chunk_size']:
+        mapping_df = None
+        mapping_rows = stream_campaign_customer_mapping(
+            campaigns_df, customers_df, interaction_summary.issue_customers, mapping_rng
+        )
+    else:
+        mapping_df = generate_campaign_customer_mapping(
+            campaigns_df, customers_df, interaction_summary.issue_customers, mapping_rng
+        )
+        mapping_rows = len(mapping_df)
     
     # Generate summary report
     print("\n" + "="*60)
@@ -808,26 +1170,26 @@ def main():
     print("="*60)
     print(f"\n📁 All files saved in '{CONFIG['output_dir']}/' directory:")
     print(f"   1. customer_profiles.csv          ({len(customers_df)} records)")
-    print(f"   2. customer_interactions.csv      ({len(interactions_df)} records)")
+    print(f"   2. customer_interactions.csv      ({interaction_summary.total} records)")
     print(f"   3. campaign_history.csv           ({len(campaigns_df)} records)")
     print(f"   4. product_catalog.csv            ({len(products_df)} records)")
     print(f"   5. issue_trends.csv               ({len(trends_df)} records)")
-    print(f"   6. campaign_customer_mapping.csv  ({len(mapping_df)} records)")
+    print(f"   6. campaign_customer_mapping.csv  ({mapping_rows} records)")
     
     # Create data summary JSON
     summary = {
         'generated_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'total_customers': len(customers_df),
-        'total_interactions': len(interactions_df),
+        'total_interactions': interaction_summary.total,
         'total_campaigns': len(campaigns_df),
         'total_products': len(products_df),
         'date_range': {
-            'start': interactions_df['date'].min(),
-            'end': interactions_df['date'].max()
+            'start': interaction_summary.date_min,
+            'end': interaction_summary.date_max
         },
-        'category_distribution': interactions_df['category'].value_counts().to_dict(),
-        'sentiment_distribution': interactions_df['sentiment'].value_counts().to_dict(),
-        'churn_risk_distribution': interactions_df['churn_risk'].value_counts().to_dict(),
+        'category_distribution': interaction_summary.distribution('category').to_dict(),
+        'sentiment_distribution': interaction_summary.distribution('sentiment').to_dict(),
+        'churn_risk_distribution': interaction_summary.distribution('churn_risk').to_dict(),
         'operator_distribution': customers_df['operator'].value_counts().to_dict(),
         'geography_distribution': customers_df['geography'].value_counts().head(10).to_dict()
     }
@@ -843,12 +1205,32 @@ def main():
     
     return {
         'customers': customers_df,
-        'interactions': interactions_df,
+        'interactions': interactions_df,  # None in chunked mode - the rows were streamed to disk
         'campaigns': campaigns_df,
         'products': products_df,
         'trends': trends_df,
-        'mapping': mapping_df
+        'mapping': mapping_df  # None in chunked mode
     }
 
+def parse_args():
+    """Command-line overrides for CONFIG"""
+    parser = argparse.ArgumentParser(description="Generate the Smart Campaign Targeting datasets")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiply customer, interaction and campaign counts (e.g. 1000 for 10M interactions)")
+    parser.add_argument('--seed', type=int, default=CONFIG['seed'], help="random seed (default: %(default)s)")
+    parser.add_argument('--output-dir', default=CONFIG['output_dir'], help="output directory (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=CONFIG['chunk_size'],
+                        help="write profiles and interactions in shards of this many rows, in parallel")
+    parser.add_argument('--workers', type=int, default=CONFIG['workers'],
+                        help="processes for --chunk-size mode (default: CPU count)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    CONFIG['seed'] = args.seed
+    CONFIG['output_dir'] = args.output_dir
+    CONFIG['chunk_size'] = args.chunk_size
+    CONFIG['workers'] = args.workers
+    for key in ['num_customers', 'num_interactions', 'num_campaigns']:
+        CONFIG[key] = max(1, int(CONFIG[key] * args.scale))
     datasets = main()
\ No newline at end of file
@@ -0,0 +1,131 @@
+import threading
+
+import pandas as pd
+
+HIGH_RISK_LEVELS = ['high', 'critical']
+DIMENSIONS = ['category', 'geography', 'sentiment', 'churn_risk']
+SAMPLES_PER_CATEGORY = 3
+
+# Positions inside a cell: [count, churn_sum, high_risk, unresolved, resolution_sum, resolution_count]
+COUNT, CHURN_SUM, HIGH_RISK, UNRESOLVED, RESOLUTION_SUM, RESOLUTION_COUNT = range(6)
+
+
+class InteractionAggregates:
+    """Precomputed interaction aggregates served to /stats, /top-issues and /categories-summary"""
+
+    def __init__(self, interactions_df):
+        self.total = 0
+        self.cube = {}
+        self.marginals = {dim: {} for dim in DIMENSIONS}
+        self.samples = {}
+        self.customer_ids = set()
+        self.date_min = None
+        self.date_max = None
+        self._ranked = {}
+        self._lock = threading.Lock()  # Ingestion folds new rows in place while request threads read
+        self.add(interactions_df)
+
+    # ==========================================================
+    # 🔹 Build / incremental update: one groupby pass over the rows
+    # ==========================================================
+    def add(self, df):
+        """Group the rows once by every dimension and fold the small cube into the cells and marginals"""
+        if len(df) == 0:
+            return
+
+        frame = pd.DataFrame({
+            'category': df['category'],
+            'geography': df['geography'],
+            'sentiment': df['sentiment'],
+            'churn_risk': df['churn_risk'],
+            'churn_score': df['churn_score'],
+            'high_risk': df['churn_risk'].isin(HIGH_RISK_LEVELS).astype('int64'),
+            'unresolved': (df['resolution_status'] == 'unresolved').astype('int64'),
+            'resolution_time_hours': df['resolution_time_hours']
+        })
+
+        grouped = frame.groupby(DIMENSIONS, observed=True, sort=False).agg(
+            count=('churn_score', 'size'),
+            churn_sum=('churn_score', 'sum'),
+            high_risk=('high_risk', 'sum'),
+            unresolved=('unresolved', 'sum'),
+            resolution_sum=('resolution_time_hours', 'sum'),
+            resolution_count=('resolution_time_hours', 'count')
+        )
+
+        samples = df.groupby('category', observed=True, sort=False).head(SAMPLES_PER_CATEGORY)
+        customer_ids = df['customer_id'].unique()
+        date_min, date_max = str(df['date'].min()), str(df['date'].max())
+
+        with self._lock:
+            for key, row in zip(grouped.index, grouped.itertuples(index=False)):
+                self._add_cell(key, [int(row.count), float(row.churn_sum), int(row.high_risk),
+                                     int(row.unresolved), float(row.resolution_sum), int(row.resolution_count)])
+
+            for category, text in zip(samples['category'], samples['interaction_text']):
+                texts = self.samples.setdefault(category, [])
+                if len(texts) < SAMPLES_PER_CATEGORY:
+                    texts.append(text)
+
+            self.customer_ids.update(customer_ids)
+            self.date_min = date_min if self.date_min is None else min(self.date_min, date_min)
+            self.date_max = date_max if self.date_max is None else max(self.date_max, date_max)
+
+    def _add_cell(self, key, values):
+        """Add one cube cell to the cube, its marginals and the grand total"""
+        cell = self.cube.setdefault(tuple(key), [0, 0.0, 0, 0, 0.0, 0])
+        for i, value in enumerate(values):
+            cell[i] += value
+
+        for dim, dim_key in zip(DIMENSIONS, key):
+            marginal = self.marginals[dim].setdefault(dim_key, [0, 0.0, 0, 0, 0.0, 0])
+            for i, value in enumerate(values):
+                marginal[i] += value
+
+        self.total += values[COUNT]
+        self._ranked = {}
+
+    # ==========================================================
+    # 🔹 Read access
+    # ==========================================================
+    def ranked(self, dimension, limit=None):
+        """Return (key, cell) pairs for a dimension, most frequent first; the cells are copies"""
+        with self._lock:
+            if dimension not in self._ranked:
+                self._ranked[dimension] = sorted(
+                    ((key, list(cell)) for key, cell in self.marginals[dimension].items()),
+                    key=lambda item: item[1][COUNT],
+                    reverse=True
+                )
+            ranked = self._ranked[dimension]
+        return ranked if limit is None else ranked[:limit]
+
+    def counts(self, dimension, limit=None):
+        """Return {key: count} for a dimension, most frequent first"""
+        return {key: cell[COUNT] for key, cell in self.ranked(dimension, limit)}
+
+    def summarize(self, cell):
+        """Turn a raw cell into the rounded metrics the endpoints report"""
+        return {
+            "count": cell[COUNT],
+            "percentage": round((cell[COUNT] / self.total) * 100, 2) if self.total else 0.0,
+            "avg_churn_score": round(cell[CHURN_SUM] / cell[COUNT], 2) if cell[COUNT] else 0.0,
+            "high_risk_count": cell[HIGH_RISK],
+            "unresolved_count": cell[UNRESOLVED],
+            "avg_resolution_time": round(cell[RESOLUTION_SUM] / cell[RESOLUTION_COUNT], 2) if cell[RESOLUTION_COUNT] else None
+        }
+
+    def overall(self):
+        """Return totals across every interaction"""
+        with self._lock:
+            cells = [list(cell) for cell in self.marginals['category'].values()]
+            total, customers, date_min, date_max = self.total, len(self.customer_ids), self.date_min, self.date_max
+        resolution_sum = sum(cell[RESOLUTION_SUM] for cell in cells)
+        resolution_count = sum(cell[RESOLUTION_COUNT] for cell in cells)
+        return {
+            "total_interactions": total,
+            "total_customers": customers,
+            "date_range": {"start": date_min, "end": date_max},
+            "avg_resolution_time": resolution_sum / resolution_count if resolution_count else None,
+            "unresolved_count": sum(cell[UNRESOLVED] for cell in cells)
+        }
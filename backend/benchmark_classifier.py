@@ -0,0 +1,117 @@
+"""
+Sentiment benchmark: local complaint classifier vs the Ollama LLM
+
+Trains the local classifier on part of customer_interactions, then on held-out
+rows reports its latency, accuracy against the generated labels and how many
+texts each confidence threshold would still send to the LLM. A sample is also
+sent to Ollama (when it is running) for LLM latency and local/LLM agreement.
+
+Usage:
+    python benchmark_classifier.py                    # 2000 held-out rows, 20 LLM calls
+    python benchmark_classifier.py --llm-samples 0    # local classifier only
+    python benchmark_classifier.py --threshold 0.7
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+import local_classifier
+from data_store import load_dataset
+from ollama_analyzer import OllamaAnalyzer
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=2000, help='held-out interactions to classify locally')
+    parser.add_argument('--llm-samples', type=int, default=20, help='held-out interactions also sent to Ollama')
+    parser.add_argument('--threshold', type=float, default=0.8, help='confidence needed to skip the LLM')
+    parser.add_argument('--model', default='llama3.2:1b')
+    args = parser.parse_args()
+
+    if not local_classifier.available():
+        print("❌ scikit-learn is not installed - the local classifier is unavailable")
+        return
+
+    df = load_dataset(DATA_DIR, 'customer_interactions')
+    held_out = df.sample(min(args.samples, len(df) // 5), random_state=7)
+    train = df.drop(held_out.index)
+    classifier = local_classifier.LocalComplaintClassifier(train)
+    texts = held_out['interaction_text'].astype(str).tolist()
+
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        classifier.classify(text)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    results = classifier.classify_many(texts)
+    batch_seconds = time.perf_counter() - start
+
+    confidence = np.array([r['confidence'] for r in results])
+    correct = {
+        field: np.array([r[field] == label for r, label in zip(results, held_out[field].astype(str))])
+        for field in local_classifier.LocalComplaintClassifier.HEADS
+    }
+    p50, p95 = percentiles(timings)
+
+    print(f"\n{'='*72}")
+    print(f"Local classifier: trained on {classifier.train_rows} rows in {classifier.train_seconds}s, "
+          f"{len(texts)} held out")
+    print(f"{'='*72}")
+    print(f"Single text   p50 {p50:.3f} ms   p95 {p95:.3f} ms")
+    print(f"Batch of {len(texts):<5} {batch_seconds * 1000:.1f} ms ({batch_seconds / len(texts) * 1e6:.0f} µs/text)")
+    for field, hits in correct.items():
+        print(f"{field:<12}  accuracy {hits.mean():.1%}")
+
+    print(f"\n{'threshold':<12}{'answered locally':>18}{'category acc':>15}{'sentiment acc':>15}")
+    for threshold in sorted(set(THRESHOLDS + [args.threshold])):
+        local = confidence >= threshold
+        share = local.mean()
+        category = correct['category'][local].mean() if local.any() else float('nan')
+        sentiment = correct['sentiment'][local].mean() if local.any() else float('nan')
+        print(f"{threshold:<12}{share:>18.1%}{category:>15.1%}{sentiment:>15.1%}")
+
+    if args.llm_samples <= 0:
+        return
+
+    analyzer = OllamaAnalyzer(model=args.model)
+    try:
+        requests.get(f"{analyzer.base_url}/api/tags", timeout=2).raise_for_status()
+    except requests.RequestException:
+        print(f"\n⚠️ Ollama is not reachable at {analyzer.base_url} - skipping the LLM comparison")
+        return
+
+    llm_timings, agree = [], {'category': 0, 'sentiment': 0}
+    sample = texts[:args.llm_samples]
+    for text, local in zip(sample, results):
+        start = time.perf_counter()
+        llm = analyzer.analyze_sentiment(text)
+        llm_timings.append(time.perf_counter() - start)
+        for field in agree:
+            agree[field] += str(llm.get(field, '')).lower() == local[field]
+    analyzer.close()
+
+    llm_p50, llm_p95 = percentiles(llm_timings)
+    print(f"\n{'='*72}")
+    print(f"LLM ({args.model}) on {len(sample)} texts")
+    print(f"{'='*72}")
+    print(f"Single text   p50 {llm_p50:.1f} ms   p95 {llm_p95:.1f} ms   ({llm_p50 / p50:.0f}x the local p50)")
+    for field, matches in agree.items():
+        print(f"{field:<12}  local/LLM agreement {matches / len(sample):.1%}")
+    print(f"{'='*72}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Startup benchmark: CSV vs memory-mapped Arrow loading of the data/ directory
+
+Usage:
+    python benchmark_loading.py            # compare both load paths
+    python benchmark_loading.py --convert  # first write Arrow copies of the existing CSVs
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from data_store import columnar_path, write_columnar, feather
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DATASETS = ['customer_interactions', 'customer_profiles', 'campaign_history', 'product_catalog']
+
+# Each load runs in a fresh interpreter so peak RSS reflects only that path
+LOAD_SNIPPET = """
+import json, resource, sys, time
+from pathlib import Path
+import pandas as pd
+from data_store import read_columnar
+
+path = Path(sys.argv[1])
+start = time.perf_counter()
+df = pd.read_csv(path) if path.suffix == '.csv' else read_columnar(path)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+print(json.dumps({"rows": len(df), "seconds": elapsed, "rss_mb": peak_mb}))
+"""
+
+
+def convert_existing_csvs():
+    """Write Arrow copies for CSVs generated before columnar output existed"""
+    import pandas as pd
+
+    for name in DATASETS:
+        df = pd.read_csv(DATA_DIR / f"{name}.csv")
+        write_columnar(df, columnar_path(DATA_DIR, name))
+        print(f"✅ Wrote {columnar_path(DATA_DIR, name).name}")
+
+
+def measure(path):
+    """Load one file in a subprocess and return its timing and memory figures"""
+    result = subprocess.run(
+        [sys.executable, "-c", LOAD_SNIPPET, str(path)],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--convert', action='store_true', help='write Arrow copies of the existing CSVs first')
+    args = parser.parse_args()
+
+    if feather is None:
+        print("❌ pyarrow is not installed - only the CSV path is available")
+        return
+
+    if args.convert:
+        convert_existing_csvs()
+
+    print(f"\n{'='*72}")
+    print(f"{'dataset':<26}{'path':<8}{'rows':>10}{'seconds':>12}{'peak RSS MB':>12}")
+    print(f"{'='*72}")
+
+    totals = {'csv': 0.0, 'arrow': 0.0}
+    for name in DATASETS:
+        paths = {'csv': DATA_DIR / f"{name}.csv", 'arrow': columnar_path(DATA_DIR, name)}
+        for label, path in paths.items():
+            if not path.exists():
+                print(f"{name:<26}{label:<8}{'missing - run Data.py or --convert':>34}")
+                continue
+            stats = measure(path)
+            totals[label] += stats['seconds']
+            print(f"{name:<26}{label:<8}{stats['rows']:>10}{stats['seconds']:>12.4f}{stats['rss_mb']:>12.1f}")
+
+    print(f"{'='*72}")
+    print(f"Total load time - csv: {totals['csv']:.4f}s, arrow: {totals['arrow']:.4f}s")
+    if totals['arrow'] > 0:
+        print(f"Speedup: {totals['csv'] / totals['arrow']:.1f}x")
+    print(f"{'='*72}")
+
+
+if __name__ == "__main__":
+    main()
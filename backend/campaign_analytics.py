@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['campaign_type', 'channel_used', 'target_segment']
+MAX_LAG_DAYS = 30  # Response/conversion lags are histogrammed per day; longer lags share the last bucket
+STAGES = ['targeted', 'contacted', 'responded', 'converted']
+
+
+def lag_days(start_dates, end_dates):
+    """Whole days from start to end per row, -1 where either date is missing"""
+    start = pd.to_datetime(start_dates, format='%Y-%m-%d', errors='coerce').values.astype('datetime64[D]')
+    end = pd.to_datetime(end_dates, format='%Y-%m-%d', errors='coerce').values.astype('datetime64[D]')
+    days = (end - start).astype(np.int64)
+    missing = np.isnat(start) | np.isnat(end) | (days < 0)
+    return np.where(missing, -1, np.minimum(days, MAX_LAG_DAYS)).astype(np.int16)
+
+
+def rate(numerator, denominator):
+    return round(float(numerator) / float(denominator) * 100, 2) if denominator else 0.0
+
+
+def lag_summary(histogram):
+    """Count, mean, median and p90 in days plus the per-day histogram, from a lag histogram"""
+    total = int(histogram.sum())
+    if total == 0:
+        return {"count": 0, "mean_days": None, "median_days": None, "p90_days": None, "histogram": []}
+    cumulative = np.cumsum(histogram)
+    days = np.arange(len(histogram))
+    return {
+        "count": total,
+        "mean_days": round(float(histogram @ days) / total, 2),
+        "median_days": int(np.searchsorted(cumulative, total * 0.5)),
+        "p90_days": int(np.searchsorted(cumulative, total * 0.9)),
+        "histogram": [
+            {"days": f"{day}+" if day == MAX_LAG_DAYS else int(day), "count": int(count)}
+            for day, count in zip(days, histogram) if count
+        ]
+    }
+
+
+class CampaignAnalytics:
+    """Campaign funnels, response lags and revenue over campaign_customer_mapping, reduced once per snapshot.
+
+    The mapping is turned into compact per-row arrays (campaign code, funnel
+    flags, revenue, lag days) and reduced with bincount into per-campaign
+    totals and lag histograms; the rows themselves are not kept. A funnel is
+    a lookup into those totals, and the campaign_type x channel_used x
+    target_segment cube is rolled up from them over campaigns, never over
+    mapping rows, so both stay in milliseconds however many contacts exist.
+    """
+
+    def __init__(self, campaigns_df, mapping_df):
+        self.campaigns = campaigns_df.drop_duplicates('campaign_id').reset_index(drop=True)
+        self.campaign_ids = pd.Index(self.campaigns['campaign_id'].astype(str))
+        n = len(self.campaign_ids)
+
+        codes = self.campaign_ids.get_indexer(mapping_df['campaign_id'].astype(str))
+        known = codes >= 0
+        codes = codes[known]
+        contacted = mapping_df['contacted'].values[known].astype(bool)
+        responded = mapping_df['responded'].values[known].astype(bool)
+        converted = mapping_df['converted'].values[known].astype(bool)
+        revenue = mapping_df['revenue'].values[known].astype(np.int64)
+        contacted_dates = mapping_df['contacted_date'].values[known]
+        response_lag = lag_days(contacted_dates, mapping_df['response_date'].values[known])
+        conversion_lag = lag_days(contacted_dates, mapping_df['conversion_date'].values[known])
+
+        # Per-campaign totals: one bincount per funnel stage and for revenue
+        self.totals = {
+            'targeted': np.bincount(codes, minlength=n),
+            'contacted': np.bincount(codes, weights=contacted, minlength=n).astype(np.int64),
+            'responded': np.bincount(codes, weights=responded, minlength=n).astype(np.int64),
+            'converted': np.bincount(codes, weights=converted, minlength=n).astype(np.int64),
+            'revenue': np.bincount(codes, weights=revenue, minlength=n).astype(np.int64)
+        }
+        self.cost = self.campaigns['campaign_cost'].astype(np.int64).values
+        self.response_lags = self._lag_histograms(codes, response_lag, n)
+        self.conversion_lags = self._lag_histograms(codes, conversion_lag, n)
+        self.mapping_rows = int(known.sum())
+
+        # Cube coordinates per campaign, as codes into each dimension's labels
+        self.dimension_codes = {}
+        self.dimension_labels = {}
+        for dimension in CUBE_DIMENSIONS:
+            codes_, labels = pd.factorize(self.campaigns[dimension].astype(str), sort=True)
+            self.dimension_codes[dimension] = codes_
+            self.dimension_labels[dimension] = labels
+        self._cubes = {}  # dimension tuple -> records
+
+    @staticmethod
+    def _lag_histograms(codes, lags, n):
+        """campaigns x (MAX_LAG_DAYS + 1) day counts for rows that have a lag"""
+        has_lag = lags >= 0
+        flat = codes[has_lag] * (MAX_LAG_DAYS + 1) + lags[has_lag]
+        return np.bincount(flat, minlength=n * (MAX_LAG_DAYS + 1)).reshape(n, MAX_LAG_DAYS + 1)
+
+    def funnel(self, campaign_id):
+        """One campaign's funnel, rates, revenue/ROI and lag distributions, or None for an unknown id"""
+        if campaign_id not in self.campaign_ids:
+            return None
+        i = self.campaign_ids.get_loc(campaign_id)
+        campaign = self.campaigns.iloc[i]
+        counts = {stage: int(self.totals[stage][i]) for stage in STAGES}
+        revenue, cost = int(self.totals['revenue'][i]), int(self.cost[i])
+        return {
+            "campaign_id": campaign_id,
+            "campaign_name": campaign['campaign_name'],
+            **{dimension: campaign[dimension] for dimension in CUBE_DIMENSIONS},
+            "target_issue": campaign['target_issue'],
+            "status": campaign['status'],
+            "funnel": counts,
+            "rates": {
+                "contact_rate": rate(counts['contacted'], counts['targeted']),
+                "response_rate": rate(counts['responded'], counts['contacted']),
+                "conversion_rate": rate(counts['converted'], counts['responded']),
+                "overall_conversion_rate": rate(counts['converted'], counts['targeted'])
+            },
+            "revenue": revenue,
+            "campaign_cost": cost,
+            "roi": round((revenue - cost) / cost, 2) if cost else None,
+            "revenue_per_conversion": round(revenue / counts['converted'], 2) if counts['converted'] else 0.0,
+            "time_to_response": lag_summary(self.response_lags[i]),
+            "time_to_conversion": lag_summary(self.conversion_lags[i])
+        }
+
+    def _cube(self, dimensions):
+        """Records for every combination of `dimensions`, rolled up from the per-campaign totals once and cached"""
+        records = self._cubes.get(dimensions)
+        if records is not None:
+            return records
+
+        if dimensions:
+            keys = np.stack([self.dimension_codes[d] for d in dimensions], axis=1)
+            cells, cell_of = np.unique(keys, axis=0, return_inverse=True)
+            cell_of = cell_of.ravel()
+        else:
+            cells, cell_of = np.zeros((1, 0), dtype=np.intp), np.zeros(len(self.campaign_ids), dtype=np.intp)
+        m = len(cells)
+        sums = {name: np.bincount(cell_of, weights=values, minlength=m).astype(np.int64)
+                for name, values in {**self.totals, 'cost': self.cost}.items()}
+        sums['campaigns'] = np.bincount(cell_of, minlength=m)
+        response_lags = np.zeros((m, MAX_LAG_DAYS + 1), dtype=np.int64)
+        np.add.at(response_lags, cell_of, self.response_lags)
+
+        records = []
+        for c in range(m):
+            revenue, cost = int(sums['revenue'][c]), int(sums['cost'][c])
+            lags = lag_summary(response_lags[c])
+            records.append({
+                **{d: self.dimension_labels[d][cells[c][k]] for k, d in enumerate(dimensions)},
+                "campaigns": int(sums['campaigns'][c]),
+                **{stage: int(sums[stage][c]) for stage in STAGES},
+                "response_rate": rate(sums['responded'][c], sums['contacted'][c]),
+                "conversion_rate": rate(sums['converted'][c], sums['responded'][c]),
+                "overall_conversion_rate": rate(sums['converted'][c], sums['targeted'][c]),
+                "revenue": revenue,
+                "campaign_cost": cost,
+                "roi": round((revenue - cost) / cost, 2) if cost else None,
+                "median_days_to_response": lags['median_days'],
+                "mean_days_to_response": lags['mean_days']
+            })
+        self._cubes[dimensions] = records
+        return records
+
+    def analytics(self, dimensions=tuple(CUBE_DIMENSIONS), sort_by='revenue', limit=None):
+        """One record per combination of `dimensions` with funnel totals, rates, revenue and ROI, best first"""
+        records = sorted(self._cube(tuple(dimensions)), key=lambda r: (r[sort_by] is None, -(r[sort_by] or 0)))
+        return records if limit is None else records[:limit]
+
+    def stats(self):
+        return {"campaigns": len(self.campaign_ids), "mapping_rows": self.mapping_rows}
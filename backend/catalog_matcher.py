@@ -0,0 +1,115 @@
+import numpy as np
+
+SHORTLIST_SIZE = 3
+AVAILABLE_STOCK = {'In Stock': 1.0, 'Low Stock': 0.8}  # Out-of-stock products are never offered
+HIGH_CHURN_SCORE = 0.6  # Customers at or above this churn_score get churn-suitable products first
+PRICE_HEADROOM = 1.5  # Products up to this multiple of the current plan value count as affordable
+
+# Each term is scaled to 0..1 before weighting; the issue match dominates so products always fit the complaints
+MATCH_WEIGHTS = {
+    'issue': 0.55,
+    'churn': 0.15,
+    'popularity': 0.12,
+    'rating': 0.08,
+    'price_fit': 0.10
+}
+
+
+class CatalogMatcher:
+    """Inverted index from issue category to the in-stock products that target it.
+
+    Built once per snapshot from product_catalog. `match()` only touches the
+    products listed under the customer's issues and ranks them on fixed
+    arrays, so a shortlist costs microseconds and is the same every time for
+    the same customer.
+    """
+
+    def __init__(self, products_df):
+        available = products_df[products_df['stock_status'].isin(AVAILABLE_STOCK)].reset_index(drop=True)
+        self.product_ids = available['product_id'].astype(str).values
+        self.price = available['price'].astype(float).values
+        self.static_score = (
+            MATCH_WEIGHTS['popularity'] * available['popularity_score'].astype(float).values / 100
+            + MATCH_WEIGHTS['rating'] * available['avg_rating'].astype(float).values / 5
+        ) * available['stock_status'].map(AVAILABLE_STOCK).values
+        self.churn_suitable = available['suitable_for_churn'].astype(bool).values
+        self.records = [
+            {
+                "product_id": str(row.product_id),
+                "product": row.product_name,
+                "product_category": row.product_category,
+                "price": int(row.price),
+                "stock_status": row.stock_status,
+                "description": row.description,
+                "suitable_for_churn": bool(row.suitable_for_churn)
+            }
+            for row in available.itertuples()
+        ]
+
+        self.issues = [
+            [issue.strip() for issue in issues.split(',')] if isinstance(issues, str) else []
+            for issues in available['target_issues']
+        ]
+        positions = {}
+        for position, issues in enumerate(self.issues):
+            for issue in issues:
+                positions.setdefault(issue, []).append(position)
+        self.by_issue = {issue: np.array(members, dtype=np.intp) for issue, members in positions.items()}
+
+    def match(self, issue_weights, plan_value=None, high_churn=False, limit=SHORTLIST_SIZE):
+        """Best in-stock products for {issue: weight} (weights summing to 1), as output records"""
+        issue_score = np.zeros(len(self.product_ids))
+        for issue, weight in issue_weights.items():
+            members = self.by_issue.get(issue)
+            if members is not None:
+                issue_score[members] += weight
+        candidates = np.flatnonzero(issue_score > 0)
+        if len(candidates) == 0:
+            # Nothing targets these issues: offer general products instead
+            candidates = self.by_issue.get('product_inquiry', np.arange(len(self.product_ids)))
+
+        scores = MATCH_WEIGHTS['issue'] * issue_score[candidates] + self.static_score[candidates]
+        if high_churn:
+            scores += MATCH_WEIGHTS['churn'] * self.churn_suitable[candidates]
+        if plan_value:
+            budget = plan_value * PRICE_HEADROOM
+            scores += MATCH_WEIGHTS['price_fit'] * np.minimum(1.0, budget / self.price[candidates])
+
+        # Score desc, then catalog order, so equal scores always come back the same way
+        order = np.lexsort((candidates, -scores))[:limit]
+        return [
+            {
+                **self.records[candidates[i]],
+                "matched_issues": [issue for issue in self.issues[candidates[i]] if issue in issue_weights],
+                "match_score": round(float(scores[i]), 3)
+            }
+            for i in order
+        ]
+
+    def stats(self):
+        return {"products_available": len(self.product_ids), "issues_indexed": len(self.by_issue)}
+
+
+def catalog_recommendations(shortlist, customer):
+    """Recommendation payload built straight from a shortlist - same shape as the LLM's, no LLM call"""
+    def reason(product):
+        issues = ', '.join(issue.replace('_', ' ') for issue in product['matched_issues']) or 'your current needs'
+        return f"{product['description']}. Addresses your recent {issues} issues at ₹{product['price']}."
+
+    if not shortlist:
+        return None
+    primary, secondary = shortlist[0], shortlist[1:]
+    tenure = customer.get('tenure_months', 'N/A')
+    return {
+        "primary_recommendation": {
+            "product_id": primary['product_id'],
+            "product": primary['product'],
+            "reason": reason(primary),
+            "expected_impact": f"Fewer {' and '.join(i.replace('_', ' ') for i in primary['matched_issues']) or 'service'} problems."
+        },
+        "secondary_recommendations": [
+            {"product_id": p['product_id'], "product": p['product'], "reason": reason(p)} for p in secondary
+        ],
+        "retention_strategy": f"Offer as a thank-you to a {tenure}-month customer, with priority follow-up on open issues.",
+        "tone": "warm_and_helpful"
+    }
@@ -0,0 +1,164 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import HIGH_RISK_LEVELS
+
+
+class CustomerIndex:
+    """customer_id hash indexes over the profile and interaction tables"""
+
+    def __init__(self, customers_df, interactions):
+        # First profile wins, matching the old `customer_match.iloc[0]` lookup
+        self.profiles = customers_df.drop_duplicates('customer_id').set_index('customer_id', drop=False)
+        self.interactions = interactions  # InteractionTable
+        # customer_id -> positional row offsets into the interaction table, in table order
+        self.interaction_rows = interactions.base.groupby('customer_id', sort=False).indices
+        self._lock = threading.Lock()  # Ingestion extends interaction_rows in place
+
+    def profile(self, customer_id):
+        """Return a customer's profile as a dict, or None if unknown"""
+        if customer_id not in self.profiles.index:
+            return None
+        return self.profiles.loc[customer_id].to_dict()
+
+    def history(self, customer_id):
+        """Return every interaction row for a customer without scanning the table"""
+        with self._lock:
+            rows = self.interaction_rows.get(customer_id, np.empty(0, dtype=np.intp))
+        return self.interactions.rows(rows)
+
+    def add(self, rows, start):
+        """Index a batch already appended to the table at global position `start`"""
+        new_rows = rows.groupby('customer_id', sort=False).indices
+        with self._lock:
+            for customer_id, positions in new_rows.items():
+                positions = positions + start
+                existing = self.interaction_rows.get(customer_id)
+                self.interaction_rows[customer_id] = positions if existing is None else np.concatenate([existing, positions])
+
+    def attach_profiles(self, df, columns):
+        """Attach profile columns to rows keyed by customer_id, dropping unknown customers and keeping row order"""
+        df = df[df['customer_id'].isin(self.profiles.index)]
+        return df.assign(**{column: df['customer_id'].map(self.profiles[column]) for column in columns})
+
+
+RECENT_INTERACTIONS = 5  # Latest rows kept per customer for /recommendations
+
+
+class CustomerSummary:
+    """One row per customer reduced from their interactions, aligned with `customer_ids` and kept current by add().
+
+    Holds what the lead and recommendation endpoints used to regroup on every
+    call: interaction and escalation counts, the highest-churn interaction, the
+    latest interaction by timestamp and the last few rows in table order.
+    """
+
+    def __init__(self, customer_ids, interactions_df):
+        self.customer_ids = customer_ids
+        n = len(customer_ids)
+        self.interaction_count = np.zeros(n, dtype=np.int64)
+        self.escalation_sum = np.zeros(n, dtype=np.int64)
+        self.high_risk_count = np.zeros(n, dtype=np.int64)
+        self.unresolved_count = np.zeros(n, dtype=np.int64)
+        self.max_churn = np.zeros(n)
+        self.max_churn_row = np.full(n, -1, dtype=np.int64)
+        self.primary_issue = np.full(n, None, dtype=object)  # Category of the highest-churn interaction
+        self.latest_at = np.full(n, np.datetime64('NaT'), dtype='datetime64[s]')
+        self.latest_row = np.full(n, -1, dtype=np.int64)
+        self.recent_rows = np.full((n, RECENT_INTERACTIONS), -1, dtype=np.int64)  # Oldest first, -1 padded on the left
+        self.version = 0  # Bumped by every add(), so score caches can tell the columns changed under them
+        self.lock = threading.Lock()  # Held while add() updates the columns in place; hold it to read several consistently
+        self.add(interactions_df, 0)
+
+    def add(self, df, start):
+        """Fold a batch of interaction rows, the first at global position `start`, into the per-customer columns"""
+        with self.lock:
+            self._add(df, start)
+            self.version += 1
+
+    def _add(self, df, start):
+        positions = self.customer_ids.get_indexer(df['customer_id'])
+        known = positions >= 0
+        positions = positions[known]
+        rows = np.flatnonzero(known) + start
+        if len(rows) == 0:
+            return
+
+        # Scattered adds touch only the batch's customers (a bincount would pass over every customer)
+        np.add.at(self.interaction_count, positions, 1)
+        np.add.at(self.escalation_sum, positions, df['escalation_count'].values[known].astype(np.int64))
+        np.add.at(self.high_risk_count, positions, df['churn_risk'].isin(HIGH_RISK_LEVELS).values[known].astype(np.int64))
+        np.add.at(self.unresolved_count, positions, (df['resolution_status'] == 'unresolved').values[known].astype(np.int64))
+
+        # Highest churn: ascending stable order, so the last write per customer is its max (later rows win ties)
+        churn = df['churn_score'].values[known].astype(float)
+        order = np.argsort(churn, kind='stable')
+        by_churn = positions[order]
+        better = (churn[order] >= self.max_churn[by_churn]) | (self.max_churn_row[by_churn] < 0)
+        self.max_churn[by_churn[better]] = churn[order][better]
+        self.max_churn_row[by_churn[better]] = rows[order][better]
+        self.primary_issue[by_churn[better]] = df['category'].values[known][order][better]
+
+        # Latest by timestamp, the same way
+        stamps = pd.to_datetime(df['timestamp'].values[known], format='%Y-%m-%d %H:%M:%S').values.astype('datetime64[s]')
+        order = np.argsort(stamps, kind='stable')
+        by_time = positions[order]
+        newer = stamps[order].view(np.int64) >= self.latest_at[by_time].view(np.int64)  # NaT is the smallest int64
+        self.latest_at[by_time[newer]] = stamps[order][newer]
+        self.latest_row[by_time[newer]] = rows[order][newer]
+
+        # Last RECENT_INTERACTIONS rows per customer: merge the kept rows with the new ones and keep each tail
+        touched = np.unique(positions)
+        kept = self.recent_rows[touched]
+        candidates = np.concatenate([np.repeat(touched, RECENT_INTERACTIONS), positions])
+        candidate_rows = np.concatenate([kept.ravel(), rows])
+        valid = candidate_rows >= 0
+        candidates, candidate_rows = candidates[valid], candidate_rows[valid]
+        order = np.lexsort((candidate_rows, candidates))
+        candidates, candidate_rows = candidates[order], candidate_rows[order]
+        _, firsts, counts = np.unique(candidates, return_index=True, return_counts=True)
+        from_end = np.repeat(firsts + counts - 1, counts) - np.arange(len(candidates))
+        tail = from_end < RECENT_INTERACTIONS
+        self.recent_rows[touched] = -1
+        self.recent_rows[candidates[tail], RECENT_INTERACTIONS - 1 - from_end[tail]] = candidate_rows[tail]
+
+    def position(self, customer_id):
+        """Row of a customer in the summary arrays, or None"""
+        if customer_id not in self.customer_ids:
+            return None
+        return self.customer_ids.get_loc(customer_id)
+
+    def recent(self, customer_id):
+        """Positional interaction rows of the customer's last few interactions, oldest first"""
+        position = self.position(customer_id)
+        if position is None:
+            return np.empty(0, dtype=np.int64)
+        with self.lock:
+            rows = self.recent_rows[position].copy()
+        return rows[rows >= 0]
+
+    def columns(self, positions):
+        """Lead-facing summary columns for the given summary positions"""
+        with self.lock:
+            return {
+                "total_interactions": self.interaction_count[positions],
+                "total_escalations": self.escalation_sum[positions],
+                "latest_interaction": np.char.replace(np.datetime_as_string(self.latest_at[positions], unit='s'), 'T', ' ')
+            }
+
+    def frame(self):
+        """The whole reduction as a DataFrame keyed by customer_id"""
+        with self.lock:
+            return pd.DataFrame({
+                "interaction_count": self.interaction_count,
+                "escalation_sum": self.escalation_sum,
+                "high_risk_count": self.high_risk_count,
+                "unresolved_count": self.unresolved_count,
+                "max_churn_score": self.max_churn,
+                "max_churn_row": self.max_churn_row,
+                "primary_issue": self.primary_issue,
+                "latest_at": self.latest_at,
+                "latest_row": self.latest_row
+            }, index=self.customer_ids)
@@ -0,0 +1,250 @@
+import os
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # Columnar copies are optional; CSV always works
+    feather = None
+
+COLUMNAR_SUFFIX = '.feather'
+CATEGORICAL_COLUMNS = ['operator', 'category', 'geography', 'churn_risk', 'sentiment']
+
+
+def columnar_path(data_dir, name):
+    """Path of the Arrow copy that Data.py writes next to <name>.csv"""
+    return data_dir / f"{name}{COLUMNAR_SUFFIX}"
+
+
+def has_fresh_columnar_copy(data_dir, name):
+    """True when pyarrow is installed and the Arrow copy is at least as new as the CSV"""
+    if feather is None:
+        return False
+
+    arrow_file = columnar_path(data_dir, name)
+    csv_file = data_dir / f"{name}.csv"
+    if not arrow_file.exists():
+        return False
+    if csv_file.exists() and os.path.getmtime(csv_file) > os.path.getmtime(arrow_file):
+        return False
+    return True
+
+
+def read_columnar(path):
+    """Memory-map an Arrow IPC file and convert it to pandas without an extra copy where possible"""
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_columnar(df, path, categorical_columns=CATEGORICAL_COLUMNS):
+    """Write an uncompressed Arrow copy of df (so it can be memory-mapped) with categorical dtypes"""
+    if feather is None:
+        raise ImportError("pyarrow is required to write columnar copies")
+
+    df = df.astype({col: 'category' for col in categorical_columns if col in df.columns})
+    feather.write_feather(df, path, compression='uncompressed')
+
+
+def load_dataset(data_dir, name, prefer_columnar=True):
+    """Load data/<name> from its Arrow copy when fresh, falling back to the CSV"""
+    start = time.time()
+
+    if prefer_columnar and has_fresh_columnar_copy(data_dir, name):
+        df = read_columnar(columnar_path(data_dir, name))
+        source = 'arrow'
+    else:
+        df = pd.read_csv(data_dir / f"{name}.csv")
+        source = 'csv'
+
+    print(f"   📂 {name}: {len(df)} rows from {source} in {time.time() - start:.2f}s")
+    return df
+
+
+# ==========================================================
+# 🔹 Ingested shards (rows appended through the API)
+# ==========================================================
+INGEST_DIR = 'ingest'
+
+
+def base_stamp(data_dir, name):
+    """Fingerprint (size and mtime) of the generated data/<name> file that ingested shards extend"""
+    path = data_dir / f"{name}.csv"
+    if not path.exists():
+        path = columnar_path(data_dir, name)
+    stat = path.stat()
+    return f"{zlib.crc32(f'{stat.st_size}:{stat.st_mtime_ns}'.encode()):08x}"
+
+
+def shard_sequence(path):
+    return int(path.stem.rsplit('_', 1)[1])
+
+
+def ingest_shards(data_dir, name, stamp=None):
+    """Shard files under data/ingest/ for <name>, oldest first; only those stamped `stamp` when given"""
+    ingest_dir = data_dir / INGEST_DIR
+    if not ingest_dir.exists():
+        return []
+    shards = [
+        path for path in ingest_dir.glob(f"{name}_*")
+        if path.suffix == '.csv' or (path.suffix == COLUMNAR_SUFFIX and feather is not None)
+    ]
+    if stamp is not None:
+        shards = [path for path in shards if path.stem.rsplit('_', 2)[-2] == stamp]
+    return sorted(shards, key=shard_sequence)
+
+
+def write_ingest_shard(df, data_dir, name, stamp):
+    """Write df as the next data/ingest/<name>_<stamp>_NNNNNN shard (Arrow when available, CSV otherwise).
+
+    `stamp` is the base_stamp() of the dataset the rows were appended to, so
+    the loader can leave them out once Data.py has regenerated that dataset.
+    """
+    ingest_dir = data_dir / INGEST_DIR
+    ingest_dir.mkdir(parents=True, exist_ok=True)
+    existing = ingest_shards(data_dir, name)
+    sequence = shard_sequence(existing[-1]) + 1 if existing else 1
+    suffix = COLUMNAR_SUFFIX if feather is not None else '.csv'
+    path = ingest_dir / f"{name}_{stamp}_{sequence:06d}{suffix}"
+
+    # Write under a temporary name so a crash never leaves a half-written shard for the loader
+    partial = path.with_name(path.name + '.partial')
+    if feather is not None:
+        write_columnar(df, partial)
+    else:
+        df.to_csv(partial, index=False)
+    os.replace(partial, path)
+    return path
+
+
+def append_rows(df, rows):
+    """Concatenate rows onto df, widening categorical columns so they stay categorical"""
+    rows = rows[df.columns]
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            unseen = pd.Index(rows[col].dropna().unique()).difference(df[col].cat.categories)
+            if len(unseen):
+                df = df.assign(**{col: df[col].cat.add_categories(unseen)})
+    rows = rows.astype(df.dtypes.to_dict())
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def load_with_ingested(data_dir, name, stamp):
+    """Load data/<name> plus the data/ingest/ shards compacted on top of this generation of it (base stamp `stamp`)"""
+    df = load_dataset(data_dir, name)
+    paths = ingest_shards(data_dir, name, stamp)
+    stale = len(ingest_shards(data_dir, name)) - len(paths)
+    if stale:
+        # Written against an earlier dataset: their ids and customers belong to data that is no longer there
+        print(f"   ⚠️ {name}: skipping {stale} ingested shards from before the dataset was regenerated")
+    shards = [read_columnar(path) if path.suffix == COLUMNAR_SUFFIX else pd.read_csv(path) for path in paths]
+    if shards:
+        df = append_rows(df, pd.concat(shards, ignore_index=True))
+        print(f"   📂 {name}: {sum(len(shard) for shard in shards)} ingested rows from {len(shards)} shards")
+    return df
+
+
+# ==========================================================
+# 🔹 Interaction table: the loaded rows plus ingested chunks
+# ==========================================================
+class InteractionTable:
+    """The loaded interaction DataFrame plus the batches ingestion appended to it, addressed by global row position.
+
+    append() never copies the rows already held: a batch becomes a new chunk,
+    and the newest chunks are merged only once the last has grown to the size
+    of the one before it, so chunks stay few (O(log n)) and each ingested row
+    is copied O(log n) times over its life. The chunk list is replaced with one
+    reference assignment, so readers that take `rows()`/`values()` mid-append
+    see the table either before or after the batch.
+    """
+
+    def __init__(self, df):
+        self.base = df
+        self._chunks = ((), (), len(df))  # (frames, first global position of each, total rows)
+        self._frame = None  # (rows, DataFrame) built by frame()
+
+    def __len__(self):
+        return self._chunks[2]
+
+    @property
+    def columns(self):
+        return self.base.columns
+
+    def append(self, rows):
+        """Add a batch of rows (with the base columns) after the last row"""
+        frames, starts, length = self._chunks
+        frames, starts = list(frames) + [self._conform(rows)], list(starts) + [length]
+        while len(frames) > 1 and len(frames[-2]) <= len(frames[-1]):
+            frames[-2:] = [pd.concat(frames[-2:], ignore_index=True)]
+            starts.pop()
+        self._chunks = (tuple(frames), tuple(starts), length + len(rows))
+
+    def _conform(self, rows):
+        """Base column order and dtypes; categoricals only when every value is a known category"""
+        rows = rows[self.base.columns].reset_index(drop=True)
+        dtypes = {}
+        for col, dtype in self.base.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                if rows[col].dropna().isin(dtype.categories).all():
+                    dtypes[col] = dtype
+            elif rows[col].dtype != dtype:
+                dtypes[col] = dtype
+        return rows.astype(dtypes)
+
+    def _locate(self, rows):
+        """Split global positions by part: yields (part DataFrame, local positions, indexes into `rows`)"""
+        frames, starts, _ = self._chunks
+        parts = (self.base,) + frames
+        bounds = np.array((0,) + starts, dtype=np.int64)
+        owner = np.searchsorted(bounds, rows, side='right') - 1
+        for part in np.unique(owner):
+            members = np.flatnonzero(owner == part)
+            yield parts[part], rows[members] - bounds[part], members
+
+    def rows(self, positions):
+        """The rows at the given global positions, in that order and indexed by them (iloc on the whole table)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions) or positions.max() < len(self.base):
+            return self.base.iloc[positions]
+        pieces, order = [], []
+        for part, local, members in self._locate(positions):
+            pieces.append(part.iloc[local])
+            order.append(members)
+        df = pd.concat(pieces, ignore_index=True).iloc[np.argsort(np.concatenate(order), kind='stable')]
+        df.index = positions
+        return df
+
+    def values(self, column, positions):
+        """One column's values at the given global positions, as an array"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions) or positions.max() < len(self.base):
+            return self.base[column].values[positions]
+        pieces, order = [], []
+        for part, local, members in self._locate(positions):
+            pieces.append(np.asarray(part[column].values[local]))
+            order.append(members)
+        values = np.concatenate(pieces)
+        result = np.empty_like(values)
+        result[np.concatenate(order)] = values
+        return result
+
+    def parts(self):
+        """(first global position, DataFrame) for the loaded rows and each chunk, for scans that need no joined copy"""
+        frames, starts, _ = self._chunks
+        return [(0, self.base)] + list(zip(starts, frames))
+
+    def since(self, start):
+        """The rows from global position `start` to the end"""
+        return self.rows(np.arange(start, len(self)))
+
+    def frame(self):
+        """The whole table as one DataFrame; a full copy whenever rows were appended since the last call"""
+        frames, _, length = self._chunks
+        if not frames:
+            return self.base
+        cached = self._frame
+        if cached is None or cached[0] != length:
+            cached = (length, append_rows(self.base, pd.concat(frames, ignore_index=True)))
+            self._frame = cached
+        return cached[1]
@@ -0,0 +1,130 @@
+import threading
+import time
+import pandas as pd
+
+from data_store import write_ingest_shard
+
+# Interaction columns copied from the customer's profile, as Data.py denormalizes them
+PROFILE_COLUMNS = {
+    'geography': 'geography',
+    'region': 'region',
+    'customer_tenure_months': 'tenure_months',
+    'current_plan_value': 'current_plan_value',
+    'operator': 'operator',
+    'service_type': 'service_type'
+}
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def complete_rows(rows, profiles):
+    """Derive date/week/month from the timestamp and copy the profile columns onto newly ingested rows"""
+    timestamps = pd.to_datetime(rows['timestamp'], format=TIMESTAMP_FORMAT)
+    rows['date'] = timestamps.dt.strftime('%Y-%m-%d')
+    rows['week'] = timestamps.dt.strftime('%Y-W%U')
+    rows['month'] = timestamps.dt.strftime('%Y-%m')
+    for column, profile_column in PROFILE_COLUMNS.items():
+        rows[column] = rows['customer_id'].map(profiles[profile_column]).values
+    return rows
+
+
+class InteractionBuffer:
+    """Append-only columnar buffer for interactions posted to the API.
+
+    `append()` only extends per-column lists under a lock, so inserts stay
+    cheap. `drain()` hands the pending rows over as one DataFrame for the live
+    structures to fold in, and `compact()` writes everything drained since the
+    last compaction to a data/ingest/ shard that the loader picks up on restart.
+    """
+
+    def __init__(self, columns, next_id):
+        self.columns = list(columns)
+        self.next_id = next_id
+        self.received = 0
+        self.published = 0
+        self.compacted = 0
+        self.shards = 0
+        self.last_compaction = time.time()
+        self._lock = threading.Lock()
+        self._pending = self._empty()
+        self._unwritten = []
+
+    def _empty(self):
+        return {column: [] for column in ['interaction_id'] + self.columns}
+
+    def append(self, records):
+        """Queue validated record dicts and return the interaction ids assigned to them"""
+        with self._lock:
+            ids = [f"INT_{i:06d}" for i in range(self.next_id, self.next_id + len(records))]
+            self.next_id += len(records)
+            self._pending['interaction_id'].extend(ids)
+            for column in self.columns:
+                self._pending[column].extend(record[column] for record in records)
+            self.received += len(records)
+        return ids
+
+    @property
+    def pending(self):
+        return len(self._pending['interaction_id'])
+
+    @property
+    def unwritten(self):
+        return sum(len(rows) for rows in self._unwritten)
+
+    def drain(self, profiles):
+        """Take the pending rows as a completed DataFrame, or None when nothing is pending"""
+        with self._lock:
+            if not self._pending['interaction_id']:
+                return None
+            pending, self._pending = self._pending, self._empty()
+        rows = complete_rows(pd.DataFrame(pending), profiles)
+        self._unwritten.append(rows)
+        self.published += len(rows)
+        return rows
+
+    def restamp(self, next_id):
+        """Renumber unwritten and pending rows from `next_id` if their ids are not already past it; returns how many moved.
+
+        A reload can swap in a regenerated table that already uses the ids
+        handed out against the old one, so the rows still held here move up.
+        """
+        with self._lock:
+            ids = [i for rows in self._unwritten for i in rows['interaction_id']] + self._pending['interaction_id']
+            if not ids or int(ids[0][len('INT_'):]) >= next_id:
+                self.next_id = max(self.next_id, next_id)
+                return 0
+            renumbered = [f"INT_{i:06d}" for i in range(next_id, next_id + len(ids))]
+            offset = 0
+            for k, rows in enumerate(self._unwritten):
+                self._unwritten[k] = rows.assign(interaction_id=renumbered[offset:offset + len(rows)])
+                offset += len(rows)
+            self._pending['interaction_id'] = renumbered[offset:]
+            self.next_id = next_id + len(ids)
+        return len(ids)
+
+    def unwritten_rows(self):
+        """The drained rows not compacted to disk yet, as one DataFrame, or None"""
+        if not self._unwritten:
+            return None
+        return pd.concat(self._unwritten, ignore_index=True)
+
+    def compact(self, data_dir, name, stamp):
+        """Write the drained rows that are not on disk yet as one shard stamped with their base dataset; returns its path or None"""
+        self.last_compaction = time.time()
+        rows = self.unwritten_rows()
+        if rows is None:
+            return None
+        path = write_ingest_shard(rows, data_dir, name, stamp)
+        self._unwritten = []
+        self.compacted += len(rows)
+        self.shards += 1
+        return path
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "pending": self.pending,
+            "published": self.published,
+            "compacted": self.compacted,
+            "unwritten": self.unwritten,
+            "shards_written": self.shards
+        }
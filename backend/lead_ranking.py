@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import HIGH_RISK_LEVELS
+
+SCAN_CHUNK_ROWS = 1024  # Presorted rows checked per step when a page also filters on geography
+
+
+def interaction_numbers(interaction_ids):
+    """INT_000123 -> 123; the stable tie-breaker after churn_score in every lead ranking"""
+    return pd.Series(interaction_ids).str.slice(4).astype(np.int64).values
+
+
+def parse_cursor(after):
+    """'0.91:INT_000123' -> (0.91, 123); raises ValueError for anything else"""
+    score, _, interaction_id = after.partition(':')
+    if not interaction_id.startswith('INT_'):
+        raise ValueError(f"Invalid cursor: {after}")
+    return float(score), int(interaction_id[4:])
+
+
+def format_cursor(score, number):
+    return f"{float(score)!r}:INT_{int(number):06d}"
+
+
+def top_k(scores, numbers, k):
+    """Positions of the k best (score desc, number asc) entries, in order, without sorting everything"""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.arange(len(scores))
+    if len(scores) > k:
+        kth = scores[np.argpartition(scores, len(scores) - k)[len(scores) - k]]
+        candidates = np.flatnonzero(scores >= kth)  # Keep every tie at the cut so the number order decides
+    order = np.lexsort((numbers[candidates], -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def best_per_customer(customer_ids, scores, numbers):
+    """Mask of each customer's best (score desc, number asc) entry, in linear time"""
+    codes, uniques = pd.factorize(customer_ids)
+    top_score = np.full(len(uniques), -np.inf)
+    np.maximum.at(top_score, codes, scores)
+    at_top = scores == top_score[codes]
+    first_number = np.full(len(uniques), np.iinfo(np.int64).max)
+    np.minimum.at(first_number, codes[at_top], numbers[at_top])
+    return at_top & (numbers == first_number[codes])
+
+
+class LeadRanking:
+    """High/critical churn-risk interaction rows per category, presorted by churn_score desc then interaction id.
+
+    Each customer appears once per category, on their best-ranked interaction,
+    so repeat complainers do not use up a page. A page is a binary search to the cursor plus a slice, so walking every lead
+    costs the same per page however deep it goes. Rows appended by ingestion
+    are kept as segments and merged into the ranking the next time that
+    category is read.
+    """
+
+    def __init__(self, interactions):
+        self.interactions = interactions  # InteractionTable
+        self._segments = {}  # category -> list of (negated scores, numbers, rows) waiting to be merged
+        self._ranked = {}  # category -> (negated scores, numbers, rows) in ranking order, i.e. ascending
+        self._lock = threading.Lock()  # Ingestion appends segments while request threads merge them
+        self.add(interactions.base, 0)
+
+    def add(self, df, start):
+        """Queue the high-risk rows of a batch already appended to the table at global position `start`"""
+        high_risk = np.flatnonzero(df['churn_risk'].isin(HIGH_RISK_LEVELS).values)
+        if len(high_risk) == 0:
+            return
+
+        neg_scores = -df['churn_score'].values[high_risk].astype(float)
+        numbers = interaction_numbers(df['interaction_id'].values[high_risk])
+        categories = pd.Series(df['category'].values[high_risk]).astype(str)
+        with self._lock:
+            for category, members in categories.groupby(categories, sort=False).indices.items():
+                self._segments.setdefault(category, []).append((neg_scores[members], numbers[members], high_risk[members] + start))
+
+    def ranked(self, category):
+        """(negated scores, numbers, rows) for a category in ranking order"""
+        with self._lock:
+            segments = self._segments.pop(category, [])
+            if segments:
+                if category in self._ranked:
+                    segments.insert(0, self._ranked[category])
+                neg_scores, numbers, rows = (np.concatenate(parts) for parts in zip(*segments))
+                order = np.lexsort((numbers, neg_scores))
+                order = order[self._first_per_customer(rows[order])]
+                self._ranked[category] = (neg_scores[order], numbers[order], rows[order])
+        empty = np.empty(0)
+        return self._ranked.get(category, (empty, empty.astype(np.int64), empty.astype(np.intp)))
+
+    def _first_per_customer(self, rows):
+        """Mask keeping each customer's first row in the given (ranked) order"""
+        return ~pd.Series(self.interactions.values('customer_id', rows)).duplicated().values
+
+    def page(self, category, limit, after=None, geography=None):
+        """Positional rows of the next `limit` leads after the cursor, and the cursor for the page after"""
+        neg_scores, numbers, rows = self.ranked(category)
+        start = 0
+        if after is not None:
+            score, number = after
+            lo = np.searchsorted(neg_scores, -score, side='left')
+            hi = np.searchsorted(neg_scores, -score, side='right')
+            start = lo + np.searchsorted(numbers[lo:hi], number, side='right')
+
+        if geography is None:
+            picked = np.arange(start, min(start + max(limit, 0), len(rows)))
+        else:
+            found = []
+            while start < len(rows) and sum(len(part) for part in found) < limit:
+                chunk = np.arange(start, min(start + max(limit * 4, SCAN_CHUNK_ROWS), len(rows)))
+                found.append(chunk[np.asarray(self.interactions.values('geography', rows[chunk]) == geography)])
+                start = chunk[-1] + 1
+            picked = np.concatenate(found)[:limit] if found else np.empty(0, dtype=np.intp)
+
+        next_cursor = None
+        if len(picked) and len(picked) == limit:
+            next_cursor = format_cursor(-neg_scores[picked[-1]], numbers[picked[-1]])
+        return rows[picked], next_cursor
+
+    def filtered(self, category, risk_levels, limit, after=None, geography=None):
+        """Same as page() for churn-risk levels the ranking does not presort: one mask, then argpartition"""
+        rows, scores, interaction_ids, customer_ids = [], [], [], []
+        for start, df in self.interactions.parts():
+            mask = (df['category'] == category).values & df['churn_risk'].isin(risk_levels).values
+            if geography is not None:
+                mask &= (df['geography'] == geography).values
+            local = np.flatnonzero(mask)
+            rows.append(local + start)
+            scores.append(df['churn_score'].values[local].astype(float))
+            interaction_ids.append(np.asarray(df['interaction_id'].values[local]))
+            customer_ids.append(np.asarray(df['customer_id'].values[local]))
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        numbers = interaction_numbers(np.concatenate(interaction_ids))
+        best = best_per_customer(np.concatenate(customer_ids), scores, numbers)
+        rows, scores, numbers = rows[best], scores[best], numbers[best]
+        if after is not None:
+            score, number = after
+            later = (scores < score) | ((scores == score) & (numbers > number))
+            rows, scores, numbers = rows[later], scores[later], numbers[later]
+
+        picked = top_k(scores, numbers, limit)
+        next_cursor = None
+        if len(picked) and len(picked) == limit:
+            next_cursor = format_cursor(scores[picked[-1]], numbers[picked[-1]])
+        return rows[picked], next_cursor
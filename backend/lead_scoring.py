@@ -0,0 +1,169 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from lead_ranking import top_k
+
+# Every component is scaled to 0..1 (1 = stronger reason to target); negative weights push a customer down
+DEFAULT_WEIGHTS = {
+    'churn': 0.35,                # Highest churn_score across the customer's interactions
+    'lifetime_value': 0.20,       # Percentile of total_lifetime_value
+    'tenure': 0.10,               # Percentile of tenure_months
+    'responsiveness': 0.15,       # Smoothed share of past campaign contacts they responded to
+    'unresolved': 0.10,           # Unresolved interactions, capped at UNRESOLVED_CAP
+    'outstanding_balance': -0.05, # Percentile of outstanding_balance among customers who owe anything
+    'active_campaign': -0.05      # Already contacted by a campaign that is still running
+}
+UNRESOLVED_CAP = 3
+SCORE_CACHE_SIZE = 8
+
+
+def parse_weights(spec, base=DEFAULT_WEIGHTS):
+    """'churn:0.5,tenure:0.2' -> base weights with those overridden; raises ValueError on unknown names"""
+    weights = dict(base)
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        name, _, value = part.partition(':')
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown weight '{name}' (expected one of {', '.join(DEFAULT_WEIGHTS)})")
+        weights[name] = float(value)
+    return weights
+
+
+def percentile(values):
+    """Percentile rank in 0..1, 0 for missing values"""
+    return pd.Series(values).rank(pct=True).fillna(0).values
+
+
+class LeadScorer:
+    """Per-customer targeting features across profiles, interactions, campaign history and campaign responses.
+
+    Features are arrays aligned with the customer profiles, built with one
+    vectorized pass per table; interaction features come from the shared
+    CustomerSummary. A targeting score is their weighted sum, so rescoring the
+    whole customer base is a handful of array operations. Score vectors are
+    cached per weight set until invalidate() is called for new interactions.
+    """
+
+    def __init__(self, customers_df, summary, mapping_df=None, campaigns_df=None):
+        self.profiles = customers_df.drop_duplicates('customer_id').reset_index(drop=True)
+        self.summary = summary
+        self.customer_ids = summary.customer_ids
+        n = len(self.profiles)
+
+        # Profiles: static for the life of the snapshot
+        balance = self.profiles['outstanding_balance'].astype(float).values
+        self.components = {
+            'lifetime_value': percentile(self.profiles['total_lifetime_value'].astype(float).values),
+            'tenure': percentile(self.profiles['tenure_months'].astype(float).values),
+            'outstanding_balance': np.where(balance > 0, percentile(np.where(balance > 0, balance, np.nan)), 0.0)
+        }
+
+        # Campaign responses, with the campaign history saying which campaigns are still running
+        self.contacted = np.zeros(n, dtype=np.int64)
+        self.responded = np.zeros(n, dtype=np.int64)
+        self.converted = np.zeros(n, dtype=np.int64)
+        self.in_active_campaign = np.zeros(n, dtype=bool)
+        if mapping_df is not None and len(mapping_df):
+            self._add_campaign_responses(mapping_df, campaigns_df)
+
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def _add_campaign_responses(self, mapping_df, campaigns_df):
+        n = len(self.customer_ids)
+        positions = self.customer_ids.get_indexer(mapping_df['customer_id'])
+        known = positions >= 0
+        positions = positions[known]
+        contacted = mapping_df['contacted'].values[known].astype(bool)
+        self.contacted = np.bincount(positions, weights=contacted, minlength=n).astype(np.int64)
+        self.responded = np.bincount(positions, weights=mapping_df['responded'].values[known].astype(bool), minlength=n).astype(np.int64)
+        self.converted = np.bincount(positions, weights=mapping_df['converted'].values[known].astype(bool), minlength=n).astype(np.int64)
+
+        if campaigns_df is not None:
+            active = campaigns_df.loc[campaigns_df['status'] == 'Active', 'campaign_id']
+            running = mapping_df['campaign_id'].isin(active).values[known] & contacted
+            self.in_active_campaign[positions[running]] = True
+
+    def invalidate(self):
+        """Drop cached score vectors after the summary has taken in new interactions"""
+        with self._lock:
+            self._scores = {}
+
+    def component_values(self):
+        """Every scoring component as a 0..1 array aligned with the profiles"""
+        with self.summary.lock:
+            churn = self.summary.max_churn.copy()
+            unresolved = self.summary.unresolved_count.copy()
+        return {
+            **self.components,
+            'churn': churn,
+            'responsiveness': (self.responded + 1) / (self.contacted + 2),
+            'unresolved': np.minimum(unresolved, UNRESOLVED_CAP) / UNRESOLVED_CAP,
+            'active_campaign': self.in_active_campaign.astype(float)
+        }
+
+    def scores(self, weights=DEFAULT_WEIGHTS):
+        """Targeting score per customer for a weight set, cached until the features change"""
+        key = tuple(sorted(weights.items()))
+        with self._lock:
+            cached = self._scores.get(key)
+            version = self.summary.version
+        if cached is not None:
+            return cached
+
+        components = self.component_values()
+        scores = np.zeros(len(self.customer_ids))
+        for name, weight in weights.items():
+            if weight:
+                scores += weight * components[name]
+
+        with self._lock:
+            if version != self.summary.version:
+                return scores  # New interactions arrived meanwhile; do not cache scores that may predate them
+            if len(self._scores) >= SCORE_CACHE_SIZE:
+                self._scores.pop(next(iter(self._scores)))
+            self._scores[key] = scores
+        return scores
+
+    def top(self, limit, weights=DEFAULT_WEIGHTS, category=None, geography=None, operator=None,
+            segment=None, min_score=None, with_interactions=True):
+        """The best-scoring customers matching the filters, as output records"""
+        scores = self.scores(weights)
+        summary = self.summary
+        mask = np.ones(len(scores), dtype=bool)
+        if with_interactions:
+            mask &= summary.interaction_count > 0
+        if category:
+            mask &= summary.primary_issue == category
+        if geography:
+            mask &= (self.profiles['geography'] == geography).values
+        if operator:
+            mask &= (self.profiles['operator'] == operator).values
+        if segment:
+            mask &= (self.profiles['customer_segment'] == segment).values
+        if min_score is not None:
+            mask &= scores >= min_score
+
+        candidates = np.flatnonzero(mask)
+        picked = candidates[top_k(scores[candidates], candidates, limit)]
+        profiles = self.profiles.iloc[picked]
+        return pd.DataFrame({
+            "customer_id": profiles['customer_id'].values,
+            "customer_name": profiles['customer_name'].values,
+            "geography": profiles['geography'].values,
+            "operator": profiles['operator'].values,
+            "customer_segment": profiles['customer_segment'].values,
+            "primary_issue": summary.primary_issue[picked],
+            "targeting_score": scores[picked].round(4),
+            "max_churn_score": summary.max_churn[picked].round(2),
+            "high_risk_interactions": summary.high_risk_count[picked],
+            "unresolved_interactions": summary.unresolved_count[picked],
+            "total_lifetime_value": profiles['total_lifetime_value'].astype(int).values,
+            "outstanding_balance": profiles['outstanding_balance'].astype(int).values,
+            "tenure_months": profiles['tenure_months'].astype(int).values,
+            "campaigns_contacted": self.contacted[picked],
+            "campaigns_responded": self.responded[picked],
+            "campaigns_converted": self.converted[picked],
+            "in_active_campaign": self.in_active_campaign[picked]
+        }).to_dict(orient='records')
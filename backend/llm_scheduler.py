@@ -0,0 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when an LLM call cannot be admitted; callers should answer 503"""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """Bounded-concurrency admission for LLM calls.
+
+    At most `max_concurrency` generations run at once and at most `max_queue`
+    callers wait for a slot. Anything beyond that - or anything that waits
+    longer than `queue_timeout` seconds - is rejected with SchedulerOverloaded
+    instead of tying up the server.
+    """
+
+    def __init__(self, max_concurrency=2, max_queue=16, queue_timeout=30):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """Wait for a generation slot, or raise SchedulerOverloaded; pair with release()"""
+        # Counted synchronously: the semaphore itself only updates once wait_for's task runs
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise SchedulerOverloaded(
+                f"LLM queue is full ({self.active} running, {self.waiting} waiting)"
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise SchedulerOverloaded(
+                f"Waited {self.queue_timeout}s for an LLM slot", retry_after=self.queue_timeout
+            )
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+
+    def release(self):
+        """Give back a slot taken with acquire()"""
+        self.active -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one generation slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
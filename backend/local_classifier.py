@@ -0,0 +1,148 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+except ImportError:  # The local tier is optional; without scikit-learn every text goes to the LLM
+    TfidfVectorizer = None
+    LogisticRegression = None
+
+TRAIN_ROWS = 50000  # Labelled interactions sampled for training, so startup stays quick on large datasets
+TRAIN_SEED = 42
+KEY_ISSUE_TERMS = 3
+
+# Follow-up per category, in the register of the LLM prompt's example
+RECOMMENDED_ACTIONS = {
+    'internet_connectivity': "dispatch a technician and check the line for outages",
+    'internet_speed': "run a line speed test and offer a plan or router upgrade",
+    'billing_overcharge': "review billing and refund incorrect charges",
+    'billing_downgrade': "offer a retention discount or a cheaper plan",
+    'tv_channels': "restore missing channels and review the channel pack",
+    'tv_technical': "troubleshoot the set-top box remotely or replace it",
+    'network_quality': "check tower coverage in the area and offer VoLTE/Wi-Fi calling",
+    'account_issues': "verify the account details and resolve the request",
+    'product_inquiry': "share plan options and route to sales",
+    'customer_retention': "escalate to the retention team with a loyalty offer"
+}
+
+
+def available():
+    return LogisticRegression is not None
+
+
+class LocalComplaintClassifier:
+    """TF-IDF + logistic regression heads for category, sentiment and churn risk, trained on labelled interactions.
+
+    `classify()` returns the same fields as the LLM sentiment prompt plus a
+    `confidence`: the lower of the category and sentiment probabilities.
+    Churn risk is left out of the confidence because the labels only fix it to
+    one of two levels per sentiment, so no model can be sure of it.
+    """
+
+    HEADS = ['category', 'sentiment', 'churn_risk']
+
+    def __init__(self, interactions_df, train_rows=TRAIN_ROWS):
+        if not available():
+            raise ImportError("scikit-learn is required for the local classifier")
+        start = time.time()
+        df = interactions_df
+        if len(df) > train_rows:
+            df = df.sample(train_rows, random_state=TRAIN_SEED)
+        texts = df['interaction_text'].astype(str).values
+
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True)
+        features = self.vectorizer.fit_transform(texts)
+        self.terms = self.vectorizer.get_feature_names_out()
+        self.models = {
+            head: LogisticRegression(max_iter=1000, C=10).fit(features, df[head].astype(str).values)
+            for head in self.HEADS
+        }
+
+        # Mean sentiment_score per sentiment label, blended by the predicted probabilities
+        means = df.groupby(df['sentiment'].astype(str))['sentiment_score'].mean()
+        self.sentiment_scores = means.reindex(self.models['sentiment'].classes_).fillna(0).values
+
+        # Serving path without sklearn's per-call overhead: the vectorizer's own analyzer and idf,
+        # then every head's coefficients stacked into one matrix. A binary head has a single
+        # coef_ row (the logit of classes_[1]), so it takes one column, not len(classes_)
+        self.analyzer = self.vectorizer.build_analyzer()
+        self.vocabulary = self.vectorizer.vocabulary_
+        self.idf = self.vectorizer.idf_
+        self.weights = np.ascontiguousarray(np.hstack([model.coef_.T for model in self.models.values()]))
+        self.intercepts = np.concatenate([model.intercept_ for model in self.models.values()])
+        bounds = np.cumsum([0] + [model.coef_.shape[0] for model in self.models.values()])
+        self.head_slices = {head: slice(bounds[i], bounds[i + 1]) for i, head in enumerate(self.models)}
+
+        self.train_rows = len(df)
+        self.train_seconds = round(time.time() - start, 2)
+
+    def _features(self, texts):
+        """Sublinear-tf, idf-weighted, l2-normalised rows - what vectorizer.transform() produces"""
+        indptr, indices, values = [0], [], []
+        for text in texts:
+            counts = Counter(self.vocabulary[term] for term in self.analyzer(text) if term in self.vocabulary)
+            row = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * self.idf[row]
+            norm = np.sqrt(weights @ weights)
+            indices.append(row)
+            values.append(weights / norm if norm else weights)
+            indptr.append(indptr[-1] + len(row))
+        return sparse.csr_matrix(
+            (np.concatenate(values), np.concatenate(indices), indptr),
+            shape=(len(texts), len(self.idf))
+        )
+
+    def classify_many(self, texts):
+        """Classify a list of complaint texts in one vectorized pass"""
+        features = self._features(texts)
+        logits = features @ self.weights + self.intercepts
+        probabilities = {}
+        for head, columns in self.head_slices.items():
+            head_logits = logits[:, columns]
+            if head_logits.shape[1] == 1:
+                positive = 1.0 / (1.0 + np.exp(-head_logits))
+                probabilities[head] = np.hstack([1.0 - positive, positive])
+                continue
+            exp = np.exp(head_logits - head_logits.max(axis=1, keepdims=True))
+            probabilities[head] = exp / exp.sum(axis=1, keepdims=True)
+        labels = {head: self.models[head].classes_[p.argmax(axis=1)] for head, p in probabilities.items()}
+        category_confidence = probabilities['category'].max(axis=1)
+        sentiment_confidence = probabilities['sentiment'].max(axis=1)
+        sentiment_scores = probabilities['sentiment'] @ self.sentiment_scores
+
+        category_model = self.models['category']
+        category_rows = np.searchsorted(category_model.classes_, labels['category'])
+        category_weights = category_model.coef_
+        if category_weights.shape[0] == 1:
+            category_weights = np.vstack([-category_weights[0], category_weights[0]])
+        results = []
+        for i in range(len(texts)):
+            category = labels['category'][i]
+            row = slice(features.indptr[i], features.indptr[i + 1])
+            results.append({
+                "sentiment": labels['sentiment'][i],
+                "sentiment_score": round(float(sentiment_scores[i]), 2),
+                "category": category,
+                "churn_risk": labels['churn_risk'][i],
+                "key_issues": self._key_terms(features.indices[row], features.data[row], category_weights[category_rows[i]]),
+                "recommended_action": RECOMMENDED_ACTIONS.get(category, "manual review recommended"),
+                "confidence": round(float(min(category_confidence[i], sentiment_confidence[i])), 3),
+                "source": "local"
+            })
+        return results
+
+    def classify(self, text):
+        return self.classify_many([text])[0]
+
+    def _key_terms(self, indices, values, weights):
+        """Terms in the text that pushed hardest towards the predicted category"""
+        contribution = values * weights[indices]
+        top = indices[np.argsort(-contribution)[:KEY_ISSUE_TERMS]]
+        return [str(self.terms[i]) for i in top]
+
+    def stats(self):
+        return {"train_rows": self.train_rows, "train_seconds": self.train_seconds}
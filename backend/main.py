@@ -1,14 +1,30 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import pandas as pd
+import asyncio
 import json
 import os
-from typing import Optional, List
+import threading
+import time
+from datetime import datetime
+from typing import Optional, List, Union
 from pathlib import Path
 
-# Import from local module
-from ollama_analyzer import OllamaAnalyzer
+# Import from local modules
+from ollama_analyzer import AsyncOllamaAnalyzer, ResponseCache, CircuitBreaker
+from llm_scheduler import LLMScheduler, SchedulerOverloaded
+from query_context import compile_context
+from ingest import InteractionBuffer, TIMESTAMP_FORMAT
+from snapshot import SnapshotManager
+from lead_ranking import parse_cursor
+from lead_scoring import parse_weights
+import local_classifier
+from topic_clusters import TOPIC_CLUSTERS
+from recommendations import RecommendationStore, RecommendationPrecompute, interaction_watermark, product_shortlist
+from catalog_matcher import catalog_recommendations
+from campaign_analytics import CUBE_DIMENSIONS
 
 app = FastAPI(title="Smart Campaign Targeting API")
 
@@ -25,32 +41,214 @@ app.add_middleware(
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR.parent / 'data'
 
-# Load data with error handling
-try:
-    interactions_df = pd.read_csv(DATA_DIR / 'customer_interactions.csv')
-    customers_df = pd.read_csv(DATA_DIR / 'customer_profiles.csv')
-    campaigns_df = pd.read_csv(DATA_DIR / 'campaign_history.csv')
-    products_df = pd.read_csv(DATA_DIR / 'product_catalog.csv')
-    print(f"✅ Loaded {len(interactions_df)} interactions")
-    print(f"✅ Loaded {len(customers_df)} customers")
-    print(f"✅ Loaded {len(campaigns_df)} campaigns")
-    print(f"✅ Loaded {len(products_df)} products")
-except FileNotFoundError as e:
-    print(f"❌ Error loading data files: {e}")
-    print(f"Expected data directory: {DATA_DIR}")
-    raise
-
-# Initialize LLM analyzer
-llm = OllamaAnalyzer()
+# Tables and derived indexes live in a snapshot that can be reloaded and swapped without a restart;
+# handlers read `snapshots.current` once per request
+snapshots = SnapshotManager(DATA_DIR)
+DATA_WATCH_SECONDS = float(os.getenv('DATA_WATCH_SECONDS', '5'))
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Initialize LLM analyzer with a response cache (set LLM_CACHE_DB to also persist it to SQLite)
+llm_cache = ResponseCache.create(
+    max_entries=int(os.getenv('LLM_CACHE_SIZE', '512')),
+    ttl=int(os.getenv('LLM_CACHE_TTL', '3600')),
+    db_path=os.getenv('LLM_CACHE_DB')
+)
+# After repeated Ollama failures the breaker opens and LLM endpoints answer with fallbacks immediately
+llm_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.getenv('LLM_BREAKER_RESET', '30'))
+)
+
+# Bound concurrent LLM generations; requests beyond the queue get a fast 503
+llm_scheduler = LLMScheduler(
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '2')),
+    max_queue=int(os.getenv('LLM_MAX_QUEUE', '16')),
+    queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', '30'))
+)
+
+# Local TF-IDF classifier trained on the labelled interactions answers /analyze-text when it is confident;
+# only uncertain texts go to Ollama (needs scikit-learn; LOCAL_CLASSIFIER=0 turns it off)
+complaint_classifier = None
+if os.getenv('LOCAL_CLASSIFIER', '1') != '0':
+    if local_classifier.available():
+        complaint_classifier = local_classifier.LocalComplaintClassifier(snapshots.current.interactions.frame())
+        print(f"✅ Trained local complaint classifier on {complaint_classifier.train_rows} interactions in {complaint_classifier.train_seconds}s")
+    else:
+        print("⚠️ scikit-learn not installed; every /analyze-text call goes to the LLM")
+
+# Identical concurrent prompts share one generation; only generations that reach Ollama take a scheduler slot
+llm = AsyncOllamaAnalyzer(
+    cache=llm_cache,
+    breaker=llm_breaker,
+    scheduler=llm_scheduler,
+    local_classifier=complaint_classifier,
+    local_threshold=float(os.getenv('LOCAL_CLASSIFIER_THRESHOLD', '0.8'))
+)
+
+def overloaded_error(e):
+    """503 with Retry-After for requests the LLM scheduler turned away"""
+    print(f"⚠️ Rejected LLM request: {e}")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm.aclose()
 
 # Request models
+class InteractionIn(BaseModel):
+    customer_id: str
+    interaction_text: str
+    category: str
+    sentiment: str = 'neutral'
+    sentiment_score: float = 0.0
+    churn_risk: str = 'low'
+    churn_score: float = 0.0
+    channel: str = 'Call'
+    resolution_status: str = 'pending'
+    resolution_time_hours: Optional[float] = None
+    agent_id: Optional[str] = None
+    agent_name: Optional[str] = None
+    escalation_count: int = 0
+    follow_up_required: bool = False
+    interaction_duration_min: int = 0
+    timestamp: Optional[datetime] = None
+
+MAX_CONTEXT_ROWS = 1000  # Retrieved rows compiled into a /query prompt's statistics
+
 class QueryRequest(BaseModel):
     question: str
-    max_context_rows: Optional[int] = 50
+    max_context_rows: int = Field(50, ge=1, le=MAX_CONTEXT_ROWS)
 
 class AnalyzeRequest(BaseModel):
     text: str
 
+class BatchAnalyzeRequest(BaseModel):
+    texts: List[str]
+    texts_per_prompt: Optional[int] = 10
+
+MAX_BATCH_TEXTS = 10000
+MAX_SCORED_LEADS = 1000
+# Default targeting weights, e.g. LEAD_SCORE_WEIGHTS="churn:0.5,lifetime_value:0.3"
+LEAD_SCORE_WEIGHTS = parse_weights(os.getenv('LEAD_SCORE_WEIGHTS'))
+MAX_TEXTS_PER_PROMPT = 25
+TOPIC_SAMPLE_SEED = 42
+
+# ============================================================
+# LIVE INGESTION
+# ============================================================
+
+# Posted interactions are buffered, folded into the live structures every INGEST_FLUSH_SECONDS,
+# and compacted to data/ingest/ every INGEST_COMPACT_SECONDS (or once INGEST_SHARD_ROWS are waiting)
+INGEST_FLUSH_SECONDS = float(os.getenv('INGEST_FLUSH_SECONDS', '1'))
+INGEST_COMPACT_SECONDS = float(os.getenv('INGEST_COMPACT_SECONDS', '30'))
+INGEST_SHARD_ROWS = int(os.getenv('INGEST_SHARD_ROWS', '100000'))
+MAX_INGEST_BATCH = 50000
+
+ingest_buffer = InteractionBuffer(InteractionIn.model_fields, next_id=len(snapshots.current.interactions))
+
+def publish_ingested():
+    """Fold buffered interactions into the current snapshot without recomputing it"""
+    with snapshots.lock:
+        snapshot = snapshots.current
+        rows = ingest_buffer.drain(snapshot.customer_index.profiles)
+        if rows is None:
+            return 0
+        snapshot.add_interactions(rows)
+        return len(rows)
+
+def compact_ingested():
+    """Write published rows that are not on disk yet to a data/ingest/ shard"""
+    with snapshots.lock:
+        path = ingest_buffer.compact(DATA_DIR, 'customer_interactions', snapshots.current.ingest_stamp)
+    if path:
+        print(f"💾 Compacted ingested interactions into {path.name}")
+
+def replay_ingested(snapshot):
+    """Before a reload's swap: move buffered ids past the new table and fold in the rows published while it was built"""
+    renumbered = ingest_buffer.restamp(len(snapshot.interactions))
+    if renumbered:
+        print(f"🔄 Renumbered {renumbered} ingested interactions past the reloaded table")
+    rows = ingest_buffer.unwritten_rows()
+    if rows is not None:
+        snapshot.add_interactions(rows)
+
+def retrain_classifier(snapshot):
+    """Train the local classifier on a reloaded snapshot and swap it in; the old model answers until then"""
+    try:
+        classifier = local_classifier.LocalComplaintClassifier(snapshot.interactions.frame())
+    except Exception as e:
+        print(f"❌ Retraining local complaint classifier failed: {str(e)}")
+        return
+    if snapshots.current is snapshot:  # A newer reload trains its own
+        llm.local_classifier = classifier
+        print(f"✅ Retrained local complaint classifier on {classifier.train_rows} interactions "
+              f"of snapshot v{snapshot.version} in {classifier.train_seconds}s")
+
+def prepare_snapshot(snapshot):
+    """After a reload: start fitting the new snapshot's topic clusters and retrain the classifier"""
+    snapshot.warm_topics()
+    if llm.local_classifier is not None:
+        # Not a daemon, for the same reason as warm_topics(): exiting mid-fit aborts inside scikit-learn
+        threading.Thread(target=retrain_classifier, args=(snapshot,), name=f'classifier-v{snapshot.version}').start()
+
+# A reload first writes published rows to disk so the new snapshot reads them back from data/ingest/;
+# rows published while it is built stay in the buffer (no compaction until the swap) and are replayed into it
+snapshots.before_reload = compact_ingested
+snapshots.before_swap = replay_ingested
+snapshots.after_reload = prepare_snapshot
+
+async def ingest_loop():
+    while True:
+        await asyncio.sleep(INGEST_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(publish_ingested)
+            if not snapshots.building and (ingest_buffer.unwritten >= INGEST_SHARD_ROWS
+                    or time.time() - ingest_buffer.last_compaction >= INGEST_COMPACT_SECONDS):
+                await asyncio.to_thread(compact_ingested)
+        except Exception as e:
+            print(f"❌ Error publishing ingested interactions: {str(e)}")
+
+# ============================================================
+# RECOMMENDATION PRECOMPUTE
+# ============================================================
+
+# Generated recommendations are stored per customer (SQLite) with the interaction watermark they were
+# generated for; a background pass keeps the top RECOMMENDATION_PRECOMPUTE_CUSTOMERS leads current
+RECOMMENDATION_STORE_DB = os.getenv('RECOMMENDATION_STORE_DB', str(DATA_DIR / 'recommendations.db'))
+RECOMMENDATION_PRECOMPUTE_CUSTOMERS = int(os.getenv('RECOMMENDATION_PRECOMPUTE_CUSTOMERS', '100'))
+RECOMMENDATION_PRECOMPUTE_SECONDS = float(os.getenv('RECOMMENDATION_PRECOMPUTE_SECONDS', '600'))
+# One LLM slot fewer than the scheduler allows, so interactive requests are never locked out
+RECOMMENDATION_WORKERS = int(os.getenv('RECOMMENDATION_WORKERS', str(max(1, llm_scheduler.max_concurrency - 1))))
+
+recommendation_store = RecommendationStore(RECOMMENDATION_STORE_DB)
+recommendation_job = RecommendationPrecompute(
+    snapshots,
+    llm,
+    recommendation_store,
+    customers=RECOMMENDATION_PRECOMPUTE_CUSTOMERS,
+    workers=RECOMMENDATION_WORKERS,
+    weights=LEAD_SCORE_WEIGHTS
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.ingest_task = asyncio.create_task(ingest_loop())
+    app.state.recommendation_task = None
+    if RECOMMENDATION_PRECOMPUTE_CUSTOMERS > 0:
+        app.state.recommendation_task = asyncio.create_task(recommendation_job.run_forever(RECOMMENDATION_PRECOMPUTE_SECONDS))
+    snapshots.current.warm_topics()
+    if DATA_WATCH_SECONDS > 0:
+        snapshots.watch(DATA_WATCH_SECONDS)
+
+@app.on_event("shutdown")
+async def flush_ingested():
+    snapshots.stop()
+    app.state.ingest_task.cancel()
+    if app.state.recommendation_task:
+        app.state.recommendation_task.cancel()
+    publish_ingested()
+    compact_ingested()
+
 # ============================================================
 # ENDPOINTS
 # ============================================================
@@ -63,28 +261,51 @@ def root():
         "status": "running",
         "endpoints": [
             "/stats",
+            "/interactions",
             "/top-issues",
             "/trends",
             "/campaigns",
+            "/campaigns/analytics",
+            "/campaigns/{campaign_id}/funnel",
             "/query",
+            "/query/stream",
             "/analyze-text",
+            "/analyze-text/batch",
             "/leads/{category}",
+            "/leads/scored",
             "/recommendations/{customer_id}",
-            "/topic-modeling"
+            "/topic-modeling",
+            "/admin/reload"
         ]
     }
 
+OLLAMA_STATUS = {
+    CircuitBreaker.CLOSED: "connected",
+    CircuitBreaker.HALF_OPEN: "recovering",
+    CircuitBreaker.OPEN: "unavailable"
+}
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
+    circuit = llm_breaker.stats()
+    snapshot = snapshots.current
     return {
-        "status": "healthy",
-        "ollama": "connected",
+        "status": "healthy" if circuit["state"] == CircuitBreaker.CLOSED else "degraded",
+        "ollama": OLLAMA_STATUS[circuit["state"]],
+        "ollama_circuit": circuit,
+        "llm_cache": llm_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_single_flight": llm.flight_stats(),
+        "local_classifier": llm.local_stats(),
+        "ingest": ingest_buffer.stats(),
+        "recommendation_precompute": recommendation_job.stats(),
+        "data_snapshot": snapshots.stats(),
         "data_loaded": {
-            "interactions": len(interactions_df),
-            "customers": len(customers_df),
-            "campaigns": len(campaigns_df),
-            "products": len(products_df)
+            "interactions": len(snapshot.interactions),
+            "customers": len(snapshot.customers_df),
+            "campaigns": len(snapshot.campaigns_df),
+            "products": len(snapshot.products_df)
         }
     }
 
@@ -92,50 +313,68 @@ def health_check():
 def get_stats():
     """Get overall statistics"""
     try:
+        aggregates = snapshots.current.aggregates
+        overall = aggregates.overall()
         stats = {
-            "total_interactions": int(len(interactions_df)),
-            "total_customers": int(interactions_df['customer_id'].nunique()),
-            "date_range": {
-                "start": str(interactions_df['date'].min()),
-                "end": str(interactions_df['date'].max())
-            },
-            "by_category": {k: int(v) for k, v in interactions_df['category'].value_counts().to_dict().items()},
-            "by_sentiment": {k: int(v) for k, v in interactions_df['sentiment'].value_counts().to_dict().items()},
-            "by_churn_risk": {k: int(v) for k, v in interactions_df['churn_risk'].value_counts().to_dict().items()},
-            "by_geography": {k: int(v) for k, v in interactions_df['geography'].value_counts().head(10).to_dict().items()},
-            "avg_resolution_time": float(interactions_df['resolution_time_hours'].mean()),
-            "unresolved_count": int(len(interactions_df[interactions_df['resolution_status'] == 'unresolved']))
+            "total_interactions": overall['total_interactions'],
+            "total_customers": overall['total_customers'],
+            "date_range": overall['date_range'],
+            "by_category": aggregates.counts('category'),
+            "by_sentiment": aggregates.counts('sentiment'),
+            "by_churn_risk": aggregates.counts('churn_risk'),
+            "by_geography": aggregates.counts('geography', limit=10),
+            "avg_resolution_time": overall['avg_resolution_time'],
+            "unresolved_count": overall['unresolved_count']
         }
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating stats: {str(e)}")
 
+@app.post("/interactions")
+def ingest_interactions(payload: Union[List[InteractionIn], InteractionIn]):
+    """Append one interaction or a list of them; they show up in /stats, /trends and /leads within a flush interval"""
+    items = payload if isinstance(payload, list) else [payload]
+    if len(items) > MAX_INGEST_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_INGEST_BATCH} interactions per request")
+
+    profiles = snapshots.current.customer_index.profiles
+    unknown = sorted({item.customer_id for item in items if item.customer_id not in profiles.index})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown customer_id: {', '.join(unknown[:10])}")
+
+    try:
+        now = datetime.now()
+        records = []
+        for item in items:
+            record = item.model_dump()
+            record['timestamp'] = (item.timestamp or now).strftime(TIMESTAMP_FORMAT)
+            records.append(record)
+        ids = ingest_buffer.append(records)
+        return {"accepted": len(ids), "interaction_ids": ids, "pending": ingest_buffer.pending}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ingesting interactions: {str(e)}")
+
 @app.get("/top-issues")
 def get_top_issues(limit: int = 10):
     """Get top issues with LLM-powered insights"""
     try:
-        # Get top categories
-        top_cats = interactions_df['category'].value_counts().head(limit)
-        
+        aggregates = snapshots.current.aggregates
         issues = []
-        for category, count in top_cats.items():
-            cat_data = interactions_df[interactions_df['category'] == category]
-            
-            # Sample texts for this category
-            sample_texts = cat_data['interaction_text'].head(5).tolist()
-            
+        for category, cell in aggregates.ranked('category', limit):
+            summary = aggregates.summarize(cell)
+
             issue = {
                 "category": category,
-                "count": int(count),
-                "percentage": round((count / len(interactions_df)) * 100, 2),
-                "avg_churn_score": round(float(cat_data['churn_score'].mean()), 2),
-                "high_churn_count": int(len(cat_data[cat_data['churn_risk'].isin(['high', 'critical'])])),
-                "unresolved_count": int(len(cat_data[cat_data['resolution_status'] == 'unresolved'])),
-                "sample_complaints": sample_texts[:3]
+                "count": summary['count'],
+                "percentage": summary['percentage'],
+                "avg_churn_score": summary['avg_churn_score'],
+                "high_churn_count": summary['high_risk_count'],
+                "unresolved_count": summary['unresolved_count'],
+                "sample_complaints": list(aggregates.samples.get(category, []))
             }
-            
+
             issues.append(issue)
-        
+
         return issues
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting top issues: {str(e)}")
@@ -144,26 +383,8 @@ def get_top_issues(limit: int = 10):
 def get_trends(category: Optional[str] = None, geography: Optional[str] = None):
     """Get week-over-week trends"""
     try:
-        df = interactions_df.copy()
-        
-        if category:
-            df = df[df['category'] == category]
-        if geography:
-            df = df[df['geography'] == geography]
-        
-        if len(df) == 0:
-            return []
-        
-        # Group by week
-        weekly = df.groupby(['week', 'category']).agg({
-            'interaction_id': 'count',
-            'churn_score': 'mean'
-        }).reset_index()
-        
-        weekly.columns = ['week', 'category', 'count', 'avg_churn_score']
-        weekly = weekly.sort_values('week')
-        
-        return json.loads(weekly.to_json(orient='records'))
+        # Sliced from the precomputed cube; rows are cached per filter until new interactions arrive
+        return snapshots.current.trend_cube.weekly(category, geography)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting trends: {str(e)}")
 
@@ -171,37 +392,69 @@ def get_trends(category: Optional[str] = None, geography: Optional[str] = None):
 def get_campaigns():
     """Get campaign performance"""
     try:
-        return json.loads(campaigns_df.to_json(orient='records'))
+        return json.loads(snapshots.current.campaigns_df.to_json(orient='records'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting campaigns: {str(e)}")
 
+CAMPAIGN_SORT_FIELDS = ['revenue', 'roi', 'converted', 'response_rate', 'conversion_rate', 'overall_conversion_rate']
+
+def require_campaign_analytics(snapshot):
+    if snapshot.campaign_analytics is None:
+        raise HTTPException(status_code=503, detail="campaign_customer_mapping is not loaded; run Data.py to generate it")
+    return snapshot.campaign_analytics
+
+@app.get("/campaigns/analytics")
+def get_campaign_analytics(group_by: str = ','.join(CUBE_DIMENSIONS), sort_by: str = 'revenue', limit: Optional[int] = None):
+    """Funnel totals, rates, revenue and ROI per campaign_type x channel_used x target_segment (or any subset)"""
+    dimensions = [d.strip() for d in group_by.split(',') if d.strip()]
+    unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+    if unknown or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(status_code=400, detail=f"group_by takes distinct values from: {', '.join(CUBE_DIMENSIONS)}")
+    if sort_by not in CAMPAIGN_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(CAMPAIGN_SORT_FIELDS)}")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+
+    analytics = require_campaign_analytics(snapshots.current)
+    try:
+        return {
+            "group_by": dimensions,
+            "totals": analytics.analytics(())[0],
+            "cells": analytics.analytics(dimensions, sort_by, limit)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting campaign analytics: {str(e)}")
+
+@app.get("/campaigns/{campaign_id}/funnel")
+def get_campaign_funnel(campaign_id: str):
+    """Contacted/responded/converted funnel, rates, revenue/ROI and time-to-response for one campaign"""
+    analytics = require_campaign_analytics(snapshots.current)
+    try:
+        funnel = analytics.funnel(campaign_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting campaign funnel: {str(e)}")
+    if funnel is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return funnel
+
+def build_query_context(question, max_context_rows):
+    """Select the interaction rows most relevant to the question and compile them into prompt statistics"""
+    snapshot = snapshots.current
+    rows = snapshot.interaction_index.search(question, max_context_rows)
+    context_sample = snapshot.interactions.rows(rows)
+    print(f"📊 Using {len(context_sample)} rows as context")
+    return compile_context(context_sample, len(snapshot.interactions))
+
 @app.post("/query")
-def natural_language_query(request: QueryRequest):
+async def natural_language_query(request: QueryRequest):
     """Answer natural language questions with LLM"""
     try:
         print(f"📝 Received query: {request.question}")
         
-        # Get relevant context (simple keyword matching for now)
-        query_lower = request.question.lower()
-        
-        # Filter data based on query keywords
-        if any(word in query_lower for word in ['internet', 'wifi', 'speed', 'connectivity']):
-            context_df = interactions_df[interactions_df['category'].str.contains('internet', case=False, na=False)]
-        elif any(word in query_lower for word in ['billing', 'bill', 'charge', 'price']):
-            context_df = interactions_df[interactions_df['category'].str.contains('billing', case=False, na=False)]
-        elif any(word in query_lower for word in ['churn', 'leaving', 'switch']):
-            context_df = interactions_df[interactions_df['churn_risk'].isin(['high', 'critical'])]
-        else:
-            context_df = interactions_df
-        
-        # Sample for context
-        context_sample = context_df.head(request.max_context_rows)
-        context_json = context_sample.to_json(orient='records')
-        
-        print(f"📊 Using {len(context_sample)} rows as context")
+        query_context = await asyncio.to_thread(build_query_context, request.question, request.max_context_rows)
         
         # Query LLM
-        result = llm.analyze_query(request.question, context_json)
+        result = await llm.analyze_query(request.question, query_context)
         
         if not result:
             print("⚠️ LLM returned no result")
@@ -215,16 +468,74 @@ def natural_language_query(request: QueryRequest):
         print("✅ Query processed successfully")
         return result
         
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         print(f"❌ Error in query endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives back the LLM slot claimed for it however the response ends.
+
+    The body generator's own `finally` never runs if the client is gone before
+    the first chunk is pulled, and Starlette skips background tasks when
+    sending fails, so the release also sits in a `finally` around the response.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.release()
+
+@app.post("/query/stream")
+async def natural_language_query_stream(request: QueryRequest):
+    """Answer natural language questions as Server-Sent Events, one event per generated token"""
+    print(f"📝 Received streaming query: {request.question}")
+    query_context = await asyncio.to_thread(build_query_context, request.question, request.max_context_rows)
+
+    # Claim an LLM slot up front so overload is a 503, not a broken stream
+    try:
+        await llm_scheduler.acquire()
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
+
+    released = False
+
+    async def release_slot():
+        """Give the slot back exactly once, from whichever of the stream or the response finishes first"""
+        nonlocal released
+        if not released:
+            released = True
+            llm_scheduler.release()
+
+    async def events():
+        try:
+            async for token in llm.stream_query(request.question, query_context):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            done = {"data_citations": ["Analysis based on customer interaction and profile data"]}
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+            print("✅ Streaming query completed")
+        finally:
+            await release_slot()
+
+    return SlotStreamingResponse(
+        events(),
+        release_slot,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/analyze-text")
-def analyze_text(request: AnalyzeRequest):
+async def analyze_text(request: AnalyzeRequest):
     """Analyze a single complaint text"""
     try:
         print(f"📝 Analyzing text: {request.text[:100]}...")
-        result = llm.analyze_sentiment(request.text)
+        result = await llm.analyze_sentiment(request.text)
         
         if not result:
             print("⚠️ Failed to analyze text")
@@ -233,107 +544,244 @@ def analyze_text(request: AnalyzeRequest):
         print("✅ Text analyzed successfully")
         return result
         
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         print(f"❌ Error analyzing text: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze-text/batch")
+async def analyze_text_batch(request: BatchAnalyzeRequest):
+    """Score many complaint texts, several per prompt, streaming NDJSON results as batches finish"""
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per request")
+
+    per_prompt = max(1, min(request.texts_per_prompt or 10, MAX_TEXTS_PER_PROMPT))
+    chunks = [
+        (start, request.texts[start:start + per_prompt])
+        for start in range(0, len(request.texts), per_prompt)
+    ]
+    print(f"📝 Batch analyzing {len(request.texts)} texts in {len(chunks)} prompts")
+
+    async def score_chunk(start, texts):
+        """Score one prompt's worth of texts, waiting out scheduler overload a few times"""
+        for attempt in range(3):
+            try:
+                return await llm.analyze_sentiment_batch(texts, start)
+            except SchedulerOverloaded as e:
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                print(f"❌ Error in batch starting at {start}: {str(e)}")
+                break
+        return [{"index": start + i, "error": "Failed to analyze text"} for i in range(len(texts))]
+
+    async def worker(pending, finished):
+        """Pull prompts off the shared list until it is empty"""
+        while pending:
+            start, texts = pending.pop(0)
+            await finished.put(await score_chunk(start, texts))
+
+    async def stream_results():
+        pending = list(chunks)
+        finished = asyncio.Queue()
+        # One worker per scheduler slot so a large batch never floods the admission queue
+        workers = [
+            asyncio.create_task(worker(pending, finished))
+            for _ in range(min(llm_scheduler.max_concurrency, len(chunks)))
+        ]
+        try:
+            for _ in range(len(chunks)):
+                for result in await finished.get():
+                    yield json.dumps(result) + "\n"
+            print(f"✅ Batch of {len(request.texts)} texts analyzed")
+        finally:
+            for task in workers:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/leads/scored")
+def get_scored_leads(limit: int = 50, category: Optional[str] = None, geography: Optional[str] = None,
+                     operator: Optional[str] = None, segment: Optional[str] = None,
+                     min_score: Optional[float] = None, weights: Optional[str] = None):
+    """Rank customers by a weighted targeting score over churn, value, tenure, balance and campaign response.
+
+    `category` matches the customer's primary issue (their highest-churn interaction).
+    `weights` overrides individual defaults, e.g. `churn:0.5,responsiveness:0.3`.
+    """
+    try:
+        score_weights = parse_weights(weights, LEAD_SCORE_WEIGHTS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        leads = snapshots.current.lead_scorer.top(
+            min(limit, MAX_SCORED_LEADS), score_weights, category=category, geography=geography,
+            operator=operator, segment=segment, min_score=min_score
+        )
+        return {"weights": score_weights, "leads": leads}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring leads: {str(e)}")
+
 @app.get("/leads/{category}")
-def get_leads(category: str, limit: int = 50):
-    """Extract high-value leads for targeting"""
+def get_leads(category: str, response: Response, limit: int = 50, after: Optional[str] = None,
+              geography: Optional[str] = None, churn_risk: Optional[str] = None):
+    """Extract high-value leads for targeting, one per customer, highest churn score first.
+
+    Pass the X-Next-Cursor response header back as `after` for the next page.
+    `churn_risk` (comma-separated) replaces the default high/critical filter.
+    """
     try:
-        # Filter by category and high churn risk
-        leads_df = interactions_df[
-            (interactions_df['category'] == category) &
-            (interactions_df['churn_risk'].isin(['high', 'critical']))
-        ].sort_values('churn_score', ascending=False).head(limit)
-        
+        cursor = parse_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        snapshot = snapshots.current
+        ranking = snapshot.lead_ranking
+
+        # High/critical leads come presorted; other risk levels are ranked on the fly with a partial sort
+        if churn_risk:
+            rows, next_cursor = ranking.filtered(category, churn_risk.split(','), limit, cursor, geography)
+        else:
+            rows, next_cursor = ranking.page(category, limit, cursor, geography)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+        leads_df = ranking.interactions.rows(rows)
         if len(leads_df) == 0:
             return []
-        
-        leads = []
-        for _, row in leads_df.iterrows():
-            # Get customer details
-            customer_match = customers_df[customers_df['customer_id'] == row['customer_id']]
-            if len(customer_match) == 0:
-                continue
-                
-            customer = customer_match.iloc[0]
-            
-            lead = {
-                "customer_id": row['customer_id'],
-                "customer_name": customer['customer_name'],
-                "geography": row['geography'],
-                "issue_summary": row['interaction_text'][:150] + "..." if len(row['interaction_text']) > 150 else row['interaction_text'],
-                "sentiment": row['sentiment'],
-                "churn_risk": row['churn_risk'],
-                "churn_score": round(float(row['churn_score']), 2),
-                "tenure_months": int(row['customer_tenure_months']),
-                "current_plan_value": int(row['current_plan_value']),
-                "operator": row['operator']
-            }
-            
-            leads.append(lead)
-        
+
+        # Attach customer names in one join instead of a table scan per lead
+        leads_df = snapshot.customer_index.attach_profiles(leads_df, ['customer_name'])
+        if len(leads_df) == 0:
+            return []
+
+        texts = leads_df['interaction_text']
+        customer_totals = snapshot.customer_summary.columns(
+            snapshot.customer_summary.customer_ids.get_indexer(leads_df['customer_id'])
+        )
+        issue_summary = texts.where(texts.str.len() <= 150, texts.str.slice(0, 150) + "...")
+
+        leads = pd.DataFrame({
+            "customer_id": leads_df['customer_id'],
+            "customer_name": leads_df['customer_name'],
+            "geography": leads_df['geography'],
+            "issue_summary": issue_summary,
+            "sentiment": leads_df['sentiment'],
+            "churn_risk": leads_df['churn_risk'],
+            "churn_score": leads_df['churn_score'].astype(float).round(2),
+            "tenure_months": leads_df['customer_tenure_months'].astype(int),
+            "current_plan_value": leads_df['current_plan_value'].astype(int),
+            "operator": leads_df['operator'],
+            **customer_totals
+        }).to_dict(orient='records')
+
         return leads
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting leads: {str(e)}")
 
+def recommendation_response(customer_id, customer, recommendations, source, generated_at, stale=False):
+    return {
+        "customer_id": customer_id,
+        "customer_name": customer['customer_name'],
+        "current_plan": customer.get('current_plan', 'N/A'),
+        "recommendations": recommendations,
+        "source": source,
+        "generated_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(generated_at)) if generated_at else None,
+        "stale": stale
+    }
+
 @app.get("/recommendations/{customer_id}")
-def get_recommendations(customer_id: str):
-    """Get personalized recommendations for a customer"""
+async def get_recommendations(customer_id: str, refresh: bool = False, fast: bool = False):
+    """Get personalized recommendations for a customer (stored ones unless the customer has new interactions)"""
+    stored = None
     try:
         print(f"🔍 Getting recommendations for customer: {customer_id}")
         
+        snapshot = snapshots.current
+
         # Get customer data
-        customer = customers_df[customers_df['customer_id'] == customer_id]
-        if len(customer) == 0:
+        customer = snapshot.customer_index.profile(customer_id)
+        if customer is None:
             raise HTTPException(status_code=404, detail="Customer not found")
-        
-        customer = customer.iloc[0].to_dict()
-        
-        # Get interaction history
-        history = interactions_df[interactions_df['customer_id'] == customer_id]
-        if len(history) == 0:
-            history_text = "No previous interactions"
-        else:
-            history_text = "\n".join(history['interaction_text'].tail(5).tolist())
-        
-        print(f"📊 Found {len(history)} interactions for customer")
-        
-        # Get LLM recommendations
-        recommendations = llm.generate_recommendations(customer, history_text)
-        
-        if not recommendations:
-            print("⚠️ Could not generate recommendations")
-            return {"error": "Could not generate recommendations"}
+
+        # Fast mode: the catalog shortlist itself, no LLM and no store
+        if fast:
+            recommendations = catalog_recommendations(product_shortlist(snapshot, customer_id, customer), customer)
+            return recommendation_response(customer_id, customer, recommendations or llm.fallback_recommendations(customer),
+                                           "catalog", time.time())
+
+        # Stored recommendations stay valid until the customer's interaction watermark moves
+        stored = await asyncio.to_thread(recommendation_store.get, customer_id)
+        if stored is not None and not refresh and stored['watermark'] == interaction_watermark(snapshot, customer_id):
+            print("✅ Served stored recommendations")
+            return recommendation_response(customer_id, customer, stored['recommendations'], "store", stored['generated_at'])
+
+        summary = snapshot.customer_summary
+        print(f"📊 Found {summary.interaction_count[summary.position(customer_id)]} interactions for customer")
+        
+        # Get LLM recommendations (stored for the next request)
+        recommendations = await recommendation_job.generate(snapshot, customer_id)
+        
+        if recommendations is None:
+            if stored is not None:
+                print("⚠️ Could not generate recommendations; serving the stored ones")
+                return recommendation_response(customer_id, customer, stored['recommendations'], "store", stored['generated_at'], stale=True)
+            print("⚠️ Could not generate recommendations; using the catalog shortlist")
+            recommendations = catalog_recommendations(product_shortlist(snapshot, customer_id, customer), customer)
+            if recommendations is not None:
+                return recommendation_response(customer_id, customer, recommendations, "catalog", time.time())
+            return recommendation_response(customer_id, customer, llm.fallback_recommendations(customer), "fallback", None)
         
         print("✅ Recommendations generated successfully")
-        return {
-            "customer_id": customer_id,
-            "customer_name": customer['customer_name'],
-            "current_plan": customer.get('current_plan', 'N/A'),
-            "recommendations": recommendations
-        }
+        return recommendation_response(customer_id, customer, recommendations, "live", time.time())
         
     except HTTPException:
         raise
+    except SchedulerOverloaded as e:
+        if stored is not None:
+            return recommendation_response(customer_id, customer, stored['recommendations'], "store", stored['generated_at'], stale=True)
+        raise overloaded_error(e)
     except Exception as e:
         print(f"❌ Error getting recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/topic-modeling")
-def topic_modeling(sample_size: int = 50):
-    """Perform LLM-based topic modeling (optimized)"""
+async def topic_modeling(top_n: int = 7, name_with_llm: bool = False, sample_size: int = 50):
+    """Complaint topics clustered over every interaction; the LLM only names the clusters when asked"""
     try:
+        snapshot = snapshots.current
+        top_n = max(1, min(top_n, TOPIC_CLUSTERS))
+
+        # Fitted once per snapshot (normally already warmed in the background)
+        clusters = await asyncio.to_thread(snapshot.topic_clusters)
+        if clusters is not None:
+            topics = await asyncio.to_thread(clusters.topics, snapshot.interactions, top_n)
+            named_by = "terms"
+            if name_with_llm:
+                topics, named = await llm.name_topics(topics)
+                named_by = "llm" if named else named_by
+            print(f"✅ Served {len(topics)} topic clusters over {clusters.rows_seen} interactions")
+            return {
+                "topics": topics,
+                "total_interactions": clusters.rows_seen,
+                "clusters": len(clusters.sizes),
+                "named_by": named_by
+            }
+
+        # Without scikit-learn: LLM-based topic modeling on a small sample
+        interactions_df = snapshot.interactions.frame()
+
         # Limit sample size for performance (max 50)
         actual_sample_size = min(sample_size, 50, len(interactions_df))
         print(f"🔍 Extracting topics from {actual_sample_size} samples")
         
-        # Sample interactions
-        sample = interactions_df['interaction_text'].sample(actual_sample_size).tolist()
+        # Sample interactions (fixed seed: identical requests share one prompt, so they coalesce and cache)
+        sample = interactions_df['interaction_text'].sample(actual_sample_size, random_state=TOPIC_SAMPLE_SEED).tolist()
         
         # Extract topics using LLM
-        topics = llm.extract_topics(sample, top_n=7)
+        topics = await llm.extract_topics(sample, top_n=7)
         
         if not topics:
             print("⚠️ Could not extract topics")
@@ -345,6 +793,8 @@ def topic_modeling(sample_size: int = 50):
         print(f"✅ Extracted {len(topics)} topics")
         return {"topics": topics, "sample_size": actual_sample_size}
         
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         print(f"❌ Error in topic modeling: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -353,26 +803,36 @@ def topic_modeling(sample_size: int = 50):
 def get_categories_summary():
     """Get quick category statistics without LLM (fast alternative)"""
     try:
-        categories = interactions_df['category'].value_counts().head(10)
-        
+        aggregates = snapshots.current.aggregates
         summary = []
-        for category, count in categories.items():
-            cat_data = interactions_df[interactions_df['category'] == category]
-            
+        for category, cell in aggregates.ranked('category', 10):
+            metrics = aggregates.summarize(cell)
+
             summary.append({
                 "category": category,
-                "count": int(count),
-                "percentage": round((count / len(interactions_df)) * 100, 2),
-                "avg_churn_score": round(float(cat_data['churn_score'].mean()), 2),
-                "high_risk_count": int(len(cat_data[cat_data['churn_risk'].isin(['high', 'critical'])])),
-                "avg_resolution_time": round(float(cat_data['resolution_time_hours'].mean()), 2)
+                "count": metrics['count'],
+                "percentage": metrics['percentage'],
+                "avg_churn_score": metrics['avg_churn_score'],
+                "high_risk_count": metrics['high_risk_count'],
+                "avg_resolution_time": metrics['avg_resolution_time']
             })
-        
+
         return {"categories": summary}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting category summary: {str(e)}")
 
+@app.post("/admin/reload")
+def reload_data(x_admin_token: Optional[str] = Header(default=None)):
+    """Rebuild the data snapshot from data/ in this worker thread and swap it in; requests in flight keep the old one"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        snapshots.reload()
+        return snapshots.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading data: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     print("=" * 60)
@@ -1,61 +1,323 @@
 import requests
+import httpx
+import asyncio
 import json
 import re
-import random
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-class OllamaAnalyzer:
-    """Wrapper for Ollama LLM analysis with conversational responses"""
+# Transient failures worth retrying with exponential backoff (0.5s, 1s, ...)
+RETRY_STATUSES = (502, 503, 504)
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.5
+MIN_ANSWER_CHARS = 50  # Shorter /query answers are replaced by the fallback answer (and never cached)
 
-    def __init__(self, model="llama3.2:1b", base_url="http://localhost:11434"):
-        self.model = model
-        self.base_url = base_url
+# ==========================================================
+# 🔹 Response Cache Tiers
+# ==========================================================
+class MemoryCacheTier:
+    """In-memory LRU tier holding (value, expires_at) pairs"""
 
-    # ==========================================================
-    # 🔹 Internal Helper Function: Query Ollama API
-    # ==========================================================
-    def _query(self, prompt, timeout=120):
-        """Send prompt to Ollama API and handle errors safely"""
-        try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,  # Higher for more natural responses
-                        "top_p": 0.9,
-                        "num_predict": 3000  # Allow longer responses
-                    }
-                },
-                timeout=timeout
-            )
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-            if response.status_code != 200:
-                print(f"❌ Ollama HTTP error {response.status_code}: {response.text}")
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
                 return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
 
-            data = response.json()
-            
-            if "response" in data:
-                return data["response"]
-            elif "error" in data:
-                print(f"❌ Ollama error: {data['error']}")
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """On-disk tier so cached responses survive restarts"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
                 return None
-            else:
-                print(f"⚠️ Unexpected response format. Keys: {list(data.keys())}")
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
                 return None
+            return row
 
-        except requests.exceptions.ConnectionError:
-            print(f"❌ Cannot connect to Ollama at {self.base_url}")
-            return None
-        except requests.exceptions.Timeout:
-            print(f"❌ Ollama request timed out after {timeout} seconds")
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Tiered cache for raw LLM responses keyed by model + options + normalized prompt.
+
+    Tiers are checked in order (fastest first); a hit in a slower tier is
+    copied into the faster ones. Any object with get/set/__len__ can be a tier.
+    """
+
+    def __init__(self, tiers=None, ttl=3600):
+        self.tiers = tiers if tiers is not None else [MemoryCacheTier()]
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Counters are bumped from request threads and the event loop alike
+
+    @classmethod
+    def create(cls, max_entries=512, ttl=3600, db_path=None):
+        """Memory LRU tier, plus a SQLite tier when db_path is given"""
+        tiers = [MemoryCacheTier(max_entries)]
+        if db_path:
+            tiers.append(SQLiteCacheTier(db_path))
+        return cls(tiers, ttl)
+
+    @staticmethod
+    def make_key(model, options, prompt):
+        """Hash model, generation options and whitespace-normalized prompt"""
+        normalized = " ".join(prompt.split())
+        payload = json.dumps({"model": model, "options": options, "prompt": normalized}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        for depth, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for faster in self.tiers[:depth]:
+                    faster.set(key, *entry)
+                with self._lock:
+                    self.hits += 1
+                return entry[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        for tier in self.tiers:
+            tier.set(key, value, expires_at)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+            "entries": {type(tier).__name__: len(tier) for tier in self.tiers}
+        }
+
+
+# ==========================================================
+# 🔹 Circuit Breaker
+# ==========================================================
+class CircuitBreaker:
+    """Stop calling Ollama after repeated failures so requests get fallbacks at once.
+
+    closed    - calls go through; `failure_threshold` consecutive failures open it
+    open      - calls are refused until `reset_timeout` seconds have passed
+    half_open - one trial call is let through; success closes, failure re-opens
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go to Ollama now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # open, or half_open with a trial that never reported back: allow one trial per reset_timeout
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⚡ Ollama circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        retry_in = 0.0
+        if self.state != self.CLOSED:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_seconds": round(retry_in, 1),
+            "rejected": self.rejected
+        }
+
+
+class BaseOllamaAnalyzer:
+    """Prompts, response parsing, caching and the circuit breaker shared by the sync and async analyzers"""
+
+    def __init__(self, model="llama3.2:1b", base_url="http://localhost:11434", cache=None, breaker=None,
+                 local_classifier=None, local_threshold=0.8):
+        self.model = model
+        self.base_url = base_url
+        self.options = {
+            "temperature": 0.7,  # Higher for more natural responses
+            "top_p": 0.9,
+            "num_predict": 3000  # Allow longer responses
+        }
+        self.cache = cache
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._inflight = {}  # flight key -> pending generation shared by identical concurrent calls
+        self.coalesced = 0
+        # Optional local_classifier.LocalComplaintClassifier: confident answers never reach Ollama
+        self.local_classifier = local_classifier
+        self.local_threshold = local_threshold
+        self.local_answered = 0
+        self.local_escalated = 0
+
+    # ==========================================================
+    # 🔹 Internal Helpers: Request Payload, Response Body, Cache
+    # ==========================================================
+    def _payload(self, prompt, stream=False):
+        """Build the /api/generate request body"""
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self.options
+        }
+
+    def _read_generation(self, data):
+        """Pull the generated text out of an Ollama response body"""
+        if "response" in data:
+            return data["response"]
+        elif "error" in data:
+            print(f"❌ Ollama error: {data['error']}")
             return None
-        except Exception as e:
-            print(f"❌ Error querying Ollama: {type(e).__name__}: {str(e)}")
+        else:
+            print(f"⚠️ Unexpected response format. Keys: {list(data.keys())}")
             return None
 
+    def _read_stream_chunk(self, line):
+        """Decode one NDJSON line of a streamed generation into (token, done)"""
+        data = json.loads(line)
+        if "error" in data:
+            raise RuntimeError(data["error"])
+        return data.get("response", ""), data.get("done", False)
+
+    def _cache_lookup(self, prompt):
+        """Return (cache_key, cached_response); both None when caching is off"""
+        if self.cache is None:
+            return None, None
+        cache_key = ResponseCache.make_key(self.model, self.options, prompt)
+        return cache_key, self.cache.get(cache_key)
+
+    def _cache_store(self, cache_key, result, usable=None):
+        """Remember a generation the caller can use; one its parser would reject is not served again for the TTL"""
+        if result is None or cache_key is None:
+            return
+        if usable is not None and not usable(result):
+            print("⚠️ Not caching an LLM response that could not be parsed")
+            return
+        self.cache.set(cache_key, result)
+
+    def _flight_key(self, cache_key, prompt):
+        """Key identical generations share while in flight (the cache key when caching is on)"""
+        return cache_key if cache_key is not None else ResponseCache.make_key(self.model, self.options, prompt)
+
+    def flight_stats(self):
+        return {"in_flight": len(self._inflight), "coalesced": self.coalesced}
+
+    def _classify_locally(self, texts, start_index=0):
+        """Confident local results by index, plus (index, text, local result) for the texts left to the LLM"""
+        indices = range(start_index, start_index + len(texts))
+        if self.local_classifier is None:
+            return {}, [(index, text, None) for index, text in zip(indices, texts)]
+
+        answered, escalated = {}, []
+        for index, text, result in zip(indices, texts, self.local_classifier.classify_many(texts)):
+            if result["confidence"] >= self.local_threshold:
+                answered[index] = result
+            else:
+                escalated.append((index, text, result))
+        self.local_answered += len(answered)
+        self.local_escalated += len(escalated)
+        return answered, escalated
+
+    def local_stats(self):
+        return {
+            "enabled": self.local_classifier is not None,
+            "threshold": self.local_threshold,
+            "answered_locally": self.local_answered,
+            "escalated_to_llm": self.local_escalated
+        }
+
+    def _circuit_open(self):
+        """True (and logged) when the breaker refuses calls, so callers serve their fallback"""
+        if self.breaker.allow():
+            return False
+        print("⚡ Ollama circuit open - serving fallback response")
+        return True
+
     # ==========================================================
     # 🔹 Extract JSON from Text
     # ==========================================================
@@ -102,11 +364,27 @@ class OllamaAnalyzer:
             print(f"⚠️ JSON extraction error: {e}")
             return None
 
+    # ==========================================================
+    # 🔹 Parse Checks (only responses passing these are cached)
+    # ==========================================================
+    def _is_json_object(self, response):
+        return isinstance(self._extract_json(response), dict)
+
+    def _is_json_array(self, response):
+        result = self._extract_json(response)
+        return isinstance(result, list) and len(result) > 0
+
+    def _is_answer(self, response):
+        return len(response.strip()) >= MIN_ANSWER_CHARS
+
+    def _is_summary(self, response):
+        return bool(response.strip())
+
     # ==========================================================
     # 🔹 1. Sentiment Analysis (JSON for structured data)
     # ==========================================================
-    def analyze_sentiment(self, text):
-        """Analyze sentiment - returns structured JSON"""
+    def _sentiment_prompt(self, text):
+        """Build the sentiment analysis prompt"""
         if len(text) > 500:
             text = text[:500] + "..."
             
@@ -129,11 +407,15 @@ Valid category: internet_connectivity, internet_speed, billing_overcharge, billi
 Valid churn_risk: low, medium, high, critical
 
 Return ONLY the JSON object."""
+        return prompt
 
-        response = self._query(prompt, timeout=30)
+    def _parse_sentiment(self, response, fallback=None):
+        """Parse sentiment JSON, falling back to the local classifier's guess or a manual-review result"""
         result = self._extract_json(response) if response else None
         
         if not result:
+            if fallback is not None:
+                return fallback
             return {
                 "sentiment": "negative",
                 "sentiment_score": 0.5,
@@ -145,17 +427,67 @@ Return ONLY the JSON object."""
         
         return result
 
+    def _sentiment_batch_prompt(self, texts, start_index=0, indices=None):
+        """Build one prompt that scores several complaints, each tagged with its batch index"""
+        indices = list(indices if indices is not None else range(start_index, start_index + len(texts)))
+        complaints_text = "\n".join([
+            f'[{index}] "{text[:300]}"'
+            for index, text in zip(indices, texts)
+        ])
+
+        prompt = f"""You are a JSON-only API. Analyze each of these telecom complaints. Each complaint is indexed with [n].
+
+Complaints:
+{complaints_text}
+
+Return ONLY a JSON array with exactly one object per complaint, using its index:
+[
+  {{"index": {indices[0] if indices else start_index}, "sentiment": "negative", "sentiment_score": 0.3, "category": "billing_overcharge", "churn_risk": "high", "key_issues": ["high bill", "incorrect charges"], "recommended_action": "review billing and offer discount"}}
+]
+
+Valid sentiment: positive, neutral, negative, very_negative
+Valid category: internet_connectivity, internet_speed, billing_overcharge, billing_downgrade, tv_channels, tv_technical, network_quality, account_issues, product_inquiry
+Valid churn_risk: low, medium, high, critical
+
+Return ONLY the JSON array."""
+        return prompt
+
+    def _parse_sentiment_batch(self, response, count, start_index=0, indices=None, fallbacks=None):
+        """Match indexed results back to their complaints; missing ones get the single-text fallback"""
+        indices = indices if indices is not None else range(start_index, start_index + count)
+        fallbacks = fallbacks or {}
+        result = self._extract_json(response) if response else None
+        by_index = {}
+        if isinstance(result, list):
+            for item in result:
+                try:
+                    by_index[int(item["index"])] = item
+                except (TypeError, KeyError, ValueError):
+                    continue
+
+        results = []
+        for index in indices:
+            item = by_index.get(index) or self._parse_sentiment(None, fallbacks.get(index))
+            results.append({**item, "index": index})
+        return results
+
+    def _merge_sentiment_batch(self, answered, escalated, response):
+        """Local answers plus parsed LLM answers for the escalated texts, in index order"""
+        indices = [index for index, _, _ in escalated]
+        fallbacks = {index: local for index, _, local in escalated}
+        for item in self._parse_sentiment_batch(response, len(indices), indices=indices, fallbacks=fallbacks):
+            answered[item["index"]] = item
+        return [{**answered[index], "index": index} for index in sorted(answered)]
+
     # ==========================================================
     # 🔹 2. Topic Extraction (JSON for structured display)
     # ==========================================================
-    def extract_topics(self, texts, top_n=7):
-        """Extract topics - returns structured JSON array"""
-        max_samples = min(20, len(texts))
-        sample_texts = random.sample(texts, max_samples) if len(texts) > max_samples else texts
-        
+    def _topics_prompt(self, texts, top_n):
+        """Build the topic extraction prompt from a small sample of texts"""
+        # Callers pass an already-sampled list; taking its head keeps the prompt (and cache key) deterministic
         complaints_text = "\n".join([
             f"{i+1}. {text[:80]}" 
-            for i, text in enumerate(sample_texts[:10])
+            for i, text in enumerate(texts[:10])
         ])
 
         prompt = f"""You are a JSON-only API. Analyze these telecom complaints and identify top {top_n} topics.
@@ -171,8 +503,10 @@ Return ONLY this JSON array:
 
 Valid severity: low, medium, high, critical
 Return ONLY the JSON array."""
+        return prompt
 
-        response = self._query(prompt, timeout=60)
+    def _parse_topics(self, response, top_n):
+        """Parse the topic array, falling back to generic telecom topics"""
         result = self._extract_json(response)
         
         if result and isinstance(result, list) and len(result) > 0:
@@ -186,11 +520,44 @@ Return ONLY the JSON array."""
             {"topic": "Network Quality", "description": "Poor signal strength and coverage gaps", "percentage": 10, "severity": "medium"}
         ][:top_n]
 
+    def _topic_names_prompt(self, topics):
+        """Ask for a short name and description per cluster, from its top terms and exemplar complaints"""
+        clusters = "\n\n".join(
+            f"Cluster {i+1} (terms: {', '.join(topic['top_terms'])}):\n" +
+            "\n".join(f"- {text[:100]}" for text in topic['exemplars'])
+            for i, topic in enumerate(topics)
+        )
+
+        prompt = f"""You are a JSON-only API. Name each cluster of telecom complaints below.
+
+{clusters}
+
+Return ONLY this JSON array, one object per cluster in the same order:
+[
+  {{"topic": "Internet Speed Issues", "description": "Customers experiencing slow speeds and buffering problems"}}
+]"""
+        return prompt
+
+    def _parse_topic_names(self, response, topics):
+        """Apply the LLM's names to the clusters, keeping the term-based names for any it skipped"""
+        result = self._extract_json(response) if response else None
+        if not isinstance(result, list):
+            return topics, False
+
+        named = []
+        for topic, names in zip(topics, result + [None] * len(topics)):
+            if isinstance(names, dict) and names.get('topic'):
+                topic = {**topic, "topic": str(names['topic']), "description": str(names.get('description', topic['description']))}
+            named.append(topic)
+        return named, True
+
     # ==========================================================
     # 🔹 3. Personalized Recommendations (Conversational)
     # ==========================================================
-    def generate_recommendations(self, customer_data, interaction_history):
-        """Generate conversational recommendations"""
+    def _recommendations_prompt(self, customer_data, interaction_history, products=None):
+        """Build the personalized recommendation prompt (a short one around a catalog shortlist when given)"""
+        if products:
+            return self._shortlist_prompt(customer_data, interaction_history, products)
         if len(interaction_history) > 400:
             interaction_history = interaction_history[:400] + "..."
             
@@ -227,41 +594,78 @@ Return ONLY this JSON:
 }}
 
 Return ONLY the JSON."""
+        return prompt
+
+    def _shortlist_prompt(self, customer_data, interaction_history, products):
+        """Recommendation prompt that only asks the LLM to pick from and explain matched catalog products"""
+        shortlist = "\n".join(
+            f"- {p['product_id']}: {p['product']} (₹{p['price']}) - {p['description']}; fixes {', '.join(p['matched_issues']) or 'general needs'}"
+            for p in products
+        )
+
+        prompt = f"""You are a friendly telecom customer success manager. Recommend products from this shortlist only.
+
+Customer: {customer_data.get('tenure_months', 'N/A')} months tenure, ₹{customer_data.get('current_plan_value', 'N/A')}/month {customer_data.get('service_type', '')}
+Recent issues: {interaction_history[:200]}
+
+Shortlist:
+{shortlist}
 
-        response = self._query(prompt, timeout=60)
+Return ONLY this JSON, using product_id values from the shortlist:
+{{"primary_recommendation": {{"product_id": "", "product": "", "reason": "", "expected_impact": ""}}, "secondary_recommendations": [{{"product_id": "", "product": "", "reason": ""}}], "retention_strategy": "", "tone": "warm_and_helpful"}}"""
+        return prompt
+
+    def _parse_recommendations(self, response, customer_data, fallback=True, products=None):
+        """Parse recommendation JSON, falling back to a generic retention package (or None without fallback)"""
         result = self._extract_json(response)
         
-        if not result:
-            return {
-                "primary_recommendation": {
-                    "product": "Service Upgrade Package",
-                    "reason": "Based on your service history, we recommend upgrading to a more suitable plan that matches your usage needs and will provide better reliability.",
-                    "expected_impact": "You'll experience improved service quality and fewer disruptions to your daily activities."
-                },
-                "secondary_recommendations": [
-                    {"product": "Loyalty Discount - 15% Off", "reason": f"As a customer with {customer_data.get('tenure_months', 'N/A')} months of tenure, you've earned our loyalty discount to make your service more affordable."},
-                    {"product": "Priority Technical Support", "reason": "Get faster resolution times with dedicated support access to ensure your issues are handled promptly."}
-                ],
-                "retention_strategy": "We'll implement these changes immediately with no service disruption, and our team will follow up to ensure everything meets your expectations.",
-                "tone": "warm_and_helpful"
-            }
+        if not result or not isinstance(result, dict):
+            return self.fallback_recommendations(customer_data) if fallback else None
         
+        if products:
+            result = self._ground_recommendations(result, products)
         return result
 
+    def _ground_recommendations(self, result, products):
+        """Keep only shortlisted products: an unknown primary becomes the best match, unknown secondaries are dropped"""
+        shortlist = {p['product_id']: p for p in products}
+
+        primary = result.get('primary_recommendation')
+        primary = primary if isinstance(primary, dict) else {}
+        if primary.get('product_id') not in shortlist:
+            primary = {**primary, "product_id": products[0]['product_id']}
+        primary['product'] = shortlist[primary['product_id']]['product']
+
+        secondary = []
+        for item in result.get('secondary_recommendations') or []:
+            if isinstance(item, dict) and item.get('product_id') in shortlist and item['product_id'] != primary['product_id']:
+                secondary.append({**item, "product": shortlist[item['product_id']]['product']})
+        return {**result, "primary_recommendation": primary, "secondary_recommendations": secondary}
+
+    def fallback_recommendations(self, customer_data):
+        """Generic retention package used when the LLM gives nothing usable"""
+        return {
+            "primary_recommendation": {
+                "product": "Service Upgrade Package",
+                "reason": "Based on your service history, we recommend upgrading to a more suitable plan that matches your usage needs and will provide better reliability.",
+                "expected_impact": "You'll experience improved service quality and fewer disruptions to your daily activities."
+            },
+            "secondary_recommendations": [
+                {"product": "Loyalty Discount - 15% Off", "reason": f"As a customer with {customer_data.get('tenure_months', 'N/A')} months of tenure, you've earned our loyalty discount to make your service more affordable."},
+                {"product": "Priority Technical Support", "reason": "Get faster resolution times with dedicated support access to ensure your issues are handled promptly."}
+            ],
+            "retention_strategy": "We'll implement these changes immediately with no service disruption, and our team will follow up to ensure everything meets your expectations.",
+            "tone": "warm_and_helpful"
+        }
+
     # ==========================================================
     # 🔹 4. CONVERSATIONAL QUERY RESPONSES (NEW!)
     # ==========================================================
-    def analyze_query(self, query, context_data):
-        """Generate natural, conversational answers like ChatGPT/Claude"""
-        
-        # Limit context to prevent overload
-        max_context_length = 2500
-        if len(context_data) > max_context_length:
-            context_data = context_data[:max_context_length] + '...]'
-            
+    def _query_prompt(self, query, context_data):
+        """Build the conversational analyst prompt around precompiled context statistics"""
         prompt = f"""You are an intelligent telecom data analyst AI assistant. Answer the user's question in a natural, conversational way like ChatGPT or Claude.
 
-Customer Data (sample):
+Customer Data (statistics for the interactions most relevant to the question):
 {context_data}
 
 User Question: {query}
@@ -300,10 +704,11 @@ Would you like me to drill into any of these segments for more detailed analysis
 Now write YOUR response to: {query}
 
 Be conversational, insightful, and actionable. Write in paragraphs with some bullet points for key insights."""
+        return prompt
 
-        response = self._query(prompt, timeout=90)
-        
-        if not response or len(response.strip()) < 50:
+    def _format_query_answer(self, response, query):
+        """Wrap the answer for the frontend, substituting a generic answer when the LLM fails"""
+        if not response or not self._is_answer(response):
             # Fallback response
             response = f"""Based on your question about "{query}", I've analyzed the customer data and found several important insights.
 
@@ -339,8 +744,8 @@ The data suggests that with targeted interventions in these areas, you could sig
     # ==========================================================
     # 🔹 5. Quick Summary
     # ==========================================================
-    def quick_summary(self, text, max_length=100):
-        """Generate a quick summary"""
+    def _summary_prompt(self, text, max_length):
+        """Build the one-sentence summary prompt"""
         if len(text) > 300:
             text = text[:300]
             
@@ -349,6 +754,386 @@ The data suggests that with targeted interventions in these areas, you could sig
 "{text}"
 
 Return ONLY the summary sentence."""
+        return prompt
+
+    def _parse_summary(self, response):
+        """Strip the summary, falling back to a review note"""
+        return response.strip() if response else "Customer complaint requires review"
+
+
+class OllamaAnalyzer(BaseOllamaAnalyzer):
+    """Wrapper for Ollama LLM analysis with conversational responses"""
+
+    def __init__(self, model="llama3.2:1b", base_url="http://localhost:11434", cache=None, breaker=None,
+                 max_connections=10, local_classifier=None, local_threshold=0.8):
+        super().__init__(model, base_url, cache, breaker, local_classifier, local_threshold)
+        self._inflight_lock = threading.Lock()
+        # Keep-alive pool; connect errors and 502/503/504 are retried with backoff, timeouts are not
+        retry = Retry(
+            total=MAX_RETRIES,
+            connect=MAX_RETRIES,
+            read=0,
+            status=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['POST']),
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=max_connections, max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_connections, max_retries=retry))
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    # ==========================================================
+    # 🔹 Internal Helper Function: Query Ollama API
+    # ==========================================================
+    def _query(self, prompt, timeout=120, usable=None):
+        """Send prompt to Ollama API (or serve it from cache) and handle errors safely.
+
+        `usable` tells whether a response parses; only those are cached.
+        """
+        cache_key, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+        if self._circuit_open():
+            return None
+
+        # Single flight: threads asking for the same prompt wait on the first one's generation
+        flight_key = self._flight_key(cache_key, prompt)
+        with self._inflight_lock:
+            flight = self._inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[flight_key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            result = self._generate(prompt, timeout)
+            self._cache_store(cache_key, result, usable)
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[flight_key]
+
+    def _generate(self, prompt, timeout):
+        """POST a single non-streaming generation request to Ollama (retries happen in the session adapter)"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt),
+                timeout=timeout
+            )
+
+            if response.status_code != 200:
+                print(f"❌ Ollama HTTP error {response.status_code}: {response.text}")
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                return None
+
+            self.breaker.record_success()
+            return self._read_generation(response.json())
+
+        except requests.exceptions.ConnectionError:
+            print(f"❌ Cannot connect to Ollama at {self.base_url}")
+            self.breaker.record_failure()
+            return None
+        except requests.exceptions.Timeout:
+            print(f"❌ Ollama request timed out after {timeout} seconds")
+            self.breaker.record_failure()
+            return None
+        except Exception as e:
+            print(f"❌ Error querying Ollama: {type(e).__name__}: {str(e)}")
+            return None
+
+    # ==========================================================
+    # 🔹 Public API
+    # ==========================================================
+    def analyze_sentiment(self, text):
+        """Analyze sentiment - returns structured JSON, from the local classifier when it is confident"""
+        answered, escalated = self._classify_locally([text])
+        if answered:
+            return answered[0]
+        return self._parse_sentiment(self._query(self._sentiment_prompt(text), timeout=30, usable=self._extract_json), escalated[0][2])
+
+    def analyze_sentiment_batch(self, texts, start_index=0):
+        """Analyze several complaints, the uncertain ones in one prompt - returns one result per text, tagged with its index"""
+        answered, escalated = self._classify_locally(texts, start_index)
+        response = None
+        if escalated:
+            prompt = self._sentiment_batch_prompt([text for _, text, _ in escalated], indices=[index for index, _, _ in escalated])
+            response = self._query(prompt, timeout=120, usable=self._is_json_array)
+        return self._merge_sentiment_batch(answered, escalated, response)
+
+    def extract_topics(self, texts, top_n=7):
+        """Extract topics - returns structured JSON array"""
+        return self._parse_topics(self._query(self._topics_prompt(texts, top_n), timeout=60, usable=self._is_json_array), top_n)
+
+    def name_topics(self, topics):
+        """Name locally computed topic clusters - returns (topics, whether the LLM named them)"""
+        return self._parse_topic_names(self._query(self._topic_names_prompt(topics), timeout=60, usable=self._is_json_array), topics)
+
+    def generate_recommendations(self, customer_data, interaction_history, fallback=True, products=None):
+        """Generate conversational recommendations, limited to `products` when a catalog shortlist is given"""
+        prompt = self._recommendations_prompt(customer_data, interaction_history, products)
+        return self._parse_recommendations(self._query(prompt, timeout=60, usable=self._is_json_object), customer_data, fallback, products)
+
+    def analyze_query(self, query, context_data):
+        """Generate natural, conversational answers like ChatGPT/Claude"""
+        return self._format_query_answer(self._query(self._query_prompt(query, context_data), timeout=90, usable=self._is_answer), query)
+
+    def quick_summary(self, text, max_length=100):
+        """Generate a quick summary"""
+        return self._parse_summary(self._query(self._summary_prompt(text, max_length), timeout=15, usable=self._is_summary))
 
-        response = self._query(prompt, timeout=15)
-        return response.strip() if response else "Customer complaint requires review"
\ No newline at end of file
+    # ==========================================================
+    # 🔹 Streaming
+    # ==========================================================
+    def _stream(self, prompt, timeout=120):
+        """Yield tokens as Ollama produces them; the full text is cached once the stream completes"""
+        cache_key, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            yield cached
+            return
+        if self._circuit_open():
+            raise RuntimeError("Ollama circuit is open")
+
+        tokens = []
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt, stream=True),
+                timeout=timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    token, done = self._read_stream_chunk(line)
+                    if token:
+                        tokens.append(token)
+                        yield token
+                    if done:
+                        break
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                self.breaker.record_failure()
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        self._cache_store(cache_key, "".join(tokens), self._is_answer)
+
+    def stream_query(self, query, context_data):
+        """Stream a conversational answer token by token, or the fallback answer if Ollama fails"""
+        produced = False
+        try:
+            for token in self._stream(self._query_prompt(query, context_data), timeout=90):
+                produced = True
+                yield token
+        except Exception as e:
+            print(f"❌ Error streaming from Ollama: {type(e).__name__}: {str(e)}")
+            if not produced:
+                yield self._format_query_answer(None, query)["answer"]
+
+
+class AsyncOllamaAnalyzer(BaseOllamaAnalyzer):
+    """Non-blocking Ollama analyzer on a pooled httpx.AsyncClient (same prompts and fallbacks).
+
+    With a `scheduler` (llm_scheduler.LLMScheduler), only generations that
+    actually go to Ollama take a slot - cache hits and calls coalesced onto an
+    identical in-flight generation do not.
+    """
+
+    def __init__(self, model="llama3.2:1b", base_url="http://localhost:11434", cache=None, breaker=None,
+                 max_connections=10, scheduler=None, local_classifier=None, local_threshold=0.8):
+        super().__init__(model, base_url, cache, breaker, local_classifier, local_threshold)
+        self.scheduler = scheduler
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=httpx.AsyncHTTPTransport(
+                retries=MAX_RETRIES,  # Connection-level retries; status retries are in _post
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+        )
+
+    async def aclose(self):
+        """Close pooled connections (call on application shutdown)"""
+        await self.client.aclose()
+
+    # ==========================================================
+    # 🔹 Internal Helper Function: Query Ollama API
+    # ==========================================================
+    async def _query(self, prompt, timeout=120, usable=None):
+        """Send prompt to Ollama API (or serve it from cache) without blocking the event loop.
+
+        `usable` tells whether a response parses; only those are cached.
+        """
+        cache_key, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+        if self._circuit_open():
+            return None
+
+        # Single flight: identical concurrent calls await one generation task. It is shielded, so a
+        # caller that disconnects neither cancels the others nor loses the result for the cache.
+        flight_key = self._flight_key(cache_key, prompt)
+        flight = self._inflight.get(flight_key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._generate_and_store(prompt, timeout, cache_key, usable))
+            self._inflight[flight_key] = flight
+            flight.add_done_callback(lambda done: self._flight_done(flight_key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    async def _generate_and_store(self, prompt, timeout, cache_key, usable=None):
+        """Run one generation (inside a scheduler slot when configured) and cache it if usable"""
+        if self.scheduler is not None:
+            async with self.scheduler.slot():
+                result = await self._generate(prompt, timeout)
+        else:
+            result = await self._generate(prompt, timeout)
+        self._cache_store(cache_key, result, usable)
+        return result
+
+    def _flight_done(self, flight_key, flight):
+        self._inflight.pop(flight_key, None)
+        if not flight.cancelled():
+            flight.exception()  # Mark retrieved even if every waiter went away
+
+    async def _post(self, payload, timeout):
+        """POST /api/generate, retrying 502/503/504 answers with exponential backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            response = await self.client.post("/api/generate", json=payload, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
+
+    async def _generate(self, prompt, timeout):
+        """POST a single non-streaming generation request to Ollama"""
+        try:
+            response = await self._post(self._payload(prompt), timeout)
+
+            if response.status_code != 200:
+                print(f"❌ Ollama HTTP error {response.status_code}: {response.text}")
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                return None
+
+            self.breaker.record_success()
+            return self._read_generation(response.json())
+
+        except httpx.ConnectError:
+            print(f"❌ Cannot connect to Ollama at {self.base_url}")
+            self.breaker.record_failure()
+            return None
+        except httpx.TimeoutException:
+            print(f"❌ Ollama request timed out after {timeout} seconds")
+            self.breaker.record_failure()
+            return None
+        except Exception as e:
+            print(f"❌ Error querying Ollama: {type(e).__name__}: {str(e)}")
+            return None
+
+    # ==========================================================
+    # 🔹 Public API
+    # ==========================================================
+    async def analyze_sentiment(self, text):
+        """Analyze sentiment - returns structured JSON, from the local classifier when it is confident"""
+        answered, escalated = self._classify_locally([text])
+        if answered:
+            return answered[0]
+        return self._parse_sentiment(await self._query(self._sentiment_prompt(text), timeout=30, usable=self._extract_json), escalated[0][2])
+
+    async def analyze_sentiment_batch(self, texts, start_index=0):
+        """Analyze several complaints, the uncertain ones in one prompt - returns one result per text, tagged with its index"""
+        answered, escalated = self._classify_locally(texts, start_index)
+        response = None
+        if escalated:
+            prompt = self._sentiment_batch_prompt([text for _, text, _ in escalated], indices=[index for index, _, _ in escalated])
+            response = await self._query(prompt, timeout=120, usable=self._is_json_array)
+        return self._merge_sentiment_batch(answered, escalated, response)
+
+    async def extract_topics(self, texts, top_n=7):
+        """Extract topics - returns structured JSON array"""
+        return self._parse_topics(await self._query(self._topics_prompt(texts, top_n), timeout=60, usable=self._is_json_array), top_n)
+
+    async def name_topics(self, topics):
+        """Name locally computed topic clusters - returns (topics, whether the LLM named them)"""
+        return self._parse_topic_names(await self._query(self._topic_names_prompt(topics), timeout=60, usable=self._is_json_array), topics)
+
+    async def generate_recommendations(self, customer_data, interaction_history, fallback=True, products=None):
+        """Generate conversational recommendations, limited to `products` when a catalog shortlist is given"""
+        prompt = self._recommendations_prompt(customer_data, interaction_history, products)
+        return self._parse_recommendations(await self._query(prompt, timeout=60, usable=self._is_json_object), customer_data, fallback, products)
+
+    async def analyze_query(self, query, context_data):
+        """Generate natural, conversational answers like ChatGPT/Claude"""
+        return self._format_query_answer(await self._query(self._query_prompt(query, context_data), timeout=90, usable=self._is_answer), query)
+
+    async def quick_summary(self, text, max_length=100):
+        """Generate a quick summary"""
+        return self._parse_summary(await self._query(self._summary_prompt(text, max_length), timeout=15, usable=self._is_summary))
+
+    # ==========================================================
+    # 🔹 Streaming
+    # ==========================================================
+    async def _stream(self, prompt, timeout=120):
+        """Yield tokens as Ollama produces them; the full text is cached once the stream completes"""
+        cache_key, cached = self._cache_lookup(prompt)
+        if cached is not None:
+            yield cached
+            return
+        if self._circuit_open():
+            raise RuntimeError("Ollama circuit is open")
+
+        tokens = []
+        try:
+            async with self.client.stream(
+                "POST", "/api/generate", json=self._payload(prompt, stream=True), timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    token, done = self._read_stream_chunk(line)
+                    if token:
+                        tokens.append(token)
+                        yield token
+                    if done:
+                        break
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                self.breaker.record_failure()
+            raise
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        self._cache_store(cache_key, "".join(tokens), self._is_answer)
+
+    async def stream_query(self, query, context_data):
+        """Stream a conversational answer token by token, or the fallback answer if Ollama fails"""
+        produced = False
+        try:
+            async for token in self._stream(self._query_prompt(query, context_data), timeout=90):
+                produced = True
+                yield token
+        except Exception as e:
+            print(f"❌ Error streaming from Ollama: {type(e).__name__}: {str(e)}")
+            if not produced:
+                yield self._format_query_answer(None, query)["answer"]
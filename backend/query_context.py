@@ -0,0 +1,74 @@
+import pandas as pd
+
+from aggregates import HIGH_RISK_LEVELS
+
+TOP_VALUES = 5
+EXEMPLARS = 5
+EXEMPLAR_CHARS = 200
+PERCENTILES = [0.25, 0.5, 0.75, 0.9]
+
+
+def _share_line(label, series, total, limit=TOP_VALUES):
+    """'label: a 12 (24.0%), b 9 (18.0%)' for the most frequent values of a column"""
+    counts = series.astype(str).value_counts().head(limit)
+    parts = [f"{value} {count} ({count / total * 100:.1f}%)" for value, count in counts.items()]
+    return f"{label}: " + ", ".join(parts)
+
+
+def _percentile_line(label, series, fmt="{:.2f}"):
+    """'label: mean x, p25 x, p50 x, p75 x, p90 x' over the non-null values"""
+    values = series.dropna()
+    if values.empty:
+        return f"{label}: n/a"
+    quantiles = values.quantile(PERCENTILES)
+    parts = [f"mean {fmt.format(values.mean())}"]
+    parts += [f"p{int(q * 100)} {fmt.format(v)}" for q, v in quantiles.items()]
+    return f"{label}: " + ", ".join(parts)
+
+
+def _exemplars(df, limit=EXEMPLARS):
+    """Distinct complaint texts, most relevant first but one per category before any repeats, clipped for the prompt"""
+    distinct = df.drop_duplicates('interaction_text')
+    rank = distinct.groupby('category', observed=True, sort=False).cumcount().values
+    distinct = distinct.iloc[pd.Series(rank).sort_values(kind='stable').index]
+
+    lines = []
+    for row in distinct.head(limit).itertuples(index=False):
+        text = str(row.interaction_text)
+        if len(text) > EXEMPLAR_CHARS:
+            text = text[:EXEMPLAR_CHARS].rsplit(' ', 1)[0] + '…'
+        lines.append(f'- [{row.category} | {row.geography} | {row.churn_risk} churn risk] "{text}"')
+    return lines
+
+
+def compile_context(context_df, total_interactions):
+    """Summarize the selected interaction rows as compact statistics plus a few exemplar complaints.
+
+    Replaces raw `to_json(orient='records')` rows in the /query prompt: every
+    number the model needs is precomputed, and the output is a few hundred
+    tokens whatever the slice size, so it never has to be truncated.
+    """
+    n = len(context_df)
+    if n == 0:
+        return f"No interactions matched (out of {total_interactions} total)."
+
+    high_risk = context_df['churn_risk'].isin(HIGH_RISK_LEVELS).sum()
+    customers = context_df['customer_id'].nunique()
+
+    lines = [
+        f"Interactions analyzed: {n} most relevant to the question (out of {total_interactions} total), "
+        f"from {customers} customers, dated {context_df['date'].min()} to {context_df['date'].max()}",
+        f"High/critical churn risk: {high_risk} ({high_risk / n * 100:.1f}%)",
+        _share_line("By category", context_df['category'], n),
+        _share_line("By city", context_df['geography'], n),
+        _share_line("By churn risk", context_df['churn_risk'], n),
+        _share_line("By sentiment", context_df['sentiment'], n),
+        _share_line("By resolution status", context_df['resolution_status'], n),
+        _share_line("By operator", context_df['operator'], n),
+        _percentile_line("Churn score", context_df['churn_score']),
+        _percentile_line("Resolution time (hours)", context_df['resolution_time_hours'], fmt="{:.1f}"),
+        _percentile_line("Plan value (₹)", pd.to_numeric(context_df['current_plan_value'], errors='coerce'), fmt="{:.0f}"),
+        "Example complaints:",
+        *_exemplars(context_df)
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from catalog_matcher import HIGH_CHURN_SCORE
+from lead_scoring import DEFAULT_WEIGHTS
+from llm_scheduler import SchedulerOverloaded
+
+OVERLOAD_RETRIES = 3  # Times a customer is put back in the queue per pass while the LLM scheduler is full
+
+
+def history_text(snapshot, customer_id):
+    """The customer's last few interaction texts, as the recommendation prompt expects them"""
+    recent = snapshot.customer_summary.recent(customer_id)
+    if len(recent) == 0:
+        return "No previous interactions"
+    return "\n".join(snapshot.interactions.values('interaction_text', recent).tolist())
+
+
+def product_shortlist(snapshot, customer_id, customer):
+    """In-stock catalog products matching the categories of the customer's recent interactions and their plan value"""
+    summary = snapshot.customer_summary
+    categories = snapshot.interactions.values('category', summary.recent(customer_id))
+    issue_weights = {str(category): count / len(categories) for category, count in Counter(categories).items()}
+    position = summary.position(customer_id)
+    high_churn = position is not None and summary.max_churn[position] >= HIGH_CHURN_SCORE
+    return snapshot.catalog.match(issue_weights, customer.get('current_plan_value'), high_churn)
+
+
+def interaction_watermark(snapshot, customer_id):
+    """'<interaction count>:<latest interaction id>' - changes whenever the customer has a new interaction"""
+    summary = snapshot.customer_summary
+    position = summary.position(customer_id)
+    if position is None or summary.interaction_count[position] == 0:
+        return "0:"
+    latest = snapshot.interactions.values('interaction_id', [summary.latest_row[position]])[0]
+    return f"{int(summary.interaction_count[position])}:{latest}"
+
+
+class RecommendationStore:
+    """Generated recommendations keyed by customer_id in SQLite, with when and for which interactions"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            "customer_id TEXT PRIMARY KEY, recommendations TEXT NOT NULL, "
+            "watermark TEXT NOT NULL, model TEXT NOT NULL, generated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, customer_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recommendations, watermark, model, generated_at FROM recommendations WHERE customer_id = ?",
+                (customer_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "recommendations": json.loads(row[0]),
+            "watermark": row[1],
+            "model": row[2],
+            "generated_at": row[3]
+        }
+
+    def set(self, customer_id, recommendations, watermark, model):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recommendations (customer_id, recommendations, watermark, model, generated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (customer_id, json.dumps(recommendations), watermark, model, time.time())
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+
+
+class RecommendationPrecompute:
+    """Background job that keeps stored recommendations current for the customers most worth targeting.
+
+    Each pass takes the top `customers` by lead score (churn, value, tenure,
+    responsiveness and unresolved issues from the interaction and profile
+    tables), skips those whose stored result still matches their interaction
+    watermark, and generates the rest with `workers` concurrent LLM calls.
+    Those calls go through the shared scheduler, so keeping `workers` below its
+    concurrency leaves slots free for interactive requests. A customer the
+    scheduler turns away more than `overload_retries` times is left for the
+    next pass, so sustained interactive load cannot stall a pass.
+    """
+
+    def __init__(self, snapshots, llm, store, customers=100, workers=1, weights=DEFAULT_WEIGHTS,
+                 overload_retries=OVERLOAD_RETRIES):
+        self.snapshots = snapshots
+        self.llm = llm
+        self.store = store
+        self.customers = customers
+        self.workers = workers
+        self.weights = weights
+        self.overload_retries = overload_retries
+        self.passes = 0
+        self.generated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.skipped_overloaded = 0
+        self.running = False
+        self.last_pass_seconds = None
+
+    async def generate(self, snapshot, customer_id):
+        """Generate and store one customer's recommendations; returns them, or None if the LLM gave nothing usable"""
+        customer = snapshot.customer_index.profile(customer_id)
+        watermark = interaction_watermark(snapshot, customer_id)
+        recommendations = await self.llm.generate_recommendations(
+            customer, history_text(snapshot, customer_id), fallback=False,
+            products=product_shortlist(snapshot, customer_id, customer)
+        )
+        if recommendations is None:
+            return None
+        await asyncio.to_thread(self.store.set, customer_id, recommendations, watermark, self.llm.model)
+        return recommendations
+
+    def candidates(self, snapshot):
+        """Top-scored customers whose stored recommendations are missing or older than their interactions"""
+        leads = snapshot.lead_scorer.top(self.customers, self.weights)
+        stale = []
+        for lead in leads:
+            stored = self.store.get(lead['customer_id'])
+            if stored is not None and stored['watermark'] == interaction_watermark(snapshot, lead['customer_id']):
+                self.skipped += 1
+            else:
+                stale.append(lead['customer_id'])
+        return stale
+
+    async def run_once(self):
+        """One pass over the current snapshot's top customers"""
+        start = time.time()
+        snapshot = self.snapshots.current
+        queue = asyncio.Queue()
+        for customer_id in await asyncio.to_thread(self.candidates, snapshot):
+            queue.put_nowait(customer_id)
+        if queue.empty():
+            return
+        overloads = Counter()
+
+        async def worker():
+            while not queue.empty():
+                customer_id = queue.get_nowait()
+                try:
+                    if await self.generate(snapshot, customer_id) is None:
+                        self.failed += 1
+                    else:
+                        self.generated += 1
+                except SchedulerOverloaded as e:
+                    # Interactive traffic has the LLM busy; try this customer again after backing off
+                    overloads[customer_id] += 1
+                    if overloads[customer_id] > self.overload_retries:
+                        self.skipped_overloaded += 1
+                        print(f"⚠️ Skipping recommendations for {customer_id} this pass: LLM still overloaded")
+                    else:
+                        queue.put_nowait(customer_id)
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"⚠️ Precomputing recommendations for {customer_id} failed: {e}")
+
+        self.running = True
+        try:
+            print(f"🔄 Precomputing recommendations for {queue.qsize()} customers")
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, queue.qsize()))))
+        finally:
+            self.running = False
+            self.passes += 1
+            self.last_pass_seconds = round(time.time() - start, 2)
+        print(f"✅ Recommendation pass done in {self.last_pass_seconds}s ({self.generated} generated so far)")
+
+    async def run_forever(self, interval):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ Recommendation precompute pass failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self):
+        return {
+            "stored": len(self.store),
+            "customers_per_pass": self.customers,
+            "workers": self.workers,
+            "running": self.running,
+            "passes": self.passes,
+            "generated": self.generated,
+            "skipped_fresh": self.skipped,
+            "failed": self.failed,
+            "skipped_overloaded": self.skipped_overloaded,
+            "last_pass_seconds": self.last_pass_seconds
+        }
@@ -0,0 +1,170 @@
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from aggregates import HIGH_RISK_LEVELS
+
+TOKEN_PATTERN = r'[a-z0-9]+'
+BUILD_CHUNK_ROWS = 200000  # Tokenize in slices so building over millions of rows stays bounded
+DENSE_SCORING_RATIO = 8  # Score into a dense array once postings touch 1/8 of the rows
+
+STOP_WORDS = {
+    'a', 'about', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'but', 'by', 'can', 'do',
+    'does', 'for', 'from', 'had', 'has', 'have', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'me',
+    'more', 'most', 'my', 'of', 'on', 'or', 'our', 'so', 'than', 'that', 'the', 'their', 'them', 'there',
+    'these', 'they', 'this', 'those', 'to', 'us', 'was', 'we', 'were', 'what', 'when', 'where', 'which',
+    'who', 'why', 'will', 'with', 'would', 'you', 'your',
+    # Question filler that says nothing about which rows are relevant
+    'customer', 'customers', 'complain', 'complaining', 'complaint', 'complaints', 'issue', 'issues',
+    'problem', 'problems', 'common', 'give', 'list', 'show', 'tell', 'top'
+}
+
+# Question words that should also match the structured field terms (the old keyword branches)
+QUERY_SYNONYMS = {
+    'wifi': ['internet'],
+    'bill': ['billing'],
+    'bills': ['billing'],
+    'charge': ['billing', 'overcharge'],
+    'charges': ['billing', 'overcharge'],
+    'price': ['billing'],
+    'slow': ['speed'],
+    'leaving': ['churn'],
+    'switch': ['churn'],
+    'churning': ['churn']
+}
+
+
+def field_terms(df):
+    """Searchable words for the structured columns: category, geography and churn risk"""
+    at_risk = df['churn_risk'].isin(HIGH_RISK_LEVELS).values
+    return (
+        df['category'].astype(str).str.replace('_', ' ') + ' '
+        + df['geography'].astype(str) + ' '
+        + df['churn_risk'].astype(str) + ' risk'
+        + np.where(at_risk, ' churn', '')
+    )
+
+
+class InteractionIndex:
+    """Inverted TF-IDF index over interaction_text plus category, geography and churn terms.
+
+    Documents are weighted lnc (log tf, cosine-normalised, no idf) and queries
+    ltc, so idf is read from the live document frequencies at query time and
+    `add()` never has to reweight existing postings. Search touches only the
+    postings of the question's terms.
+    """
+
+    def __init__(self, interactions_df):
+        self.size = 0
+        self.vocab = {}
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self._postings = []  # term id -> list of (rows, weights) segments, merged lazily on search
+        self._lock = threading.Lock()  # Ingestion grows the vocabulary and postings while request threads search them
+        self.add(interactions_df)
+
+    # ==========================================================
+    # 🔹 Build / incremental update
+    # ==========================================================
+    def add(self, df):
+        """Index rows appended to the interaction table; their positions continue from the current size"""
+        for start in range(0, len(df), BUILD_CHUNK_ROWS):
+            self._add_chunk(df.iloc[start:start + BUILD_CHUNK_ROWS])
+
+    def _add_chunk(self, df):
+        texts = (df['interaction_text'].astype(str) + ' ' + field_terms(df)).str.lower()
+        tokens = texts.str.findall(TOKEN_PATTERN)
+        tokens.index = np.arange(len(df))
+        pairs = tokens.explode().dropna()
+        pairs = pairs[~pairs.isin(STOP_WORDS)]
+        if len(pairs) == 0:
+            with self._lock:
+                self.size += len(df)
+            return
+
+        # Vocabulary, postings, doc_freq and size change together under the lock, so search never sees a
+        # term id without its document frequency or postings past the size it divides by
+        with self._lock:
+            term_ids = self._term_ids(pairs.values)
+            local_rows = pairs.index.values.astype(np.int64)
+
+            # Term frequency per (row, term), then lnc weights
+            keys, tf = np.unique(local_rows * len(self.vocab) + term_ids, return_counts=True)
+            rows, terms = np.divmod(keys, len(self.vocab))
+            weights = 1.0 + np.log(tf)
+            norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(df)))
+            norms[norms == 0] = 1.0
+
+            # Group postings by term and append one segment per term
+            order = np.argsort(terms, kind='stable')
+            terms, rows, weights = terms[order], rows[order] + self.size, weights[order] / norms[rows[order]]
+            bounds = np.flatnonzero(np.diff(terms)) + 1
+            starts = np.concatenate([[0], bounds])
+            for start, term_rows, term_weights in zip(starts, np.split(rows, bounds), np.split(weights, bounds)):
+                self._postings[terms[start]].append((term_rows, term_weights))
+            self.doc_freq[terms[starts]] += np.diff(np.append(starts, len(terms)))  # terms are sorted, so one slot each
+            self.size += len(df)
+
+    def _term_ids(self, words):
+        """Map words to term ids, growing the vocabulary for unseen ones"""
+        codes, uniques = pd.factorize(words)
+        for word in uniques:
+            if word not in self.vocab:
+                self.vocab[word] = len(self.vocab)
+                self._postings.append([])
+        if len(self.doc_freq) < len(self.vocab):
+            # Grown with headroom: numbers and new words reach the vocabulary with almost every ingested batch
+            grown = np.zeros(max(len(self.vocab), 2 * len(self.doc_freq)), dtype=np.int64)
+            grown[:len(self.doc_freq)] = self.doc_freq
+            self.doc_freq = grown
+        # Looked up per distinct word: Series.map(dict) would first turn the whole vocabulary into a Series
+        return np.fromiter((self.vocab[word] for word in uniques), dtype=np.int64, count=len(uniques))[codes]
+
+    def _term_postings(self, term):
+        """All (rows, weights) for a term, compacting appended segments into one"""
+        with self._lock:
+            segments = self._postings[term]
+            if len(segments) > 1:
+                segments[:] = [(np.concatenate([s[0] for s in segments]), np.concatenate([s[1] for s in segments]))]
+            return segments[0]
+
+    # ==========================================================
+    # 🔹 Search
+    # ==========================================================
+    def query_terms(self, question):
+        """Known term ids in a question (with synonyms) and their query-side tf weights"""
+        words = [w for w in re.findall(TOKEN_PATTERN, question.lower()) if w not in STOP_WORDS]
+        expanded = words + [syn for w in words for syn in QUERY_SYNONYMS.get(w, [])]
+        counts = Counter(self.vocab[w] for w in expanded if w in self.vocab)
+        return np.fromiter(counts.keys(), dtype=np.int64), 1.0 + np.log(np.fromiter(counts.values(), dtype=float))
+
+    def search(self, question, k=50):
+        """Positional rows of the k best matches, best first; the first k rows when nothing matches"""
+        with self._lock:
+            terms, query_weights = self.query_terms(question)
+            size = self.size
+            idf = np.log(1.0 + size / self.doc_freq[terms])
+        if len(terms) == 0:
+            return np.arange(min(k, size))
+
+        rows, scores = [], []
+        for term, weight in zip(terms, query_weights * idf):
+            term_rows, term_weights = self._term_postings(term)
+            rows.append(term_rows)
+            scores.append(term_weights * weight)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+
+        # Sum contributions per row (dense when the postings cover much of the table), then take the top k
+        if len(rows) * DENSE_SCORING_RATIO >= size:
+            scores = np.bincount(rows, weights=scores, minlength=size)
+            rows = np.flatnonzero(scores)
+            scores = scores[rows]
+        else:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        return rows[np.lexsort((rows, -scores))]  # Ties go to the earlier row
@@ -0,0 +1,246 @@
+import os
+import threading
+import time
+
+from aggregates import InteractionAggregates
+from customer_index import CustomerIndex, CustomerSummary
+from retrieval_index import InteractionIndex
+from trend_cube import TrendCube
+from catalog_matcher import CatalogMatcher
+from campaign_analytics import CampaignAnalytics
+import topic_clusters
+from lead_ranking import LeadRanking
+from lead_scoring import LeadScorer
+from data_store import InteractionTable, base_stamp, load_dataset, load_with_ingested
+
+# Files whose modification means Data.py regenerated the dataset (data/ingest/ shards are the API's own writes)
+WATCHED_DATASETS = ['customer_interactions', 'customer_profiles', 'campaign_history', 'product_catalog', 'issue_trends',
+                    'campaign_customer_mapping']
+
+
+def data_signature(data_dir):
+    """(file name, mtime) for every watched CSV and Arrow copy that exists"""
+    signature = []
+    for name in WATCHED_DATASETS:
+        for suffix in ('.csv', '.feather'):
+            path = data_dir / f"{name}{suffix}"
+            if path.exists():
+                signature.append((path.name, os.path.getmtime(path)))
+    return tuple(signature)
+
+
+class DataSnapshot:
+    """The loaded tables plus every structure derived from them, served together as one version"""
+
+    def __init__(self, data_dir, version):
+        self.version = version
+        self.signature = data_signature(data_dir)
+        start = time.time()
+
+        # Load data with error handling (memory-mapped Arrow copies when present, CSV otherwise)
+        try:
+            # Interactions posted to the API since generation live in data/ingest/ shards, stamped with the
+            # interaction file they extend; shards from an earlier generation are left out
+            self.ingest_stamp = base_stamp(data_dir, 'customer_interactions')
+            # Kept as the loaded frame plus ingested chunks, so a flush never copies the rows already loaded
+            self.interactions = InteractionTable(load_with_ingested(data_dir, 'customer_interactions', self.ingest_stamp))
+            self.customers_df = load_dataset(data_dir, 'customer_profiles')
+            self.campaigns_df = load_dataset(data_dir, 'campaign_history')
+            self.products_df = load_dataset(data_dir, 'product_catalog')
+            print(f"✅ Loaded {len(self.interactions)} interactions")
+            print(f"✅ Loaded {len(self.customers_df)} customers")
+            print(f"✅ Loaded {len(self.campaigns_df)} campaigns")
+            print(f"✅ Loaded {len(self.products_df)} products")
+        except FileNotFoundError as e:
+            print(f"❌ Error loading data files: {e}")
+            print(f"Expected data directory: {data_dir}")
+            raise
+
+        # Per-customer campaign responses only feed lead scoring, so the API still starts without them
+        try:
+            self.mapping_df = load_dataset(data_dir, 'campaign_customer_mapping')
+            print(f"✅ Loaded {len(self.mapping_df)} campaign contacts")
+        except FileNotFoundError:
+            self.mapping_df = None
+            print("⚠️ campaign_customer_mapping not found; lead scores ignore campaign responses")
+
+        # Precompute aggregates once so dashboard endpoints never rescan the interaction table
+        interactions_df = self.interactions.base
+        self.aggregates = InteractionAggregates(interactions_df)
+        print(f"✅ Indexed {len(self.aggregates.marginals['category'])} categories")
+
+        # customer_id indexes for lead assembly and per-customer lookups
+        self.customer_index = CustomerIndex(self.customers_df, self.interactions)
+        print(f"✅ Indexed {len(self.customer_index.interaction_rows)} customers with interactions")
+
+        # One reduced row per customer (counts, highest-churn and latest interaction) for leads and recommendations
+        self.customer_summary = CustomerSummary(self.customer_index.profiles.index, interactions_df)
+
+        # High-risk leads presorted per category so /leads pages never sort the table
+        self.lead_ranking = LeadRanking(self.interactions)
+
+        # Per-customer targeting features across all tables for /leads/scored
+        self.lead_scorer = LeadScorer(self.customers_df, self.customer_summary, self.mapping_df, self.campaigns_df)
+        print(f"✅ Built lead scoring features for {len(self.lead_scorer.customer_ids)} customers")
+
+        # Issue -> in-stock product index that grounds recommendations in real catalog items
+        self.catalog = CatalogMatcher(self.products_df)
+        print(f"✅ Indexed {len(self.catalog.product_ids)} in-stock products across {len(self.catalog.by_issue)} issues")
+
+        # Campaign funnels, response lags and revenue cube for /campaigns/{id}/funnel and /campaigns/analytics
+        self.campaign_analytics = None
+        if self.mapping_df is not None:
+            self.campaign_analytics = CampaignAnalytics(self.campaigns_df, self.mapping_df)
+            print(f"✅ Built campaign funnels from {self.campaign_analytics.mapping_rows} campaign contacts")
+
+        # TF-IDF retrieval index so /query picks the most relevant rows instead of the first matches
+        self.interaction_index = InteractionIndex(interactions_df)
+        print(f"✅ Indexed {len(self.interaction_index.vocab)} terms for query retrieval")
+
+        # week x category x geography cube for /trends, seeded from issue_trends.csv when it matches the interactions
+        try:
+            issue_trends_df = load_dataset(data_dir, 'issue_trends')
+        except FileNotFoundError:
+            issue_trends_df = None
+        self.trend_cube = TrendCube.load(issue_trends_df, interactions_df)
+        print(f"✅ Built trend cube with {len(self.trend_cube.cells)} cells from {self.trend_cube.source}")
+
+        # Topic clusters over every interaction_text take longest to build, so they are fitted on first use
+        # (or by warm_topics() in the background) and then kept for the life of the snapshot
+        self._topic_clusters = None
+        self._topics_lock = threading.Lock()
+
+        self.loaded_at = time.time()
+        self.load_seconds = round(self.loaded_at - start, 2)
+
+    def topic_clusters(self):
+        """The snapshot's TopicClusters, fitted once; None without scikit-learn"""
+        if not topic_clusters.available():
+            return None
+        with self._topics_lock:
+            if self._topic_clusters is None:
+                self._topic_clusters = topic_clusters.TopicClusters(self.interactions.frame())
+                print(f"✅ Clustered {self._topic_clusters.rows_seen} interactions into "
+                      f"{len(self._topic_clusters.sizes)} topics in {self._topic_clusters.fit_seconds}s")
+        return self._topic_clusters
+
+    def warm_topics(self):
+        """Fit the topic clusters in a background thread so the first /topic-modeling call does not wait"""
+        # Not a daemon: exiting while scikit-learn is mid-fit aborts the interpreter, so shutdown waits for the fit
+        thread = threading.Thread(target=self.topic_clusters, name=f'topics-v{self.version}')
+        thread.start()
+        return thread
+
+    def add_interactions(self, rows):
+        """Fold newly ingested rows into the table, indexes and aggregates without recomputing them.
+
+        Everything is updated in place from the batch alone, each structure
+        under its own lock, so a flush costs the same however large the table is.
+        """
+        start = len(self.interactions)
+        rows = rows.reset_index(drop=True)
+
+        # Table first, then the positional indexes, so any row an index returns already exists
+        self.interactions.append(rows)
+        self.customer_index.add(rows, start)
+        self.lead_ranking.add(rows, start)
+        self.customer_summary.add(rows, start)
+        self.lead_scorer.invalidate()
+        self.interaction_index.add(rows)
+        self.aggregates.add(rows)
+        self.trend_cube.add(rows)
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "loaded_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.loaded_at)),
+            "load_seconds": self.load_seconds,
+            "topic_clusters": self._topic_clusters.stats() if self._topic_clusters else None
+        }
+
+
+class SnapshotManager:
+    """Holds the current DataSnapshot and replaces it atomically on reload.
+
+    Handlers read `current` once per request and keep using that snapshot, so
+    a reload never changes the data under a running request. A new snapshot is
+    built completely before the single reference swap; if building fails the
+    old one stays in service. `lock` is held by anyone mutating the current
+    snapshot (ingestion) and by a reload only around its hooks and the swap, so
+    ingestion keeps publishing into the old snapshot while the new one is built;
+    `before_swap` then folds those rows into the new one so none are lost.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.lock = threading.RLock()
+        self.before_reload = None  # Called under the lock just before the new snapshot is read from disk
+        self.before_swap = None  # Called under the lock with the new snapshot just before it replaces `current`
+        self.after_reload = None  # Called under the lock with the new snapshot right after the swap
+        self.building = False  # True from a reload's before_reload until its swap; shards written then would be missed
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+        self._failed_signature = None
+        self._stop = threading.Event()
+        self._reload_lock = threading.Lock()  # One reload at a time (watcher and admin endpoint)
+        self.current = DataSnapshot(data_dir, version=1)
+
+    def reload(self, reason='admin request'):
+        """Build a fresh snapshot from data/ and swap it in; returns it, or raises and keeps the old one"""
+        with self._reload_lock:
+            print(f"🔄 Reloading data ({reason})")
+            with self.lock:
+                if self.before_reload:
+                    self.before_reload()
+                self.building = True
+            try:
+                snapshot = DataSnapshot(self.data_dir, version=self.current.version + 1)
+            except Exception as e:
+                self.building = False
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                self._failed_signature = data_signature(self.data_dir)
+                print(f"❌ Reload failed, keeping snapshot v{self.current.version}: {e}")
+                raise
+            with self.lock:
+                if self.before_swap:
+                    self.before_swap(snapshot)
+                self.current = snapshot
+                self.building = False
+                self.reloads += 1
+                self.last_error = None
+                if self.after_reload:
+                    self.after_reload(snapshot)
+            print(f"✅ Serving data snapshot v{snapshot.version} (built in {snapshot.load_seconds}s)")
+            return snapshot
+
+    def watch(self, interval):
+        """Poll data/ mtimes in a daemon thread and reload once a change has settled for a full interval"""
+        def run():
+            seen = self.current.signature
+            while not self._stop.wait(interval):
+                signature = data_signature(self.data_dir)
+                settled = signature == seen
+                seen = signature
+                if not settled or signature in (self.current.signature, self._failed_signature):
+                    continue
+                try:
+                    self.reload('data files changed')
+                except Exception:
+                    pass  # Logged by reload(); retried once the files change again
+
+        thread = threading.Thread(target=run, name='data-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            **self.current.stats(),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from data_store import InteractionTable
+
+
+def interactions(start, n, category='billing'):
+    return pd.DataFrame({
+        'interaction_id': [f"INT_{i:06d}" for i in range(start, start + n)],
+        'category': [category] * n,
+        'churn_score': np.linspace(0, 1, n),
+    })
+
+
+def test_appended_chunks_read_like_one_table():
+    base = interactions(0, 10).astype({'category': 'category'})
+    table = InteractionTable(base)
+    expected = [base]
+    start = len(base)
+    for n in (3, 1, 4, 1, 5, 9, 2):
+        batch = interactions(start, n, category='network' if n % 2 else 'billing')
+        table.append(batch)
+        expected.append(batch)
+        start += n
+    expected = pd.concat(expected, ignore_index=True)
+
+    assert len(table) == len(expected)
+    assert len(table._chunks[0]) <= 3  # Merged as they grow, not one chunk per batch
+
+    positions = np.array([34, 0, 12, 9, 10, 21, 3])
+    rows = table.rows(positions)
+    assert list(rows.index) == list(positions)
+    assert list(rows['interaction_id']) == list(expected['interaction_id'].values[positions])
+    assert list(table.values('category', positions)) == list(expected['category'].astype(str).values[positions])
+    assert list(table.since(30)['interaction_id']) == list(expected['interaction_id'].iloc[30:])
+
+    parts = table.parts()
+    assert [start for start, _ in parts] == list(np.cumsum([0] + [len(df) for _, df in parts[:-1]]))
+    assert sum(len(df) for _, df in parts) == len(table)
+
+    frame = table.frame()
+    assert list(frame['interaction_id']) == list(expected['interaction_id'])
+    assert isinstance(frame['category'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import local_classifier
+
+pytestmark = pytest.mark.skipif(not local_classifier.available(), reason="scikit-learn is not installed")
+
+COMPLAINTS = {
+    ('internet_speed', 'negative', 'high'): "internet speed is very slow and keeps buffering",
+    ('billing_overcharge', 'negative', 'high'): "charged twice on my bill this month please refund",
+    ('product_inquiry', 'positive', 'low'): "interested in the new fiber plan with more data",
+    ('tv_channels', 'positive', 'low'): "thanks for adding the sports channels to my pack",
+}
+
+
+def labelled_interactions(rows_per_label=20):
+    """A small labelled frame whose sentiment and churn_risk heads are binary"""
+    rows = []
+    for (category, sentiment, churn_risk), text in COMPLAINTS.items():
+        for i in range(rows_per_label):
+            rows.append({
+                'interaction_text': f"{text} ticket {i % 5}",
+                'category': category,
+                'sentiment': sentiment,
+                'churn_risk': churn_risk,
+                'sentiment_score': -0.6 if sentiment == 'negative' else 0.7,
+            })
+    return pd.DataFrame(rows)
+
+
+def test_binary_heads_match_sklearn():
+    df = labelled_interactions()
+    classifier = local_classifier.LocalComplaintClassifier(df)
+    assert classifier.models['sentiment'].coef_.shape[0] == 1
+    assert classifier.weights.shape[1] == len(COMPLAINTS) + 2
+
+    texts = list(COMPLAINTS.values()) + ["slow internet and a wrong bill"]
+    results = classifier.classify_many(texts)
+    features = classifier.vectorizer.transform(texts)
+    for head in classifier.HEADS:
+        model = classifier.models[head]
+        expected = model.classes_[model.predict_proba(features).argmax(axis=1)]
+        assert [result[head] for result in results] == list(expected)
+
+    expected_confidence = np.minimum(
+        classifier.models['category'].predict_proba(features).max(axis=1),
+        classifier.models['sentiment'].predict_proba(features).max(axis=1),
+    )
+    assert [result['confidence'] for result in results] == pytest.approx(expected_confidence, abs=1e-3)
+    for (category, sentiment, churn_risk), result in zip(COMPLAINTS, results):
+        assert (result['category'], result['sentiment'], result['churn_risk']) == (category, sentiment, churn_risk)
+
+
+def test_binary_category_head_key_terms():
+    df = labelled_interactions()
+    df = df[df['category'].isin(['internet_speed', 'product_inquiry'])]
+    classifier = local_classifier.LocalComplaintClassifier(df)
+
+    result = classifier.classify("internet speed is very slow")
+    assert result['category'] == 'internet_speed'
+    assert set(result['key_issues']) & {'internet', 'speed', 'slow', 'internet speed'}
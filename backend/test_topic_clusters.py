@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import topic_clusters
+from data_store import InteractionTable
+
+pytestmark = pytest.mark.skipif(not topic_clusters.available(), reason="scikit-learn is not installed")
+
+OPERATORS = ['Jio', 'Airtel', 'Vi', 'BSNL']
+TEMPLATES = {
+    'network_quality': [
+        "5G icon showing but speed is like 3G on {op}. What's the point of 5G tower in {city}?",
+        "Indoor network penetration very poor with {op}. Have to go to balcony to take calls.",
+        "VoLTE calls breaking with robot voice on {op}. Can't understand what other person saying.",
+    ],
+    'billing_overcharge': [
+        "Plan is {amount} but {op} bill shows {more}. What are these hidden charges?",
+        "Charged {amount} extra for international roaming I never used on {op}. Want refund immediately.",
+    ],
+    'internet_connectivity': [
+        "Internet not working for {days} days. Called customer care 3 times but no resolution with {op}.",
+    ],
+    'billing_downgrade': [
+        "Economic situation bad. Can't continue {amount} plan on {op}. Help with downgrade.",
+    ],
+    'account_issues': [
+        "Porting from {op} to Airtel taking more than {days} days. When will it complete?",
+        "Double charged by {op}. Money deducted twice - {amount} from my account. Still not refunded.",
+    ],
+}
+
+
+def templated_interactions(rows_per_template=60):
+    rng = np.random.default_rng(7)
+    rows = []
+    for category, templates in TEMPLATES.items():
+        for template in templates:
+            for _ in range(rows_per_template):
+                operator = str(rng.choice(OPERATORS))
+                rows.append({
+                    'interaction_text': template.format(
+                        op=operator, city=rng.choice(['Pune', 'Jaipur', 'Delhi']), days=rng.integers(2, 9),
+                        amount=f"₹{rng.integers(199, 999)}", more=f"₹{rng.integers(1000, 1999)}"
+                    ),
+                    'operator': operator,
+                    'category': category,
+                    'churn_score': float(rng.uniform(0, 1)),
+                })
+    return pd.DataFrame(rows)
+
+
+def test_labels_come_from_exemplars():
+    df = templated_interactions()
+    clusters = topic_clusters.TopicClusters(df, n_clusters=6)
+
+    for topic in clusters.topics(InteractionTable(df), top_n=6):
+        exemplars = " ".join(topic['exemplars']).lower()
+        assert topic['top_terms']
+        for term in topic['top_terms']:
+            assert term in exemplars, (topic['topic'], term, topic['exemplars'])
+        for part in topic['topic'].lower().split(" / "):
+            assert part in exemplars, (topic['topic'], topic['exemplars'])
+
+
+def test_terms_skip_operators_and_filler():
+    df = templated_interactions()
+    clusters = topic_clusters.TopicClusters(df, n_clusters=6)
+
+    terms = {word for topic_terms in clusters.terms for term in topic_terms for word in term.split()}
+    assert not terms & {operator.lower() for operator in OPERATORS}
+    assert not terms & topic_clusters.DOMAIN_STOP_WORDS
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer, TfidfTransformer
+    from sklearn.preprocessing import normalize
+    from sklearn.utils import murmurhash3_32
+except ImportError:  # Optional; without scikit-learn /topic-modeling falls back to the LLM on a sample
+    MiniBatchKMeans = None
+
+TOPIC_CLUSTERS = 12
+HASH_FEATURES = 2 ** 18
+KMEANS_BATCH_ROWS = 4096
+TOP_TERMS = 4
+EXEMPLARS = 3
+CLUSTER_SEED = 42
+GENERIC_TERM_SHARE = 0.5  # A term above the mean in more than this share of centroids says nothing about any one topic
+
+# Complaint filler found across every kind of issue; kept out of the features so clusters and labels follow the issue
+DOMAIN_STOP_WORDS = {
+    'customer', 'customers', 'care', 'service', 'services', 'support', 'complaint', 'complaints', 'issue', 'issues',
+    'problem', 'problems', 'resolution', 'resolved', 'days', 'day', 'times', 'time', 'weeks', 'week', 'months', 'ago',
+    'called', 'calling', 'told', 'says', 'said', 'asked', 'promised', 'please', 'help', 'need', 'want', 'really',
+    'still', 'getting', 'got', 'just', 'frustrated', 'disappointed', 'ridiculous', 'bad', 'badly', 'worst', 'unacceptable'
+}
+
+# Mean churn_score of a cluster's interactions -> severity, highest first
+SEVERITY_RULES = [
+    (0.65, 'critical'),
+    (0.5, 'high'),
+    (0.4, 'medium')
+]
+
+
+def available():
+    return MiniBatchKMeans is not None
+
+
+def severity(avg_churn):
+    for threshold, level in SEVERITY_RULES:
+        if avg_churn >= threshold:
+            return level
+    return 'low'
+
+
+class TopicClusters:
+    """Complaint topics from clustering every interaction_text, with no LLM involved.
+
+    Texts are hashed into word and bigram features (so there is no vocabulary
+    to fit or keep in memory), tf-idf weighted, and clustered with mini-batch
+    k-means. Every row belongs to a cluster, so the reported percentages are
+    true shares of all interactions. Rows appended after the fit are assigned
+    to the nearest centroid the next time the topics are read.
+    """
+
+    def __init__(self, interactions_df, n_clusters=TOPIC_CLUSTERS):
+        if not available():
+            raise ImportError("scikit-learn is required for topic clustering")
+        start = time.time()
+        # Operator names and complaint filler appear in every kind of complaint, so they would only blur the clusters
+        operators = {str(name).lower() for name in interactions_df['operator'].unique()}
+        self.hasher = HashingVectorizer(
+            n_features=HASH_FEATURES, ngram_range=(1, 2), stop_words=sorted(ENGLISH_STOP_WORDS | DOMAIN_STOP_WORDS | operators),
+            token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b", alternate_sign=False, norm=None
+        )
+        texts = interactions_df['interaction_text'].astype(str).values
+        counts = self.hasher.transform(texts)
+        self.tfidf = TfidfTransformer(sublinear_tf=True).fit(counts)
+        features = self.tfidf.transform(counts)
+
+        self.kmeans = MiniBatchKMeans(
+            n_clusters=min(n_clusters, len(texts)), batch_size=KMEANS_BATCH_ROWS, n_init=3, random_state=CLUSTER_SEED
+        ).fit(features)
+        labels = self.kmeans.labels_
+        k = self.kmeans.n_clusters
+
+        # Running per-cluster totals, so appended rows only add to them
+        self.sizes = np.bincount(labels, minlength=k)
+        self.churn_sums = np.bincount(labels, weights=interactions_df['churn_score'].astype(float).values, minlength=k)
+        self.category_counts = [Counter() for _ in range(k)]
+        categories = pd.Series(interactions_df['category'].astype(str).values)
+        for (cluster, category), count in categories.groupby(labels).value_counts().items():
+            self.category_counts[cluster][category] += count
+        self.rows_seen = len(interactions_df)
+
+        self.exemplars = self._exemplars(features, labels, texts)
+        self.terms = self._top_terms(np.asarray(features.mean(axis=0)).ravel())
+        self._lock = threading.Lock()
+        self.fit_seconds = round(time.time() - start, 2)
+
+    def _exemplars(self, features, labels, texts):
+        """The texts closest to each centroid"""
+        centroids = normalize(self.kmeans.cluster_centers_)
+        similarity = np.asarray(features @ centroids.T)
+        exemplars = []
+        for cluster in range(len(centroids)):
+            members = np.flatnonzero(labels == cluster)
+            closest = members[np.argsort(-similarity[members, cluster], kind='stable')]
+            seen, picked = set(), []
+            for row in closest:
+                if texts[row] not in seen:
+                    seen.add(texts[row])
+                    picked.append(texts[row])
+                if len(picked) == EXEMPLARS:
+                    break
+            exemplars.append(picked)
+        return exemplars
+
+    def _top_terms(self, mean_features):
+        """Each cluster's exemplar terms whose features lift its centroid most above the overall mean.
+
+        Only words and bigrams from the exemplars are candidates, so a label
+        always describes the complaints shown with it; terms in more of them
+        rank higher. Features above the mean in most centroids are skipped:
+        they are shared by many topics, so they would not describe this one.
+        """
+        analyzer = self.hasher.build_analyzer()
+        centroids = self.kmeans.cluster_centers_
+        generic = (centroids > mean_features).sum(axis=0) > GENERIC_TERM_SHARE * len(centroids)
+        terms = []
+        for centroid, exemplars in zip(centroids, self.exemplars):
+            lift = centroid - mean_features
+            # Bigrams only count where the two words are adjacent in the text, not joined across dropped stop words
+            mentions = Counter(term for text in exemplars for term in set(analyzer(text))
+                               if ' ' not in term or term in text.lower())
+            features = {term: abs(murmurhash3_32(term, seed=0)) % HASH_FEATURES for term in mentions}
+            scores = {}
+            for term, count in mentions.items():
+                if generic[features[term]] or lift[features[term]] <= 0:
+                    continue
+                # A bigram also carries its weaker word's lift, so "international roaming" beats "international"
+                words = term.split()
+                bonus = min(lift[features[word]] for word in words) if len(words) > 1 else 0
+                scores[term] = count * (lift[features[term]] + bonus)
+            picked = []
+            for term in sorted(scores, key=lambda term: (-scores[term], term)):
+                # Skip terms sharing a word with one already picked
+                if not set(term.split()) & {word for p in picked for word in p.split()}:
+                    picked.append(term)
+                if len(picked) == TOP_TERMS:
+                    break
+            terms.append(picked)
+        return terms
+
+    def _catch_up(self, interactions):
+        """Assign rows appended to the InteractionTable since the last read to their nearest centroid"""
+        with self._lock:
+            if len(interactions) <= self.rows_seen:
+                return
+            rows = interactions.since(self.rows_seen)
+            features = self.tfidf.transform(self.hasher.transform(rows['interaction_text'].astype(str).values))
+            labels = self.kmeans.predict(features)
+            k = len(self.sizes)
+            self.sizes += np.bincount(labels, minlength=k)
+            self.churn_sums += np.bincount(labels, weights=rows['churn_score'].astype(float).values, minlength=k)
+            for cluster, category in zip(labels, rows['category'].astype(str).values):
+                self.category_counts[cluster][category] += 1
+            self.rows_seen += len(rows)
+
+    def topics(self, interactions, top_n):
+        """The top_n largest clusters as topic records, after folding in any rows appended to the table"""
+        self._catch_up(interactions)
+        total = int(self.sizes.sum())
+        topics = []
+        for cluster in np.argsort(-self.sizes, kind='stable')[:top_n]:
+            size = int(self.sizes[cluster])
+            avg_churn = self.churn_sums[cluster] / size if size else 0.0
+            category, category_count = self.category_counts[cluster].most_common(1)[0] if size else ('unknown', 0)
+            terms = self.terms[cluster]
+            topics.append({
+                "topic": " / ".join(terms[:2]).title() if terms else category.replace('_', ' ').title(),
+                "description": f"{size:,} complaints mentioning {', '.join(terms) or 'mixed issues'}; "
+                               f"{category_count / size:.0%} labelled {category}" if size else "No complaints",
+                "percentage": round(size / total * 100, 1) if total else 0.0,
+                "severity": severity(avg_churn),
+                "count": size,
+                "avg_churn_score": round(avg_churn, 3),
+                "primary_category": category,
+                "top_terms": terms,
+                "exemplars": self.exemplars[cluster]
+            })
+        return topics
+
+    def stats(self):
+        return {"clusters": len(self.sizes), "rows": self.rows_seen, "fit_seconds": self.fit_seconds}
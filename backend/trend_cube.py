@@ -0,0 +1,129 @@
+import threading
+
+TREND_KEYS = ['week', 'category', 'geography']
+TREND_THRESHOLD = 5  # Week-over-week % change beyond which a series is increasing/decreasing
+
+# Same severity rules Data.py applies to each week x category x geography row of issue_trends.csv:
+# (min issue count, min avg churn score)
+SEVERITY_RULES = [('critical', 50, 0.7), ('high', 30, 0.5), ('medium', 15, None)]
+SEVERITY_LEVELS = ['low'] + [level for level, _, _ in reversed(SEVERITY_RULES)]  # Mildest first
+
+
+def severity(count, avg_churn_score):
+    for level, min_count, min_churn in SEVERITY_RULES:
+        if count > min_count and (min_churn is None or avg_churn_score > min_churn):
+            return level
+    return 'low'
+
+
+class TrendCube:
+    """week x category x geography issue counts and churn sums, maintained incrementally for /trends.
+
+    Severity is judged per geography cell, the grain Data.py uses, and a
+    week/category row reports the worst of its geographies, so a filtered and
+    an unfiltered view agree for the same place and week.
+    """
+
+    def __init__(self):
+        self.cells = {}  # (week, category, geography) -> [count, churn_sum]
+        self.categories = set()
+        self.geographies = set()
+        self.total = 0
+        self.source = None
+        self._slices = {}  # Only (category, geography) filters that exist in the cube, so it stays bounded
+        self._lock = threading.Lock()  # Ingestion folds new rows in place while request threads read
+
+    @classmethod
+    def load(cls, trends_df, interactions_df):
+        """Use Data.py's issue_trends table when it matches the interactions, else aggregate the interactions"""
+        cube = cls()
+        if trends_df is not None and cube._matches(trends_df, interactions_df):
+            cube.add_trends(trends_df)
+            cube.source = 'issue_trends'
+        else:
+            cube.add(interactions_df)
+            cube.source = 'interactions'
+        return cube
+
+    @staticmethod
+    def _matches(trends_df, interactions_df):
+        """issue_trends.csv is only trusted when it covers exactly the loaded interactions"""
+        if int(trends_df['issue_count'].sum()) != len(interactions_df):
+            return False
+        file_counts = trends_df.groupby('category', observed=True)['issue_count'].sum()
+        live_counts = interactions_df['category'].value_counts()
+        live_counts = live_counts[live_counts > 0]
+        return file_counts.astype('int64').sort_index().to_dict() == live_counts.astype('int64').sort_index().to_dict()
+
+    # ==========================================================
+    # 🔹 Incremental updates
+    # ==========================================================
+    def add(self, interactions_df):
+        """Fold new interaction rows into the cube"""
+        if len(interactions_df) == 0:
+            return
+        grouped = interactions_df.groupby(TREND_KEYS, observed=True, sort=False)['churn_score'].agg(['size', 'sum'])
+        with self._lock:
+            for key, count, churn_sum in zip(grouped.index, grouped['size'], grouped['sum']):
+                self._add_cell(key, int(count), float(churn_sum))
+
+    def add_trends(self, trends_df):
+        """Fold in precomputed rows shaped like issue_trends.csv (issue_count, avg_churn_score)"""
+        with self._lock:
+            for key, count, avg in zip(
+                zip(*(trends_df[col].astype(str) for col in TREND_KEYS)),
+                trends_df['issue_count'],
+                trends_df['avg_churn_score']
+            ):
+                self._add_cell(key, int(count), float(avg) * int(count))
+
+    def _add_cell(self, key, count, churn_sum):
+        cell = self.cells.setdefault(tuple(key), [0, 0.0])
+        cell[0] += count
+        cell[1] += churn_sum
+        self.categories.add(key[1])
+        self.geographies.add(key[2])
+        self.total += count
+        self._slices = {}
+
+    # ==========================================================
+    # 🔹 Read access
+    # ==========================================================
+    def weekly(self, category=None, geography=None):
+        """Weekly rows per category for an optional category/geography slice, with WoW change and severity"""
+        if (category and category not in self.categories) or (geography and geography not in self.geographies):
+            return []
+        slice_key = (category, geography)
+        with self._lock:
+            if slice_key not in self._slices:
+                self._slices[slice_key] = self._weekly(category, geography)
+            return self._slices[slice_key]
+
+    def _weekly(self, category, geography):
+        rolled = {}
+        for (week, cat, geo), (count, churn_sum) in self.cells.items():
+            if (category and cat != category) or (geography and geo != geography):
+                continue
+            cell = rolled.setdefault((week, cat), [0, 0.0, 0])
+            cell[0] += count
+            cell[1] += churn_sum
+            cell[2] = max(cell[2], SEVERITY_LEVELS.index(severity(count, churn_sum / count)))
+
+        rows = []
+        previous = {}  # category -> count in the prior week present
+        for week, cat in sorted(rolled):
+            count, churn_sum, severity_rank = rolled[(week, cat)]
+            avg_churn = churn_sum / count
+            prev = previous.get(cat)
+            change = round((count - prev) / prev * 100, 2) if prev else 0.0
+            previous[cat] = count
+            rows.append({
+                "week": week,
+                "category": cat,
+                "count": count,
+                "avg_churn_score": avg_churn,
+                "change_percentage": change,
+                "trend": "increasing" if change > TREND_THRESHOLD else "decreasing" if change < -TREND_THRESHOLD else "stable",
+                "severity": SEVERITY_LEVELS[severity_rank]
+            })
+        return rows